@@ -1,12 +1,27 @@
+from datetime import datetime
 from http import HTTPStatus
+from typing import Any
 
+from ninja import Query
 from ninja import Router
 from ninja.errors import HttpError
 from provider.models import Provider
-from utils.authentication import PermissionAuth
-
+from schemas import PaginationParams
+from utils.authentication import permission_auth
+from utils.conditional import conditional
+from utils.fieldsets import Fieldset
+from utils.fieldsets import attribute_field
+from utils.fieldsets import project
+from utils.fieldsets import to_schema
+from utils.fieldsets import to_values
+from utils.language import DEFAULT_LANGUAGE
+from utils.resources import Resource
+from utils.response_cache import cached
+
+from django.db.models import QuerySet
 from django.http import HttpRequest
 from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
 from .models import User
@@ -15,52 +30,114 @@ from .schemas import UserSchema
 
 router = Router()
 
+USER_FIELDSET: Fieldset = {
+    "username": attribute_field("username"),
+    "first_name": attribute_field("first_name"),
+    "last_name": attribute_field("last_name"),
+    "email": attribute_field("email"),
+    "provider_id": attribute_field("provider.provider_id"),
+}
+
+
+def user_queryset(fields: list[str] | None = None) -> QuerySet[User, dict[str, Any]]:
+    """
+    Returns a queryset of active user rows only containing the columns needed by
+    `user_to_values` for the given response fields (all if None).
+
+    The related provider is joined in the same query to avoid one additional query per row.
+    """
+    # The primary key is always loaded as it is the key for pagination
+    return project(User.objects.all(), USER_FIELDSET, DEFAULT_LANGUAGE, fields, required=("id",))
+
 
 def user_to_response(model: User) -> UserSchema:
     """
     Maps the given model to the corresponding schema.
     """
-    response = UserSchema(
-        username=model.username,
-        first_name=model.first_name,
-        last_name=model.last_name,
-        email=model.email,
-        provider_id=model.provider.provider_id,
-    )
-    return response
+    return to_schema(UserSchema, model, DEFAULT_LANGUAGE, USER_FIELDSET)
+
+
+def user_to_values(row: dict[str, Any], fields: list[str] | None = None) -> dict[str, Any]:
+    """
+    Maps the given row of `user_queryset` to the values of the corresponding schema, only
+    containing the given fields (all if None).
+
+    This is the same as `user_to_response`, but without building and validating any schema.
+    """
+    return to_values(row, DEFAULT_LANGUAGE, USER_FIELDSET, fields, exclude_none=True)
+
+
+def disabled_usernames(since: datetime) -> QuerySet[User, str]:
+    """
+    Returns the usernames of the users disabled at or after the given timestamp, these are listed
+    as deleted too.
+    """
+    disabled = User.all_objects.filter(deleted_at__gte=since).order_by("deleted_at", "id")
+    usernames: QuerySet[User, str] = disabled.values_list("username", flat=True)
+    return usernames
+
+
+# Users are not translated, the language is ignored
+USERS = Resource(
+    User,
+    USER_FIELDSET,
+    lambda lang, fields: user_queryset(fields),
+    lambda row, lang, fields: user_to_values(row, fields),
+    batch_key="username",
+    deleted=disabled_usernames,
+)
 
 
 @router.get(
     "users/{username}",
     response={200: UserSchema},
     exclude_none=True,
-    auth=PermissionAuth('access.view_user')
+    auth=permission_auth('access.view_user')
 )
-def user(request: HttpRequest, username: str) -> UserSchema:
+@conditional(User, Provider)
+def user(request: HttpRequest, username: str, fields: str | None = None) -> HttpResponse:
     """
     Get the user with the given username.
+
+    The response can be restricted to some of the fields by passing a comma separated list, for
+    example "fields=username,email". Only the columns needed for these fields are loaded.
     """
-    model = get_object_or_404(User.objects, username=username)
-    response = user_to_response(model)
-    return response
+    return USERS.get(request, fields=fields, username=username)
 
 
 @router.get(
     "users",
     response={200: UserListSchema},
     exclude_none=True,
-    auth=PermissionAuth('access.view_user')
+    auth=permission_auth('access.view_user')
 )
-def users(request: HttpRequest) -> dict[str, list[UserSchema]]:
+@conditional(User, Provider)
+@cached(User, Provider)
+def users(
+    request: HttpRequest,
+    pagination: Query[PaginationParams],
+    fields: str | None = None,
+    updated_since: datetime | None = None,
+) -> HttpResponse | StreamingHttpResponse:
     """
     Get all users.
+
+    The result can be paginated by passing a "limit". If there are more results, the response
+    contains the URL of the next page in "next". Without a limit or cursor, all users are
+    returned at once.
+
+    The response can be restricted to some of the fields, see the endpoint for a specific user.
+
+    Only the users changed since a given time can be requested by passing an ISO 8601
+    timestamp, for example "updated_since=2025-01-31T12:00:00Z". The first page then also lists
+    the usernames of the users deleted or disabled since that time in "deleted". Timestamps older
+    than the retention period of deletions are rejected with 410 (Gone), a full sync is required
+    then.
     """
-    models = User.objects.all()
-    responses = [user_to_response(model) for model in models]
-    return {"items": responses}
+    return USERS.get_list(request, pagination, fields=fields, updated_since=updated_since)
 
 
-@router.post("users", response={201: UserSchema}, auth=PermissionAuth('access.add_user'))
+@router.post("users", response={201: UserSchema}, auth=permission_auth('access.add_user'))
 def create(request: HttpRequest, user_in: UserSchema) -> UserSchema:
     """Create the given user and return it.
 
@@ -72,6 +149,9 @@ def create(request: HttpRequest, user_in: UserSchema) -> UserSchema:
         - 422 (Unprocessable Content) if there is any other invalid value
         - 500 (Internal Server Error) if there is inconsistency with cognito
         - 503 (Service Unavailable) if cognito cannot be reached
+
+    The 500 and 503 status codes only apply if COGNITO_OUTBOX is disabled, otherwise the change is
+    applied to cognito later by the cognito_outbox command.
     """
     provider = get_object_or_404(Provider, provider_id=user_in.provider_id)
 
@@ -85,7 +165,7 @@ def create(request: HttpRequest, user_in: UserSchema) -> UserSchema:
     return user_to_response(user_out)
 
 
-@router.delete("users/{username}", auth=PermissionAuth('access.delete_user'))
+@router.delete("users/{username}", auth=permission_auth('access.delete_user'))
 def delete(request: HttpRequest, username: str) -> HttpResponse:
     """
     Delete the user with the given username.
@@ -95,13 +175,16 @@ def delete(request: HttpRequest, username: str) -> HttpResponse:
     - 404 (Not Found) if there is no user with the given username
     - 500 (Internal Server Error) if there is inconsistency with cognito
     - 503 (Service Unavailable) if cognito cannot be reached
+
+    The 500 and 503 status codes only apply if COGNITO_OUTBOX is disabled, otherwise the change is
+    applied to cognito later by the cognito_outbox command.
     """
     user_to_delete = get_object_or_404(User, username=username)
     user_to_delete.disable()
     return HttpResponse(status=204)
 
 
-@router.put("users/{username}", auth=PermissionAuth('access.change_user'))
+@router.put("users/{username}", auth=permission_auth('access.change_user'))
 def update_user(
     request: HttpRequest, username: str, user_in: UserSchema
 ) -> HttpResponse | UserSchema:
@@ -113,6 +196,9 @@ def update_user(
     - 404 (Not Found) if there is no user with the given username
     - 500 (Internal Server Error) if there is an inconsistency with Cognito
     - 503 (Service Unavailable) if Cognito cannot be reached
+
+    The 500 and 503 status codes only apply if COGNITO_OUTBOX is disabled, otherwise the change is
+    applied to Cognito later by the cognito_outbox command.
     """
     user_object = get_object_or_404(User, username=username)
 
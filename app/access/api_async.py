@@ -0,0 +1,74 @@
+from datetime import datetime
+from inspect import getdoc
+
+from ninja import Query
+from ninja import Router
+from provider.models import Provider
+from schemas import PaginationParams
+from utils.authentication import permission_auth
+from utils.conditional import conditional
+from utils.response_cache import cached
+
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+
+from . import api
+from .api import USERS
+from .models import User
+from .schemas import UserListSchema
+from .schemas import UserSchema
+
+# Async versions of the operations of `access.api`, served in ASGI mode (see `config.asgi`).
+# Creating, updating and deleting users call Cognito, these operations stay synchronous.
+router = Router()
+
+
+@router.get(
+    "users/{username}",
+    response={200: UserSchema},
+    exclude_none=True,
+    auth=permission_auth('access.view_user'),
+    description=getdoc(api.user),
+)
+@conditional(User, Provider)
+async def user(request: HttpRequest, username: str, fields: str | None = None) -> HttpResponse:
+    return await USERS.aget(request, fields=fields, username=username)
+
+
+@router.get(
+    "users",
+    response={200: UserListSchema},
+    exclude_none=True,
+    auth=permission_auth('access.view_user'),
+    description=getdoc(api.users),
+)
+@conditional(User, Provider)
+@cached(User, Provider)
+async def users(
+    request: HttpRequest,
+    pagination: Query[PaginationParams],
+    fields: str | None = None,
+    updated_since: datetime | None = None,
+) -> HttpResponse | StreamingHttpResponse:
+    return await USERS.aget_list(request, pagination, fields=fields, updated_since=updated_since)
+
+
+router.add_api_operation(
+    "users", ["POST"],
+    api.create,
+    response={201: UserSchema},
+    auth=permission_auth('access.add_user')
+)
+router.add_api_operation(
+    "users/{username}",
+    ["DELETE"],
+    api.delete,
+    auth=permission_auth('access.delete_user'),
+)
+router.add_api_operation(
+    "users/{username}",
+    ["PUT"],
+    api.update_user,
+    auth=permission_auth('access.change_user'),
+)
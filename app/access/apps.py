@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AccessConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'access'
+
+    def ready(self) -> None:
+        # pylint: disable=import-outside-toplevel
+        from utils.response_cache import invalidate_on_change
+
+        invalidate_on_change(self.get_model("User"))
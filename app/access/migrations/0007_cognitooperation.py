@@ -0,0 +1,51 @@
+# Generated by Django 5.2.14 on 2026-10-18 08:22
+
+import django.utils.timezone
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('access', '0006_alter_user_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CognitoOperation',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    )
+                ),
+                ('user_id', models.CharField(verbose_name='User ID')),
+                (
+                    'type',
+                    models.CharField(
+                        choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete'),
+                                 ('disable', 'Disable')],
+                        verbose_name='Type'
+                    )
+                ),
+                ('username', models.CharField(verbose_name='User name')),
+                ('email', models.CharField(verbose_name='Email')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                (
+                    'next_attempt',
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name='Next attempt'
+                    )
+                ),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Last error')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['user_id', 'id'], name='access_cogn_user_id_c0bc2b_idx')
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.14 on 2026-10-18 08:46
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('access', '0007_cognitooperation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CognitoSyncState',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    )
+                ),
+                ('user_id', models.CharField(unique=True, verbose_name='User ID')),
+                ('remote_hash', models.CharField(verbose_name='Remote hash')),
+                ('synced', models.DateTimeField(verbose_name='Synced')),
+            ],
+        ),
+    ]
@@ -0,0 +1,15 @@
+from utils.tombstones import record_deletions
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('access', '0008_cognitosyncstate'),
+        ('support', '0003_record_tombstones'),
+    ]
+
+    operations = [
+        record_deletions("access_user", "access.User", "username"),
+    ]
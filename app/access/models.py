@@ -1,3 +1,6 @@
+from datetime import UTC
+from datetime import datetime
+from hashlib import sha256
 from logging import getLogger
 from typing import Any
 from typing import Iterable
@@ -6,6 +9,7 @@ from cognito.utils.client import Client
 from utils.fields import CustomSlugField
 from utils.short_id import generate_short_id
 
+from django.conf import settings
 from django.db import models
 from django.db import transaction
 from django.db.models.base import ModelBase
@@ -21,6 +25,97 @@ class CognitoInconsistencyError(Exception):
     """
 
 
+class CognitoOperation(models.Model):
+    """
+    A change of a user that is applied to cognito.
+
+    With COGNITO_OUTBOX, the operations are written in the same transaction as the user (i.e. an
+    outbox) and applied later by the cognito_outbox command. Otherwise, they are applied directly.
+    The username and email are copied, so the operations of a user can be applied in order even if
+    the user has been changed or deleted in the meantime.
+    """
+
+    _context = "Cognito operation model"
+
+    class Type(models.TextChoices):
+        CREATE = "create"
+        UPDATE = "update"
+        DELETE = "delete"
+        DISABLE = "disable"
+
+    user_id = models.CharField(_(_context, "User ID"))
+    type = models.CharField(_(_context, "Type"), choices=Type.choices)
+    username = models.CharField(_(_context, "User name"))
+    email = models.CharField(_(_context, "Email"))
+    created = models.DateTimeField(_(_context, "Created"), auto_now_add=True)
+    attempts = models.PositiveIntegerField(_(_context, "Attempts"), default=0)
+    next_attempt = models.DateTimeField(_(_context, "Next attempt"), default=timezone.now)
+    last_error = models.TextField(_(_context, "Last error"), blank=True, default="")
+
+    class Meta:
+        indexes = [models.Index(fields=["user_id", "id"])]
+
+    def __str__(self) -> str:
+        return f"{self.type} {self.user_id}"
+
+    def apply(self, client: Client) -> None:
+        """Applies the operation to cognito.
+
+        Raises CognitoInconsistencyError if the user does not exist, respectively already exists.
+        """
+
+        if self.type == self.Type.CREATE:
+            if not client.create_user(self.user_id, self.username, self.email):
+                logger.critical("User %s already exists in cognito, not created", self.user_id)
+                raise CognitoInconsistencyError()
+        elif self.type == self.Type.UPDATE:
+            if not client.update_user(self.user_id, self.username, self.email):
+                logger.critical("User %s does not exist in cognito, not updated", self.user_id)
+                raise CognitoInconsistencyError()
+        elif self.type == self.Type.DELETE:
+            if not client.delete_user(self.user_id):
+                logger.critical("User %s does not exist in cognito, not deleted", self.user_id)
+                raise CognitoInconsistencyError()
+        elif self.type == self.Type.DISABLE:
+            if not client.disable_user(self.user_id):
+                logger.critical("User %s does not exist in cognito, not disabled", self.user_id)
+                raise CognitoInconsistencyError()
+
+
+class CognitoSyncState(models.Model):
+    """
+    The state of a user in cognito after its last synchronization by cognito_sync.
+
+    The incremental synchronization only reconciles the users which changed since (i.e. whose
+    `updated` is newer than `synced`), and skips the cognito calls if the synchronized attributes
+    are unchanged (i.e. the hash of the user matches `remote_hash`).
+    """
+
+    _context = "Cognito sync state model"
+
+    user_id = models.CharField(_(_context, "User ID"), unique=True)
+    remote_hash = models.CharField(_(_context, "Remote hash"))
+    synced = models.DateTimeField(_(_context, "Synced"))
+
+    def __str__(self) -> str:
+        return str(self.user_id)
+
+    @classmethod
+    def invalidate(cls, user_id: str) -> None:
+        """Marks the user as unsynchronized, so that the next incremental synchronization
+        reconciles it, even if it has not changed since."""
+
+        cls.objects.filter(user_id=user_id
+                          ).update(remote_hash="", synced=datetime.min.replace(tzinfo=UTC))
+
+    @staticmethod
+    def get_hash(user: "User") -> str:
+        """Returns the hash of the attributes of the user synchronized with cognito."""
+
+        attributes = f"{user.username}\n{user.email}\n{user.is_active}"
+        return sha256(attributes.encode()).hexdigest()
+
+
 class ActiveUserManager(models.Manager["User"]):
     """ActiveUserManager filters out disabled users."""
 
@@ -35,7 +130,8 @@ class User(models.Model):
     The default queryset (`objects`) excludes disabled users (i.e., those with the `deleted_at`
     attribute set to a valid timestamp). To include disabled users in queries, use `all_objects`.
 
-    This model automatically synchronizes with Cognito during save and delete operations.
+    This model automatically synchronizes with Cognito during save and delete operations, either
+    directly or through the outbox (see `CognitoOperation`).
     Note: Bulk operations performed via the queryset do not trigger synchronization with Cognito.
     Note: Direct modifications to the `deleted_at` field do not enable/disable the user in Cognito.
     """
@@ -48,7 +144,7 @@ class User(models.Model):
     username = CustomSlugField(_(_context, "User name"), unique=True, max_length=100)
     user_id = models.CharField(_(_context, "User ID"), unique=True, default=generate_short_id)
     created = models.DateTimeField(_(_context, "Created"), auto_now_add=True)
-    updated = models.DateTimeField(_(_context, "Updated"), auto_now=True)
+    updated = models.DateTimeField(_(_context, "Updated"), auto_now=True, db_index=True)
     first_name = models.CharField(_(_context, "First name"))
     last_name = models.CharField(_(_context, "Last name"))
     email = models.EmailField(_(_context, "Email"))
@@ -75,43 +171,46 @@ class User(models.Model):
         """Validates the model before writing it to the database and syncs with cognito."""
 
         self.full_clean()
-        client = Client()
         with transaction.atomic():
             if self._state.adding:
                 super().save(force_insert=True, using=using, update_fields=update_fields)
-                if not client.create_user(self.user_id, self.username, self.email):
-                    logger.critical("User %s already exists in cognito, not created", self.user_id)
-                    raise CognitoInconsistencyError()
+                self.sync_cognito(CognitoOperation.Type.CREATE)
             else:
                 User.all_objects.select_for_update().filter(pk=self.pk).get()
                 super().save(force_update=True, using=using, update_fields=update_fields)
-                if not client.update_user(self.user_id, self.username, self.email):
-                    logger.critical("User %s does not exist in cognito, not updated", self.user_id)
-                    raise CognitoInconsistencyError()
+                self.sync_cognito(CognitoOperation.Type.UPDATE)
 
     def delete(self,
                using: str | None = None,
                keep_parents: bool = False) -> tuple[int, dict[str, int]]:
         """Deletes the user from the database and cognito."""
 
-        client = Client()
         with transaction.atomic():
             User.all_objects.select_for_update().filter(pk=self.pk).get()
             result = super().delete(using=using, keep_parents=keep_parents)
-            if not client.delete_user(self.user_id):
-                logger.critical("User %s does not exist in cognito, not deleted", self.user_id)
-                raise CognitoInconsistencyError()
+            self.sync_cognito(CognitoOperation.Type.DELETE)
             return result
 
     def disable(self) -> None:
         """Disables the user in the database and cognito."""
 
-        client = Client()
         with transaction.atomic():
             User.all_objects.select_for_update().filter(pk=self.pk).get()
             # use django.utils.timezone over datetime to use timezone aware objects.
             self.deleted_at = timezone.now()
             super().save(force_update=True)
-            if not client.disable_user(self.user_id):
-                logger.critical("User %s does not exist in cognito, not disabled", self.user_id)
-                raise CognitoInconsistencyError()
+            self.sync_cognito(CognitoOperation.Type.DISABLE)
+
+    def sync_cognito(self, operation_type: str) -> None:
+        """Applies the change to cognito, or adds it to the outbox with COGNITO_OUTBOX.
+
+        Must be called within the transaction writing the change to the database.
+        """
+
+        operation = CognitoOperation(
+            user_id=self.user_id, type=operation_type, username=self.username, email=self.email
+        )
+        if settings.COGNITO_OUTBOX:
+            operation.save()
+        else:
+            operation.apply(Client())
@@ -12,3 +12,5 @@ class UserSchema(Schema):
 
 class UserListSchema(Schema):
     items: list[UserSchema]
+    next: str | None = None
+    deleted: list[str] | None = None
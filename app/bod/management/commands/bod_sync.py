@@ -1,7 +1,13 @@
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import nullcontext
+from itertools import batched
 from typing import Any
 from typing import Literal
+from typing import NamedTuple
 from typing import TextIO
 from typing import TypedDict
+from typing import TypeVar
 from typing import cast
 
 from bod.models import BodContactOrganisation
@@ -11,13 +17,143 @@ from bod.models import BodTranslations
 from distributions.models import Attribution
 from distributions.models import Dataset
 from provider.models import Provider
+from utils.chunks import batches
+from utils.chunks import chunk_transaction
+from utils.chunks import stream
 from utils.command import CustomBaseCommand
+from utils.fingerprint import get_fingerprint
+from utils.merge import merge_rows
+from utils.response_cache import bump_version_on_commit
+from utils.tombstones import purge_tombstones
 
+from django.core.exceptions import ValidationError
+from django.core.management.base import CommandError
 from django.core.management.base import CommandParser
 from django.db import transaction
+from django.db.models import Model
+from django.utils import timezone
 
 Counter = TypedDict("Counter", {"added": int, "cleared": int, "removed": int, "updated": int})
 Operation = Literal["added", "cleared", "removed", "updated"]
+ModelT = TypeVar("ModelT", bound=Model)
+
+# Number of rows written per query
+BATCH_SIZE = 1000
+
+# Attributes of the models and the BOD attributes they are imported from
+PROVIDER_ATTRIBUTES = (
+    ("name_de", "name_de"),
+    ("name_en", "name_en"),
+    ("name_fr", "name_fr"),
+    ("name_it", "name_it"),
+    ("name_rm", "name_rm"),
+    ("acronym_de", "abkuerzung_de"),
+    ("acronym_fr", "abkuerzung_fr"),
+    ("acronym_en", "abkuerzung_en"),
+    ("acronym_it", "abkuerzung_it"),
+    ("acronym_rm", "abkuerzung_rm"),
+    ("provider_id", "attribution"),
+)
+ATTRIBUTION_ATTRIBUTES = (
+    ("name_de", "de"),
+    ("name_fr", "fr"),
+    ("name_en", "en"),
+    ("name_it", "it"),
+    ("name_rm", "rm"),
+    ("description_de", "de"),
+    ("description_fr", "fr"),
+    ("description_en", "en"),
+    ("description_it", "it"),
+    ("description_rm", "rm"),
+    ("attribution_id", ""),  # will be updated to organization.attribution
+)
+DATASET_ATTRIBUTES = (
+    ("dataset_id", "id_dataset"),
+    ("geocat_id", "fk_geocat"),
+)
+DATASET_META_ATTRIBUTES = (
+    ("title_de", "bezeichnung_de"),
+    ("title_fr", "bezeichnung_fr"),
+    ("title_en", "bezeichnung_en"),
+    ("title_it", "bezeichnung_it"),
+    ("title_rm", "bezeichnung_rm"),
+    ("description_de", "abstract_de"),
+    ("description_fr", "abstract_fr"),
+    ("description_en", "abstract_en"),
+    ("description_it", "abstract_it"),
+    ("description_rm", "abstract_rm"),
+)
+
+
+class SourceRow(NamedTuple):
+    """The values of a model from the BOD, by key fields and other fields."""
+
+    keys: dict[str, Any]
+    values: dict[str, Any]
+    # Used in the output
+    label: str | None
+
+    def get_fingerprint(self) -> str:
+        return get_fingerprint(self.values)
+
+
+def get_key(keys: dict[str, Any]) -> tuple[Any, ...]:
+    """Return the key values of a row, with the primary key of related models."""
+
+    return tuple(value.pk if isinstance(value, Model) else value for value in keys.values())
+
+
+def index_by(instances: Any, *attributes: str) -> dict[Any, Any]:
+    """Map the given attribute values to the first instance (by primary key) having them."""
+
+    index: dict[Any, Any] = {}
+    for instance in instances.order_by("pk"):
+        key = tuple(getattr(instance, attribute) for attribute in attributes)
+        index.setdefault(key if len(key) > 1 else key[0], instance)
+    return index
+
+
+class UniqueValues:
+    """Tracks the values of the unique fields of a model while importing.
+
+    The models are validated before being written in bulk, the unique fields are checked against
+    the values in the database and the ones of the already validated models, without querying the
+    database for every model.
+    """
+
+    def __init__(self, model: type[Model], fields: tuple[str, ...]) -> None:
+        self.fields = fields
+        # The owner of each value and the value of each owner, by field
+        self.owners: dict[str, dict[Any, Any]] = {field: {} for field in fields}
+        self.values: dict[str, dict[Any, Any]] = {field: {} for field in fields}
+        for row in model._default_manager.values("pk", *fields):
+            for field in fields:
+                self.owners[field][row[field]] = row["pk"]
+                self.values[field][row["pk"]] = row[field]
+
+    @staticmethod
+    def get_owner(instance: Model) -> Any:
+        return instance.pk if instance.pk is not None else ("new", id(instance))
+
+    def validate(self, instance: Model, exclude: list[str] | None = None) -> None:
+        """Validate the model like `full_clean` and take its unique values.
+
+        Related models are not validated, as they are taken from the database.
+        """
+
+        instance.full_clean(exclude=exclude, validate_unique=False)
+        owner = self.get_owner(instance)
+        errors = {}
+        for field in self.fields:
+            other = self.owners[field].get(getattr(instance, field), owner)
+            if other != owner and self.values[field].get(other) == getattr(instance, field):
+                errors[field] = [instance.unique_error_message(type(instance), (field,))]
+        if errors:
+            raise ValidationError(errors)
+        for field in self.fields:
+            value = getattr(instance, field)
+            self.owners[field][value] = owner
+            self.values[field][owner] = value
 
 
 class Command(CustomBaseCommand):
@@ -32,6 +168,9 @@ class Command(CustomBaseCommand):
     ):
         super().__init__(stdout, stderr, no_color, force_color)
         self.counts: dict[str, Counter] = {}
+        self.engine = "orm"
+        self.commit_every = 0
+        self.chunk_size = 2000
 
     def add_arguments(self, parser: CommandParser) -> None:
         super().add_arguments(parser)
@@ -60,6 +199,30 @@ class Command(CustomBaseCommand):
             action="store_true",
             help="Import datasets",
         )
+        parser.add_argument(
+            "--engine",
+            choices=["orm", "merge"],
+            default="orm",
+            help=(
+                "Write the changes in batches with the ORM or copy the rows into a staging table "
+                "and apply them with one statement per model"
+            ),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of rows read from the BOD at once, with a server-side cursor",
+        )
+        parser.add_argument(
+            "--commit-every",
+            type=int,
+            default=0,
+            help=(
+                "Commit the changes in chunks of the given number of rows instead of all at once. "
+                "An interrupted import can be resumed by running it again"
+            ),
+        )
 
     def increment_counter(self, model_name: str, operation: Operation, value: int = 1) -> None:
         """Updates internal counters of operations on models."""
@@ -69,7 +232,7 @@ class Command(CustomBaseCommand):
 
     def update_model(
         self,
-        model: Provider | Attribution | Dataset,
+        model: Model,
         attribute: str,
         new_value: str,
         is_new_model: bool,
@@ -83,19 +246,244 @@ class Command(CustomBaseCommand):
             setattr(model, attribute, new_value)
             if not is_new_model:
                 self.print(
-                    f"Changed {model.__class__.__name__} {model.id} {attribute}"
+                    f"Changed {model.__class__.__name__} {model.pk} {attribute}"
                     f" from '{old_value}' to '{new_value}'"
                 )
         return changed
 
+    def update_attributes(self, model: Model, values: dict[str, Any], is_new_model: bool) -> bool:
+        """Update the attributes of a model and return if any changed."""
+
+        any_changed = False
+        for attribute, value in values.items():
+            changed = self.update_model(model, attribute, value, is_new_model)
+            any_changed = any_changed or changed
+        return any_changed
+
+    def write_models(
+        self, model: type[ModelT], added: list[ModelT], changed: list[ModelT], fields: list[str]
+    ) -> None:
+        """Update the changed and insert the added models in batches.
+
+        The changed models are updated first, as they may free unique values taken by added ones.
+        """
+
+        now = timezone.now()
+        for instance in changed:
+            setattr(instance, "updated", now)
+        model._default_manager.bulk_update(changed, [*fields, "updated"], batch_size=BATCH_SIZE)
+        model._default_manager.bulk_create(added, batch_size=BATCH_SIZE)
+
+    def get_fingerprints(self, model: type[Model], keys: tuple[str, ...],
+                         fields: tuple[str, ...]) -> dict[tuple[Any, ...], tuple[Any, str | None]]:
+        """Return the primary keys and fingerprints of the imported models, by key values.
+
+        The fingerprints are compared without loading the models, so that unchanged rows are
+        skipped cheaply. A fingerprint is only returned if it matches the stored values of the
+        given fields, so that models edited locally (e.g. in the admin) are imported again.
+        """
+
+        attributes = [getattr(model._meta.get_field(key), "attname") for key in keys]
+        fingerprints: dict[tuple[Any, ...], tuple[Any, str | None]] = {}
+        queryset = model._default_manager.filter(_legacy_id__isnull=False).order_by("pk")
+        for pk, fingerprint, *values in queryset.values_list(
+            "pk", "_legacy_fingerprint", *fields, *attributes
+        ):
+            stored = dict(zip(fields, values[:len(fields)]))
+            if fingerprint != get_fingerprint(stored):
+                fingerprint = None
+            fingerprints.setdefault(tuple(values[len(fields):]), (pk, fingerprint))
+        return fingerprints
+
+    def import_models(
+        self,
+        model: type[Model],
+        keys: tuple[str, ...],
+        fields: tuple[str, ...],
+        unique: tuple[str, ...],
+        rows: Iterable[SourceRow],
+        skip_invalid: bool,
+    ) -> None:
+        """Add the rows with unknown keys and update the changed ones, with the selected engine.
+
+        The rows are processed in chunks of `--chunk-size` while they are read from the BOD, rows
+        with an unchanged fingerprint (of the given fields) are skipped. Invalid rows are skipped with a warning if
+        `skip_invalid` is set, otherwise the import fails. With `--commit-every`, the changed rows
+        are committed in chunks. As committed rows have their new fingerprint, an interrupted
+        import resumes with the remaining rows.
+        """
+
+        fingerprints = self.get_fingerprints(model, keys, fields)
+        unique_values = None
+        for read_chunk in batched(rows, self.chunk_size):
+            changed_rows = []
+            for row in read_chunk:
+                pk, fingerprint = fingerprints.get(get_key(row.keys), (None, None))
+                if fingerprint != row.get_fingerprint():
+                    changed_rows.append((pk, row))
+            if not changed_rows:
+                continue
+
+            for chunk in batches(changed_rows, self.commit_every):
+                with chunk_transaction(self.commit_every, Provider, Attribution, Dataset):
+                    if self.engine == "merge":
+                        changed = [row for _, row in chunk]
+                        self.merge_models(model, keys, unique, changed, skip_invalid)
+                        continue
+                    if unique_values is None:
+                        unique_values = UniqueValues(model, unique)
+                    self.write_rows(model, keys, list(fields), unique_values, chunk, skip_invalid)
+
+    def write_rows(
+        self,
+        model: type[Model],
+        keys: tuple[str, ...],
+        fields: list[str],
+        unique_values: UniqueValues,
+        changed_rows: Iterable[tuple[Any, SourceRow]],
+        skip_invalid: bool,
+    ) -> None:
+        """Validate and write the changed rows with the ORM."""
+
+        changed_rows = list(changed_rows)
+        model_name = model._meta.model_name or ""
+        instances = model._default_manager.in_bulk([pk for pk, _ in changed_rows if pk])
+        exclude = [key for key in keys if model._meta.get_field(key).is_relation]
+        added: list[Model] = []
+        changed: list[Model] = []
+        fingerprinted: list[Model] = []
+
+        for pk, row in changed_rows:
+            instance = instances.get(pk)
+            is_new_model = instance is None
+            if instance is None:
+                instance = model(**row.keys)
+                self.update_attributes(instance, row.values, True)
+            elif not self.update_attributes(instance, row.values, False):
+                # Only the fingerprint is missing or outdated
+                setattr(instance, "_legacy_fingerprint", row.get_fingerprint())
+                fingerprinted.append(instance)
+                continue
+
+            try:
+                unique_values.validate(instance, exclude=exclude)
+            except ValidationError as e:
+                if not skip_invalid:
+                    raise
+                action = "Creating" if is_new_model else "Saving"
+                self.print_warning(f"{action} {model_name} '{row.label}' failed: {e}")
+                continue
+
+            setattr(instance, "_legacy_fingerprint", row.get_fingerprint())
+            if is_new_model:
+                added.append(instance)
+                self.increment_counter(model_name, "added")
+                self.print(f"Added {model_name} '{row.label}'")
+            else:
+                changed.append(instance)
+                self.increment_counter(model_name, "updated")
+
+        self.write_models(model, added, changed, [*fields, "_legacy_fingerprint"])
+        model._default_manager.bulk_update(
+            fingerprinted, ["_legacy_fingerprint"], batch_size=BATCH_SIZE
+        )
+
+    def merge_models(
+        self,
+        model: type[Model],
+        keys: tuple[str, ...],
+        unique: tuple[str, ...],
+        rows: list[SourceRow],
+        skip_invalid: bool,
+    ) -> None:
+        """Apply the rows with one statement per model, see `utils.merge.merge_rows`.
+
+        The rows are validated beforehand, except for the unique fields which are checked by the
+        statement.
+        """
+
+        model_name = model._meta.model_name or ""
+        exclude = [key for key in keys if model._meta.get_field(key).is_relation]
+        labels: dict[tuple[Any, ...], str | None] = {}
+        valid = []
+        for row in rows:
+            try:
+                model(**row.keys, **row.values).full_clean(exclude=exclude, validate_unique=False)
+            except ValidationError as e:
+                if not skip_invalid:
+                    raise
+                self.print_warning(f"Importing {model_name} '{row.label}' failed: {e}")
+                continue
+            labels[get_key(row.keys)] = row.label
+            valid.append(row)
+
+        if not valid:
+            return
+        fields = list(valid[0].values)
+        result = merge_rows(
+            model,
+            keys,
+            fields,
+            unique,
+            ([*get_key(row.keys), *row.values.values(), row.get_fingerprint()] for row in valid),
+            untracked=["_legacy_fingerprint"],
+        )
+
+        for key, conflicting, exists in result.conflicts:
+            error = ValidationError({
+                field: [model().unique_error_message(model, (field,))] for field in conflicting
+            })
+            if not skip_invalid:
+                raise error
+            action = "Saving" if exists else "Creating"
+            self.print_warning(f"{action} {model_name} '{labels[key]}' failed: {error}")
+        for merged in result.added:
+            self.increment_counter(model_name, "added")
+            self.print(f"Added {model_name} '{labels[merged.key]}'")
+        for merged in result.updated:
+            old = merged.old or {}
+            changed = [field for field in fields if old[field] != merged.new[field]]
+            if changed:
+                # Otherwise only the fingerprint was missing or outdated
+                self.increment_counter(model_name, "updated")
+            for field in changed:
+                self.print(
+                    f"Changed {model.__name__} {merged.pk} {field}"
+                    f" from '{old[field]}' to '{merged.new[field]}'"
+                )
+
     def clear_providers(self) -> None:
         """Remove existing providers previously imported from BOD."""
 
-        _, cleared = Provider.objects.filter(_legacy_id__isnull=False).delete()
+        with chunk_transaction(self.commit_every, Provider, Attribution, Dataset):
+            _, cleared = Provider.objects.filter(_legacy_id__isnull=False).delete()
         for model_class, count in cleared.items():
             model_name = model_class.split(".")[-1].lower()
             self.increment_counter(model_name, "cleared", count)
 
+    def remove_orphans(self, model: type[Model], processed: set[int]) -> None:
+        """Remove the models with a legacy id not found in the BOD.
+
+        The deletions are recorded as tombstones by a database trigger. This happens once all rows
+        of the BOD were processed, so that only actual orphans are removed.
+        """
+
+        orphans = model._default_manager.filter(_legacy_id__isnull=False
+                                               ).exclude(_legacy_id__in=processed)
+        chunks = [orphans]
+        if self.commit_every:
+            pks = list(orphans.values_list("pk", flat=True))
+            chunks = [
+                model._default_manager.filter(pk__in=chunk)
+                for chunk in batches(pks, self.commit_every)
+            ]
+        for chunk in chunks:
+            with chunk_transaction(self.commit_every, Provider, Attribution, Dataset):
+                _, removed = chunk.delete()
+            for model_class, count in removed.items():
+                model_name = model_class.split(".")[-1].lower()
+                self.increment_counter(model_name, "removed", count)
+
     def import_providers(self) -> None:
         """Import providers from the old contact organizations table.
 
@@ -107,9 +495,22 @@ class Command(CustomBaseCommand):
         are migrated to the table providers.
 
         """
-        processed = set()
+        processed: set[int] = set()
+        self.import_models(
+            Provider,
+            ("_legacy_id",),
+            tuple(attribute for attribute, _ in PROVIDER_ATTRIBUTES),
+            ("provider_id",),
+            self.provider_rows(processed),
+            False,
+        )
+        self.remove_orphans(Provider, processed)
 
-        for organization in BodContactOrganisation.objects.all():
+    def provider_rows(self, processed: set[int]) -> Iterator[SourceRow]:
+        """Read the providers from the BOD and add their legacy IDs to `processed`."""
+
+        organizations = stream(BodContactOrganisation.objects.all(), self.chunk_size)
+        for organization in organizations:
             if (not organization.attribution or len(organization.attribution.split(".")) != 2):
                 # Skip entries that are not a provider.
                 # BodContactOrganisation (table 'contactorganisation') contains providers and
@@ -121,66 +522,14 @@ class Command(CustomBaseCommand):
             legacy_id = organization.pk_contactorganisation_id
             processed.add(legacy_id)
 
-            # Get or create provider
-            is_new_model = False
-            provider = Provider.objects.filter(_legacy_id=legacy_id).first()
-            if not provider:
-                is_new_model = True
-                provider = Provider.objects.create(
-                    _legacy_id=legacy_id,
-                    provider_id=organization.attribution,
-                    acronym_de="undefined",
-                    acronym_fr="undefined",
-                    acronym_en="undefined",
-                    name_de="undefined",
-                    name_fr="undefined",
-                    name_en="undefined",
-                )
-                self.increment_counter("provider", "added")
-                self.print(f"Added provider '{organization.name_en}'")
-
-            self.update_provider(provider, organization, is_new_model)
-            provider.save()
-
-        # Remove orphaned providers
-        orphans = Provider.objects.filter(_legacy_id__isnull=False
-                                         ).exclude(_legacy_id__in=processed)
-        _, removed = orphans.delete()
-        for model_class, count in removed.items():
-            model_name = model_class.split(".")[-1].lower()
-            self.increment_counter(model_name, "removed", count)
-
-    def update_provider(
-        self,
-        provider: Provider,
-        organization: BodContactOrganisation,
-        is_new_model: bool,
-    ) -> None:
-        """Update the attributes of a provider."""
-
-        any_changed = False
-        for provider_attribute, organization_attribute in (
-            ("name_de", "name_de"),
-            ("name_en", "name_en"),
-            ("name_fr", "name_fr"),
-            ("name_it", "name_it"),
-            ("name_rm", "name_rm"),
-            ("acronym_de", "abkuerzung_de"),
-            ("acronym_fr", "abkuerzung_fr"),
-            ("acronym_en", "abkuerzung_en"),
-            ("acronym_it", "abkuerzung_it"),
-            ("acronym_rm", "abkuerzung_rm"),
-            ("provider_id", "attribution"),
-        ):
-            changed = self.update_model(
-                provider,
-                provider_attribute,
-                getattr(organization, organization_attribute),
-                is_new_model,
+            yield SourceRow(
+                {"_legacy_id": legacy_id},
+                {
+                    provider_attribute: getattr(organization, organization_attribute)
+                    for provider_attribute, organization_attribute in PROVIDER_ATTRIBUTES
+                },
+                organization.name_en,
             )
-            any_changed = any_changed or changed
-        if any_changed and not is_new_model:
-            self.increment_counter("provider", "updated")
 
     def import_attribution(self) -> None:
         """Import the attributions from the old contact organizations table.
@@ -194,9 +543,35 @@ class Command(CustomBaseCommand):
 
         """
 
-        processed = set()
+        processed: set[int] = set()
+        self.import_models(
+            Attribution,
+            ("provider", "_legacy_id"),
+            tuple(attribute for attribute, _ in ATTRIBUTION_ATTRIBUTES),
+            ("attribution_id",),
+            self.attribution_rows(processed),
+            False,
+        )
+        self.remove_orphans(Attribution, processed)
+
+    def attribution_rows(self, processed: set[int]) -> Iterator[SourceRow]:
+        """Read the attributions from the BOD and add their legacy IDs to `processed`."""
 
-        for organization in BodContactOrganisation.objects.all():
+        providers = index_by(Provider.objects.all(), "provider_id")
+        organizations = stream(BodContactOrganisation.objects.all(), self.chunk_size)
+        for chunk in batched(organizations, self.chunk_size):
+            yield from self.attribution_chunk_rows(chunk, providers, processed)
+
+    def attribution_chunk_rows(
+        self,
+        organizations: tuple[BodContactOrganisation, ...],
+        providers: dict[Any, Provider],
+        processed: set[int],
+    ) -> Iterator[SourceRow]:
+        translations = BodTranslations.objects.in_bulk([
+            organization.attribution for organization in organizations if organization.attribution
+        ])
+        for organization in organizations:
             # Keep track of processed organizations for orphan removal
             legacy_id = organization.pk_contactorganisation_id
             processed.add(legacy_id)
@@ -205,7 +580,7 @@ class Command(CustomBaseCommand):
             provider = None
             if organization.attribution:
                 provider_of_attribution = ".".join(organization.attribution.split(".", 2)[:2])
-                provider = Provider.objects.filter(provider_id=provider_of_attribution).first()
+                provider = providers.get(provider_of_attribution)
             if not provider:
                 # Skip as no matching provider
                 self.print(
@@ -214,91 +589,70 @@ class Command(CustomBaseCommand):
                 )
                 continue
 
-            # Get or create attribution
-            is_new_model = False
-            attribution = provider.attribution_set.filter(_legacy_id=legacy_id).first()
-            if not attribution:
-                is_new_model = True
-                attribution = provider.attribution_set.create(
-                    _legacy_id=legacy_id,
-                    attribution_id=organization.attribution,
-                    name_de="undefined",
-                    name_fr="undefined",
-                    name_en="undefined",
-                    description_de="undefined",
-                    description_fr="undefined",
-                    description_en="undefined",
-                )  # type: ignore[misc]
-                self.increment_counter("attribution", "added")
-                self.print(f"Added attribution '{organization.attribution}'")
-
-            self.update_attribution(attribution, organization, is_new_model)
-
-            attribution.save()
-
-        # Remove orphaned attributions
-        orphans = Attribution.objects.filter(_legacy_id__isnull=False
-                                            ).exclude(_legacy_id__in=processed)
-        _, removed = orphans.delete()
-        for model, count in removed.items():
-            model_class = model.split(".")[-1].lower()
-            self.increment_counter(model_class, "removed", count)
-
-    def update_attribution(
-        self,
-        attribution: Attribution,
-        organization: BodContactOrganisation,
-        is_new_model: bool,
-    ) -> None:
-        """Update the attributes of an attribution."""
-
-        any_changed = False
-        translation = BodTranslations.objects.filter(msg_id=organization.attribution).first()
-        for attribution_attribute, translation_attribute in (
-            ("name_de", "de"),
-            ("name_fr", "fr"),
-            ("name_en", "en"),
-            ("name_it", "it"),
-            ("name_rm", "rm"),
-            ("description_de", "de"),
-            ("description_fr", "fr"),
-            ("description_en", "en"),
-            ("description_it", "it"),
-            ("description_rm", "rm"),
-            ("attribution_id", ""),  # will be updated to organization.attribution
-        ):
-            changed = self.update_model(
-                attribution,
-                attribution_attribute,
-                getattr(translation, translation_attribute, "") or organization.attribution or
-                "undefined",
-                is_new_model,
+            translation = translations.get(organization.attribution)
+            yield SourceRow(
+                {
+                    "provider": provider, "_legacy_id": legacy_id
+                },
+                {
+                    attribution_attribute:
+                        getattr(translation, translation_attribute, "") or organization.attribution
+                        or "undefined"
+                    for attribution_attribute, translation_attribute in ATTRIBUTION_ATTRIBUTES
+                },
+                organization.attribution,
             )
-            any_changed = any_changed or changed
-        if any_changed and not is_new_model:
-            self.increment_counter("attribution", "updated")
 
-    def import_datasets(self) -> None:  # pylint: disable=too-many-branches, too-many-statements
+    def import_datasets(self) -> None:
         """Import all datasets of legacy providers.
 
         This function adds new datasets, updates existing ones (with a matching legacy ID) and
         removes orphans (with a legacy id not found in the BOD).
 
         In general, each entry in the old datasets table corresponds to one in the new table
-        datasets (although with different column names).
+        datasets (although with different column names). Datasets which are not valid are skipped
+        with a warning.
 
         """
 
-        processed = set()
-        for bod_dataset in BodDataset.objects.filter(staging="prod").all():
+        processed: set[int] = set()
+        self.import_models(
+            Dataset,
+            ("provider", "attribution", "_legacy_id"),
+            tuple(attribute for attribute, _ in DATASET_ATTRIBUTES + DATASET_META_ATTRIBUTES),
+            ("dataset_id", "geocat_id"),
+            self.dataset_rows(processed),
+            True,
+        )
+        self.remove_orphans(Dataset, processed)
+
+    def dataset_rows(self, processed: set[int]) -> Iterator[SourceRow]:
+        """Read the datasets from the BOD and add their legacy IDs to `processed`."""
+
+        attributions = index_by(Attribution.objects.select_related("provider"), "_legacy_id")
+        bod_datasets = stream(BodDataset.objects.filter(staging="prod"), self.chunk_size)
+        for chunk in batched(bod_datasets, self.chunk_size):
+            yield from self.dataset_chunk_rows(chunk, attributions, processed)
+
+    def dataset_chunk_rows(
+        self,
+        bod_datasets: tuple[BodDataset, ...],
+        attributions: dict[Any, Attribution],
+        processed: set[int],
+    ) -> Iterator[SourceRow]:
+        bod_metas = index_by(
+            BodGeocatPublish.objects.filter(
+                fk_id_dataset__in=[bod_dataset.id_dataset for bod_dataset in bod_datasets]
+            ),
+            "fk_id_dataset",
+        )
+        for bod_dataset in bod_datasets:
             # Keep track of processed BOD datasets for orphan removal
             legacy_id = bod_dataset.id
             processed.add(legacy_id)
 
             # Get related attribution and provider
-            attribution = Attribution.objects.filter(
-                _legacy_id=bod_dataset.fk_contactorganisation_id
-            ).first()
+            attribution = attributions.get(bod_dataset.fk_contactorganisation_id)
             if not attribution:
                 # Skip as no matching attribution
                 self.print(
@@ -319,7 +673,7 @@ class Command(CustomBaseCommand):
                 continue
 
             # Get meta information title and description
-            bod_meta = BodGeocatPublish.objects.filter(fk_id_dataset=bod_dataset.id_dataset).first()
+            bod_meta = bod_metas.get(bod_dataset.id_dataset)
             if not bod_meta:
                 bod_meta = BodGeocatPublish()
 
@@ -337,100 +691,33 @@ class Command(CustomBaseCommand):
             if not bod_meta.abstract_en:
                 bod_meta.abstract_en = bod_meta.abstract_de
 
-            # Get or create dataset
-            is_new_model = False
-            dataset = Dataset.objects.filter(
-                provider=attribution.provider,
-                attribution=attribution,
-                _legacy_id=legacy_id,
-            ).first()
-            if not dataset:
-                is_new_model = True
-                try:
-                    dataset = Dataset.objects.create(
-                        provider=attribution.provider,
-                        attribution=attribution,
-                        geocat_id=bod_dataset.fk_geocat,
-                        title_de=bod_meta.bezeichnung_de,
-                        title_fr=bod_meta.bezeichnung_fr,
-                        title_en=bod_meta.bezeichnung_en,
-                        title_it=bod_meta.bezeichnung_it,
-                        title_rm=bod_meta.bezeichnung_rm,
-                        description_de=bod_meta.abstract_de,
-                        description_fr=bod_meta.abstract_fr,
-                        description_en=bod_meta.abstract_en,
-                        description_it=bod_meta.abstract_it,
-                        description_rm=bod_meta.abstract_rm,
-                        _legacy_id=legacy_id,
-                        dataset_id="undefined",
-                    )
-                except Exception as e:  # pylint: disable=broad-except
-                    self.print_warning(f"Creating dataset '{bod_dataset.id_dataset}' failed: {e}")
-                    continue
-                self.increment_counter("dataset", "added")
-                self.print(f"Added dataset '{bod_dataset.id_dataset}'")
-
-            self.update_dataset(dataset, bod_dataset, bod_meta, is_new_model)
-
-            try:
-                dataset.save()
-            except Exception as e:  # pylint: disable=broad-except
-                self.print_warning(f"Saving dataset '{bod_dataset.id_dataset}' failed: {e}")
-
-        # Remove orphaned datasets
-        orphans = Dataset.objects.filter(_legacy_id__isnull=False).exclude(_legacy_id__in=processed)
-        _, removed = orphans.delete()
-        for model, count in removed.items():
-            model_class = model.split(".")[-1].lower()
-            self.increment_counter(model_class, "removed", count)
-
-    def update_dataset(
-        self,
-        dataset: Dataset,
-        bod_dataset: BodDataset,
-        bod_meta: BodGeocatPublish,
-        is_new_model: bool,
-    ) -> None:
-        """Update the attributes of a dataset."""
-
-        any_changed = False
-        for dataset_attribute, bod_dataset_attribute in (
-            ("dataset_id", "id_dataset"),
-            ("geocat_id", "fk_geocat"),
-        ):
-            changed = self.update_model(
-                dataset,
-                dataset_attribute,
-                getattr(bod_dataset, bod_dataset_attribute),
-                is_new_model,
-            )
-            any_changed = any_changed or changed
-        for dataset_attribute, bod_dataset_attribute in (
-            ("title_de", "bezeichnung_de"),
-            ("title_fr", "bezeichnung_fr"),
-            ("title_en", "bezeichnung_en"),
-            ("title_it", "bezeichnung_it"),
-            ("title_rm", "bezeichnung_rm"),
-            ("description_de", "abstract_de"),
-            ("description_fr", "abstract_fr"),
-            ("description_en", "abstract_en"),
-            ("description_it", "abstract_it"),
-            ("description_rm", "abstract_rm"),
-        ):
-            changed = self.update_model(
-                dataset,
-                dataset_attribute,
-                getattr(bod_meta, bod_dataset_attribute),
-                is_new_model,
+            values = {
+                dataset_attribute: getattr(bod_dataset, bod_dataset_attribute)
+                for dataset_attribute, bod_dataset_attribute in DATASET_ATTRIBUTES
+            }
+            for dataset_attribute, bod_dataset_attribute in DATASET_META_ATTRIBUTES:
+                values[dataset_attribute] = getattr(bod_meta, bod_dataset_attribute)
+            yield SourceRow(
+                {
+                    "provider": attribution.provider,
+                    "attribution": attribution,
+                    "_legacy_id": legacy_id,
+                },
+                values,
+                bod_dataset.id_dataset,
             )
-            any_changed = any_changed or changed
-        if any_changed and not is_new_model:
-            self.increment_counter("dataset", "updated")
 
     def handle(self, *args: Any, **options: Any) -> None:
         """Main entry point of command."""
 
-        with transaction.atomic():
+        self.engine = options["engine"]
+        self.commit_every = options["commit_every"]
+        self.chunk_size = options["chunk_size"]
+        if self.commit_every and options["dry_run"]:
+            raise CommandError("--dry-run can not be used with --commit-every")
+
+        # Without --commit-every, all changes are committed at once in the end
+        with nullcontext() if self.commit_every else transaction.atomic():
             if options["clear"]:
                 self.clear_providers()
             if options["providers"]:
@@ -440,6 +727,12 @@ class Command(CustomBaseCommand):
             if options["datasets"]:
                 self.import_datasets()
 
+            # Invalidate cached API responses once the changes are committed
+            bump_version_on_commit(Provider, Attribution, Dataset)
+
+            # Remove expired tombstones once per sync instead of with every deletion
+            purge_tombstones()
+
             # Print counts
             printed = False
             if (
@@ -0,0 +1,156 @@
+from datetime import timedelta
+from time import sleep
+from typing import Any
+
+from access.models import CognitoInconsistencyError
+from access.models import CognitoOperation
+from access.models import CognitoSyncState
+from botocore.exceptions import BotoCoreError
+from botocore.exceptions import ClientError
+from cognito.utils.client import Client
+from utils.command import CustomBaseCommand
+
+from django.core.management.base import CommandParser
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models import OuterRef
+from django.utils import timezone
+
+# Delay before retrying a failed operation, doubled with every attempt up to the maximum
+RETRY_DELAY = timedelta(seconds=5)
+MAX_RETRY_DELAY = timedelta(minutes=30)
+
+# Operations still failing after this many attempts (about 6 hours) are given up
+MAX_ATTEMPTS = 20
+
+# Errors of cognito which do not go away by retrying, e.g. an email rejected by cognito
+PERMANENT_ERRORS = {
+    'InvalidParameterException',
+    'AliasExistsException',
+    'UsernameExistsException',
+    'UserNotFoundException',
+}
+
+
+def is_permanent(error: BotoCoreError | ClientError) -> bool:
+    """ Return whether the error of cognito does not go away by retrying. """
+
+    return isinstance(error, ClientError) and error.response['Error']['Code'] in PERMANENT_ERRORS
+
+
+class Command(CustomBaseCommand):
+    """Apply the user changes of the outbox to cognito
+
+    The operations of a user are applied in the order they were written. If an operation fails,
+    it is retried with an increasing delay and the later operations of the same user wait for it.
+    Operations which cannot succeed (inconsistent with cognito, rejected by cognito or failing
+    MAX_ATTEMPTS times) are dropped and their users are left to cognito_sync. Several instances of
+    the command can run concurrently.
+    """
+
+    help = "Applies the user changes of the outbox (COGNITO_OUTBOX) to cognito"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=1000,
+            help='Maximum number of operations applied per run',
+        )
+        parser.add_argument(
+            '--follow',
+            action='store_true',
+            help='Keep running and apply new operations as they are written',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=5,
+            help='Seconds to wait for new operations with --follow',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        self.client = Client()
+        while True:
+            self.counts = {'applied': 0, 'failed': 0, 'inconsistent': 0, 'given up': 0}
+            self.drain(options['limit'])
+            for result, count in self.counts.items():
+                if count:
+                    self.print_success(f'{count} operation(s) {result}')
+            if not any(self.counts.values()):
+                # Only printed with higher verbosity, as it repeats with --follow
+                self.print_success('nothing to be done', level=2)
+            if not options['follow']:
+                break
+            if not any(self.counts.values()):
+                sleep(options['interval'])
+
+    def drain(self, limit: int) -> None:
+        """ Apply the due operations, each one in its own transaction. """
+
+        for _ in range(limit):
+            with transaction.atomic():
+                operation = self.next_operation()
+                if operation is None:
+                    return
+                self.apply(operation)
+
+    def next_operation(self) -> CognitoOperation | None:
+        """ Lock and return the oldest due operation which is the first of its user.
+
+        Operations locked by other instances are skipped, as are the later operations of their
+        users since they are not the first ones.
+        """
+
+        earlier = CognitoOperation.objects.filter(
+            user_id=OuterRef('user_id'), id__lt=OuterRef('id')
+        )
+        due = CognitoOperation.objects.filter(next_attempt__lte=timezone.now())
+        first = due.exclude(Exists(earlier)).order_by('id')
+        return first.select_for_update(skip_locked=True).first()
+
+    def apply(self, operation: CognitoOperation) -> None:
+        """ Apply the operation and remove it, or schedule a retry if cognito failed.
+
+        Operations which cannot succeed are removed as well, and their users are marked as
+        unsynchronized, so that the next incremental cognito_sync reconciles them.
+        """
+
+        try:
+            operation.apply(self.client)
+        except CognitoInconsistencyError:
+            self.counts['inconsistent'] += 1
+            self.print_error(
+                'Could not %s %s, inconsistent with cognito', operation.type, operation.user_id
+            )
+            CognitoSyncState.invalidate(operation.user_id)
+        except (BotoCoreError, ClientError) as error:
+            operation.attempts += 1
+            if not is_permanent(error) and operation.attempts < MAX_ATTEMPTS:
+                self.counts['failed'] += 1
+                operation.last_error = str(error)
+                delay = RETRY_DELAY * 2**min(operation.attempts - 1, 10)
+                operation.next_attempt = timezone.now() + min(delay, MAX_RETRY_DELAY)
+                operation.save()
+                self.print_error(
+                    'Could not %s %s (attempt %s): %s',
+                    operation.type,
+                    operation.user_id,
+                    operation.attempts,
+                    error,
+                )
+                return
+            self.counts['given up'] += 1
+            self.print_error(
+                'Could not %s %s, giving up after %s attempt(s): %s',
+                operation.type,
+                operation.user_id,
+                operation.attempts,
+                error,
+            )
+            CognitoSyncState.invalidate(operation.user_id)
+        else:
+            self.counts['applied'] += 1
+            self.print(f'{operation.type} user {operation.user_id}')
+        operation.delete()
@@ -1,19 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from random import uniform
+from threading import Lock
+from time import sleep
 from typing import TYPE_CHECKING
 from typing import Any
+from typing import Callable
 from typing import TextIO
+from typing import TypeVar
 
+from access.models import CognitoSyncState
 from access.models import User
+from botocore.exceptions import ClientError
 from cognito.utils.client import Client
 from cognito.utils.client import user_attributes_to_dict
+from cognito.utils.rate_limiter import THROTTLING_ERROR
+from cognito.utils.rate_limiter import RateLimiter
 from utils.command import CustomBaseCommand
 
 from django.core.management.base import CommandParser
+from django.db.models import Exists
+from django.db.models import F
+from django.db.models import OuterRef
+from django.db.models import Q
+from django.db.models import Subquery
 
 if TYPE_CHECKING:
     from mypy_boto3_cognito_idp.type_defs import UserTypeTypeDef
 
+ResultT = TypeVar("ResultT")
+
+# Attempts of throttled cognito calls, and the maximum delay before the first retry in seconds
+# (doubled with every attempt)
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 1
+
 
 class Command(CustomBaseCommand):
+    """Synchronize local users with cognito
+
+    The operations of different users are run concurrently by a pool of threads, the operations
+    of a user run in order. The calls are limited to the quotas of cognito (see
+    `cognito.utils.rate_limiter`) and throttled calls are retried with an increasing delay.
+
+    The state of the synchronized users is stored (see `CognitoSyncState`). With --incremental,
+    only the users changed or deleted since their last synchronization are reconciled, by looking
+    them up in cognito one by one. Users created or changed directly in cognito are only found by
+    a full synchronization, which should still run periodically (e.g. daily) as a safety net.
+    """
+
     help = "Synchronizes local users with cognito"
 
     def __init__(
@@ -26,6 +61,9 @@ class Command(CustomBaseCommand):
         super().__init__(stdout, stderr, no_color, force_color)
         self.client = Client()
         self.counts = {'added': 0, 'deleted': 0, 'updated': 0, 'enabled': 0, 'disabled': 0}
+        self.states: dict[str, CognitoSyncState] = {}
+        self.removed_states: set[str] = set()
+        self.lock = Lock()
 
     def add_arguments(self, parser: CommandParser) -> None:
         super().add_arguments(parser)
@@ -39,40 +77,105 @@ class Command(CustomBaseCommand):
             action='store_true',
             help='Dry run, abort transaction in the end',
         )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Number of users synchronized concurrently',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only synchronize the users changed since their last synchronization',
+        )
+
+    def count(self, operation: str) -> None:
+        """ Count an operation, called from the worker threads. """
+
+        with self.lock:
+            self.counts[operation] += 1
+
+    def record_state(self, user: User) -> None:
+        """ Record that the user is synchronized, called from the worker threads. """
+
+        with self.lock:
+            # Users deleted by --clear are recreated afterwards
+            self.removed_states.discard(user.user_id)
+            self.states[user.user_id] = CognitoSyncState(
+                user_id=user.user_id,
+                remote_hash=CognitoSyncState.get_hash(user),
+                synced=user.updated,
+            )
+
+    def remove_state(self, user_id: str) -> None:
+        """ Record that the user is removed, called from the worker threads. """
+
+        with self.lock:
+            self.states.pop(user_id, None)
+            self.removed_states.add(user_id)
+
+    def save_states(self) -> None:
+        """ Store the recorded states of the synchronized users. """
+
+        CognitoSyncState.objects.bulk_create(
+            self.states.values(),
+            update_conflicts=True,
+            unique_fields=['user_id'],
+            update_fields=['remote_hash', 'synced'],
+        )
+        CognitoSyncState.objects.filter(user_id__in=self.removed_states).delete()
+
+    def call(self, function: Callable[..., ResultT], *args: Any) -> ResultT:
+        """ Call cognito, retrying with an increasing random delay if the call is throttled. """
+
+        attempt = 1
+        while True:
+            try:
+                return function(*args)
+            except ClientError as error:
+                if error.response['Error']['Code'] != THROTTLING_ERROR or attempt == MAX_ATTEMPTS:
+                    raise
+            sleep(uniform(0, RETRY_DELAY * 2**(attempt - 1)))
+            attempt += 1
+
+    def run_concurrently(self, tasks: list[Callable[[], None]]) -> None:
+        """ Run the given tasks in the worker threads and wait for them. """
+
+        with ThreadPoolExecutor(max_workers=self.options['concurrency']) as executor:
+            futures = [executor.submit(task) for task in tasks]
+            # Raise the first exception, if any
+            for future in futures:
+                future.result()
 
     def clear_users(self) -> None:
         """ Remove all existing cognito users. """
 
-        for user in self.client.list_users():
-            self.counts['deleted'] += 1
-            user_id = user['Username']
-            self.print(f'deleting user {user_id}')
-            if not self.options['dry_run']:
-                deleted = self.client.delete_user(user_id)
-                if not deleted:
-                    self.print_error(
-                        'Could not delete %s, might not exist or might be unmanged', user_id
-                    )
+        self.run_concurrently([
+            partial(self.delete_user, user['Username']) for user in self.client.list_users()
+        ])
 
     def add_user(self, user: User) -> None:
         """ Add a local user to cognito. """
 
-        self.counts['added'] += 1
+        self.count('added')
         self.print(f'adding user {user.user_id}')
         if not self.options['dry_run']:
-            created = self.client.create_user(user.user_id, user.username, user.email)
+            created = self.call(self.client.create_user, user.user_id, user.username, user.email)
             if not created:
                 self.print_error(
                     'Could not create %s, might already exist as unmanaged user', user.user_id
                 )
+            else:
+                self.record_state(user)
 
     def delete_user(self, user_id: str) -> None:
         """ Delete a remote user from cognito. """
 
-        self.counts['deleted'] += 1
+        self.count('deleted')
         self.print(f'deleting user {user_id}')
         if not self.options['dry_run']:
-            deleted = self.client.delete_user(user_id)
+            self.remove_state(user_id)
+            deleted = self.call(self.client.delete_user, user_id)
             if not deleted:
                 self.print_error(
                     'Could not delete %s, might not exist or might be unmanaged', user_id
@@ -81,19 +184,24 @@ class Command(CustomBaseCommand):
     def update_user(self, local_user: User, remote_user: 'UserTypeTypeDef') -> None:
         """ Update a remote user in cognito. """
 
+        synced = True
         remote_attributes = user_attributes_to_dict(remote_user['Attributes'])
         changed = (
             local_user.email != remote_attributes.get('email') or
             local_user.username != remote_attributes.get('preferred_username')
         )
         if changed:
-            self.counts['updated'] += 1
+            self.count('updated')
             self.print(f'updating user {local_user.user_id}')
             if not self.options['dry_run']:
-                updated = self.client.update_user(
-                    local_user.user_id, local_user.username, local_user.email
+                updated = self.call(
+                    self.client.update_user,
+                    local_user.user_id,
+                    local_user.username,
+                    local_user.email
                 )
                 if not updated:
+                    synced = False
                     self.print_error(
                         'Could not update %s, might not exist or might be unmanaged',
                         local_user.user_id
@@ -101,20 +209,41 @@ class Command(CustomBaseCommand):
 
         if local_user.is_active != remote_user['Enabled']:
             if local_user.is_active:
-                self.counts['enabled'] += 1
+                self.count('enabled')
                 self.print(f'enabling user {local_user.user_id}')
                 if not self.options['dry_run']:
-                    enabled = self.client.enable_user(local_user.user_id)
+                    enabled = self.call(self.client.enable_user, local_user.user_id)
                     if not enabled:
+                        synced = False
                         self.print_error('Could not enable %s', local_user.user_id)
             else:
-                self.counts['disabled'] += 1
+                self.count('disabled')
                 self.print(f'disabling user {local_user.user_id}')
                 if not self.options['dry_run']:
-                    disabled = self.client.disable_user(local_user.user_id)
+                    disabled = self.call(self.client.disable_user, local_user.user_id)
                     if not disabled:
+                        synced = False
                         self.print_error('Could not disable %s', local_user.user_id)
 
+        if synced and not self.options['dry_run']:
+            self.record_state(local_user)
+
+    def reconcile_user(self, user: User) -> None:
+        """ Look up a local user in cognito and add or update it. """
+
+        remote_user = self.call(self.client.get_user, user.user_id)
+        if remote_user is None:
+            self.add_user(user)
+        else:
+            self.update_user(
+                user,
+                {
+                    'Username': remote_user['Username'],
+                    'Attributes': remote_user['UserAttributes'],
+                    'Enabled': remote_user['Enabled'],
+                }
+            )
+
     def sync_users(self) -> None:
         """ Synchronizes local and cognito users. """
 
@@ -124,14 +253,47 @@ class Command(CustomBaseCommand):
         remote_users = {user['Username']: user for user in self.client.list_users()}
         remote_user_ids = set(remote_users.keys())
 
-        for user_id in local_user_ids.difference(remote_user_ids):
-            self.add_user(local_users[user_id])
+        if not self.options['dry_run']:
+            # Users which no longer exist locally nor in cognito
+            orphans = CognitoSyncState.objects.exclude(user_id__in=local_user_ids)
+            self.removed_states.update(orphans.values_list('user_id', flat=True))
+
+        tasks: list[Callable[[], None]] = [
+            partial(self.add_user, local_users[user_id])
+            for user_id in local_user_ids.difference(remote_user_ids)
+        ]
+        tasks += [
+            partial(self.delete_user, user_id)
+            for user_id in remote_user_ids.difference(local_user_ids)
+        ]
+        tasks += [
+            partial(self.update_user, local_users[user_id], remote_users[user_id])
+            for user_id in local_user_ids.intersection(remote_user_ids)
+        ]
+        self.run_concurrently(tasks)
 
-        for user_id in remote_user_ids.difference(local_user_ids):
-            self.delete_user(user_id)
+    def sync_changed_users(self) -> None:
+        """ Synchronizes the users changed or deleted since their last synchronization. """
 
-        for user_id in local_user_ids.intersection(remote_user_ids):
-            self.update_user(local_users[user_id], remote_users[user_id])
+        states = CognitoSyncState.objects.filter(user_id=OuterRef('user_id'))
+        changed_users = User.all_objects.annotate(
+            synced=Subquery(states.values('synced')),
+            remote_hash=Subquery(states.values('remote_hash')),
+        ).filter(Q(synced__isnull=True) | Q(updated__gt=F('synced')))
+        deleted_user_ids = CognitoSyncState.objects.exclude(
+            Exists(User.all_objects.filter(user_id=OuterRef('user_id')))
+        ).values_list('user_id', flat=True)
+
+        tasks: list[Callable[[], None]] = []
+        for user in changed_users:
+            if user.remote_hash == CognitoSyncState.get_hash(user):
+                # Only attributes which are not synchronized changed
+                if not self.options['dry_run']:
+                    self.record_state(user)
+            else:
+                tasks.append(partial(self.reconcile_user, user))
+        tasks += [partial(self.delete_user, user_id) for user_id in deleted_user_ids]
+        self.run_concurrently(tasks)
 
     def handle(self, *args: Any, **options: Any) -> None:
         """ Main entry point of command. """
@@ -144,9 +306,19 @@ class Command(CustomBaseCommand):
                 self.print_warning('operation cancelled', level=0)
                 return
 
-            self.clear_users()
-
-        self.sync_users()
+        limiter = RateLimiter()
+        limiter.register(self.client.client)
+        try:
+            if self.options['clear']:
+                self.clear_users()
+            if self.options['incremental']:
+                self.sync_changed_users()
+            else:
+                self.sync_users()
+        finally:
+            limiter.unregister(self.client.client)
+        if not self.options['dry_run']:
+            self.save_states()
 
         # Print counts
         printed = False
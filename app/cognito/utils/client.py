@@ -1,10 +1,18 @@
+from collections import Counter
+from contextlib import contextmanager
+from functools import cache
+from os import register_at_fork
 from typing import TYPE_CHECKING
+from typing import Any
+from typing import Iterator
 
 from boto3 import client
+from botocore.config import Config
 
 from django.conf import settings
 
 if TYPE_CHECKING:
+    from mypy_boto3_cognito_idp.client import CognitoIdentityProviderClient
     from mypy_boto3_cognito_idp.type_defs import AdminGetUserResponseTypeDef
     from mypy_boto3_cognito_idp.type_defs import AttributeTypeTypeDef
     from mypy_boto3_cognito_idp.type_defs import UserTypeTypeDef
@@ -16,6 +24,58 @@ def user_attributes_to_dict(attributes: list['AttributeTypeTypeDef']) -> dict[st
     return {attr['Name']: attr['Value'] for attr in attributes}
 
 
+# The counters of the active `count_calls` blocks
+call_counters: list[Counter[str]] = []
+
+
+def count_call(model: Any, **kwargs: Any) -> None:
+    """ Count a cognito API call, registered as boto event handler. """
+
+    for counter in call_counters:
+        counter[model.name] += 1
+
+
+@contextmanager
+def count_calls() -> Iterator[Counter[str]]:
+    """ Count the cognito API calls by operation name (e.g. "AdminGetUser") within the block.
+
+    Example usage:
+
+        with count_calls() as calls:
+            Client().delete_user('2ihg2ox304po')
+        assert calls == {'AdminGetUser': 1, 'AdminDeleteUser': 1}
+    """
+
+    counter: Counter[str] = Counter()
+    call_counters.append(counter)
+    try:
+        yield counter
+    finally:
+        # Removed by identity, as counters with the same counts are equal
+        call_counters[:] = [active for active in call_counters if active is not counter]
+
+
+@cache
+def get_boto_client(
+    endpoint_url: str, max_pool_connections: int
+) -> 'CognitoIdentityProviderClient':
+    """
+    Return the boto client of this process for the given cognito endpoint.
+
+    Building a boto client is expensive, so it is created on first use and shared by all
+    `Client` instances. Boto clients are thread-safe and keep the HTTP connections to cognito
+    alive in their pool. The client is dropped in forked processes (e.g. the gunicorn workers),
+    which create their own one.
+    """
+    config = Config(max_pool_connections=max_pool_connections, tcp_keepalive=True)
+    boto_client = client("cognito-idp", endpoint_url=endpoint_url, config=config)
+    boto_client.meta.events.register("before-parameter-build.cognito-idp", count_call)
+    return boto_client
+
+
+register_at_fork(after_in_child=get_boto_client.cache_clear)
+
+
 class Client:
     """ A low level client for managing cognito users.
 
@@ -26,7 +86,7 @@ class Client:
         self.endpoint_url = settings.COGNITO_ENDPOINT_URL
         self.user_pool_id = settings.COGNITO_POOL_ID
         self.managed_flag_name = settings.COGNITO_MANAGED_FLAG_NAME
-        self.client = client("cognito-idp", endpoint_url=self.endpoint_url)
+        self.client = get_boto_client(self.endpoint_url, settings.COGNITO_MAX_POOL_CONNECTIONS)
 
     def list_users(self) -> list['UserTypeTypeDef']:
         """ Get a list of managed users. """
@@ -45,24 +105,6 @@ class Client:
             if user_attributes_to_dict(user['Attributes']).get(self.managed_flag_name) == 'true'
         ]
 
-    def user_exists(self, username: str, check_unmanaged: bool = False) -> bool:
-        """ Check if the user with the given username exists.
-
-        If check_unmanaged is True, also checks for unmanaged users.
-        """
-
-        response = self.client.list_users(
-            UserPoolId=self.user_pool_id, Filter=f'username = "{username}"'
-        )
-        users = response.get("Users", [])
-        if not check_unmanaged:
-            users = [
-                user for user in users
-                if user_attributes_to_dict(user['Attributes']).get(self.managed_flag_name) == 'true'
-            ]
-
-        return len(users) > 0
-
     def get_user(
         self,
         username: str,
@@ -98,7 +140,7 @@ class Client:
 
         """
 
-        if self.user_exists(username, check_unmanaged=True):
+        if self.get_user(username, return_unmanaged=True) is not None:
             return False
 
         self.client.admin_create_user(
@@ -124,7 +166,7 @@ class Client:
 
         """
 
-        if not self.user_exists(username):
+        if self.get_user(username) is None:
             return False
 
         self.client.admin_delete_user(UserPoolId=self.user_pool_id, Username=username)
@@ -143,9 +185,6 @@ class Client:
 
         """
 
-        if not self.user_exists(username):
-            return False
-
         user = self.get_user(username)
         if user is None:
             return False
@@ -175,7 +214,7 @@ class Client:
         Returns False, if the user does not exist, or doesn't have the managed flag.
         """
 
-        if not self.user_exists(username):
+        if self.get_user(username) is None:
             return False
 
         self.client.admin_enable_user(UserPoolId=self.user_pool_id, Username=username)
@@ -187,7 +226,7 @@ class Client:
         Returns False if the user does not exist, or doesn't have the managed flag.
         """
 
-        if not self.user_exists(username):
+        if self.get_user(username) is None:
             return False
 
         self.client.admin_disable_user(UserPoolId=self.user_pool_id, Username=username)
@@ -0,0 +1,111 @@
+from threading import Lock
+from time import monotonic
+from time import sleep
+from typing import TYPE_CHECKING
+from typing import Any
+
+if TYPE_CHECKING:
+    from mypy_boto3_cognito_idp.client import CognitoIdentityProviderClient
+
+# The default quotas of cognito in requests per second, by category of operations, see
+# https://docs.aws.amazon.com/cognito/latest/developerguide/quotas.html#category_operations
+QUOTAS = {
+    'UserCreation': 50,
+    'UserRead': 120,
+    'UserList': 30,
+    'UserUpdate': 25,
+    'UserAccountRecovery': 30,
+}
+
+# The categories of the operations used by `cognito.utils.client.Client`
+CATEGORIES = {
+    'AdminCreateUser': 'UserCreation',
+    'AdminGetUser': 'UserRead',
+    'ListUsers': 'UserList',
+    'AdminUpdateUserAttributes': 'UserUpdate',
+    'AdminDeleteUser': 'UserUpdate',
+    'AdminEnableUser': 'UserUpdate',
+    'AdminDisableUser': 'UserUpdate',
+    'AdminResetUserPassword': 'UserAccountRecovery',
+}
+
+THROTTLING_ERROR = 'TooManyRequestsException'
+
+
+class TokenBucket:
+    """ A thread-safe token bucket allowing a number of requests per second.
+
+    The rate is halved when requests are throttled and recovers by one request per second with
+    every successful request, up to the quota.
+    """
+
+    def __init__(self, quota: float) -> None:
+        self.quota = quota
+        self.rate = quota
+        self.tokens = quota
+        self.updated = monotonic()
+        self.lock = Lock()
+
+    def acquire(self) -> None:
+        """ Wait until a request is allowed. """
+
+        while True:
+            with self.lock:
+                now = monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            sleep(wait)
+
+    def slow_down(self) -> None:
+        with self.lock:
+            self.rate = max(self.rate / 2, 1)
+
+    def speed_up(self) -> None:
+        with self.lock:
+            self.rate = min(self.rate + 1, self.quota)
+
+
+class RateLimiter:
+    """ Limits the requests of a boto client to the quotas of cognito.
+
+    The operations of a category share a token bucket. Operations without category are not
+    limited.
+
+    Example usage:
+
+        limiter = RateLimiter()
+        limiter.register(Client().client)
+    """
+
+    def __init__(self, quotas: dict[str, float] | None = None) -> None:
+        self.buckets = {
+            category: TokenBucket(quota) for category, quota in (quotas or QUOTAS).items()
+        }
+
+    def get_bucket(self, operation: str) -> TokenBucket | None:
+        return self.buckets.get(CATEGORIES.get(operation, ''))
+
+    def before_call(self, model: Any, **kwargs: Any) -> None:
+        bucket = self.get_bucket(model.name)
+        if bucket is not None:
+            bucket.acquire()
+
+    def after_call(self, model: Any, parsed: dict[str, Any], **kwargs: Any) -> None:
+        bucket = self.get_bucket(model.name)
+        if bucket is not None:
+            if parsed.get('Error', {}).get('Code') == THROTTLING_ERROR:
+                bucket.slow_down()
+            else:
+                bucket.speed_up()
+
+    def register(self, client: 'CognitoIdentityProviderClient') -> None:
+        client.meta.events.register('before-parameter-build.cognito-idp', self.before_call)
+        client.meta.events.register('after-call.cognito-idp', self.after_call)
+
+    def unregister(self, client: 'CognitoIdentityProviderClient') -> None:
+        client.meta.events.unregister('before-parameter-build.cognito-idp', self.before_call)
+        client.meta.events.unregister('after-call.cognito-idp', self.after_call)
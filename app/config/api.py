@@ -1,12 +1,16 @@
 from access.api import router as access_router
+from access.api_async import router as access_async_router
 from botocore.exceptions import EndpointConnectionError
 from config.logging import LoggedNinjaAPI
 from distributions.api import router as distributions_router
+from distributions.api_async import router as distributions_async_router
 from ninja import NinjaAPI
 from ninja.errors import AuthenticationError
 from ninja.errors import HttpError
 from ninja.errors import ValidationError as NinjaValidationError
+from ninja.operation import Operation
 from provider.api import router as provider_router
+from provider.api_async import router as provider_async_router
 from utils.exceptions import contains_error_code
 from utils.exceptions import extract_error_messages
 
@@ -16,14 +20,32 @@ from django.http import Http404
 from django.http import HttpRequest
 from django.http import HttpResponse
 
+
+class AsyncLoggedNinjaAPI(LoggedNinjaAPI):
+    """API with the async operations, served in ASGI mode (see `config.asgi`).
+
+    The operations are documented with the same IDs as the ones of the sync API.
+    """
+
+    def get_openapi_operation_id(self, operation: Operation) -> str:
+        return super().get_openapi_operation_id(operation).replace("_api_async_", "_api_")
+
+
 api = LoggedNinjaAPI()
 
 api.add_router("", provider_router)
 api.add_router("", distributions_router)
 api.add_router("", access_router)
 
+async_api = AsyncLoggedNinjaAPI(urls_namespace="async_api")
+
+async_api.add_router("", provider_async_router)
+async_api.add_router("", distributions_async_router)
+async_api.add_router("", access_async_router)
+
 
 @api.exception_handler(DjangoValidationError)
+@async_api.exception_handler(DjangoValidationError)
 def handle_django_validation_error(
     request: HttpRequest, exception: DjangoValidationError
 ) -> HttpResponse:
@@ -46,7 +68,9 @@ def handle_django_validation_error(
 
 
 @api.exception_handler(Http404)
+@async_api.exception_handler(Http404)
 @api.exception_handler(ObjectDoesNotExist)
+@async_api.exception_handler(ObjectDoesNotExist)
 def handle_404_not_found(request: HttpRequest, exception: Http404) -> HttpResponse:
     return api.create_response(
         request,
@@ -58,6 +82,7 @@ def handle_404_not_found(request: HttpRequest, exception: Http404) -> HttpRespon
 
 
 @api.exception_handler(Exception)
+@async_api.exception_handler(Exception)
 def handle_exception(request: HttpRequest, exception: Exception) -> HttpResponse:
     return api.create_response(
         request,
@@ -69,6 +94,7 @@ def handle_exception(request: HttpRequest, exception: Exception) -> HttpResponse
 
 
 @api.exception_handler(HttpError)
+@async_api.exception_handler(HttpError)
 def handle_http_error(request: HttpRequest, exception: HttpError) -> HttpResponse:
     return api.create_response(
         request,
@@ -80,6 +106,7 @@ def handle_http_error(request: HttpRequest, exception: HttpError) -> HttpRespons
 
 
 @api.exception_handler(AuthenticationError)
+@async_api.exception_handler(AuthenticationError)
 def handle_unauthorized(request: HttpRequest, exception: AuthenticationError) -> HttpResponse:
     return api.create_response(
         request,
@@ -91,6 +118,7 @@ def handle_unauthorized(request: HttpRequest, exception: AuthenticationError) ->
 
 
 @api.exception_handler(NinjaValidationError)
+@async_api.exception_handler(NinjaValidationError)
 def handle_ninja_validation_error(
     request: HttpRequest, exception: NinjaValidationError
 ) -> HttpResponse:
@@ -108,6 +136,7 @@ def handle_ninja_validation_error(
 
 
 @api.exception_handler(EndpointConnectionError)
+@async_api.exception_handler(EndpointConnectionError)
 def handle_cognito_connection_error(
     request: HttpRequest, exception: EndpointConnectionError
 ) -> HttpResponse:
@@ -1,7 +1,9 @@
 """
 ASGI config for app project.
 
-It exposes the ASGI callable as a module-level variable named ``application``.
+It exposes the ASGI callable as a module-level variable named ``application``. The API is served
+by the async operations (see `config.urls_async`). To run it with gunicorn and uvicorn workers,
+start `wsgi.py` with `SERVER_MODE=asgi`.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -12,6 +14,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 # default to the setting that's being created in DOCKERFILE
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('API_ASYNC', 'true')
 
 application = get_asgi_application()
@@ -12,6 +12,9 @@ from typing import TypedDict
 
 from ecs_logging import StdlibFormatter
 from ninja import NinjaAPI
+from utils.conditional import apply_validators
+from utils.renderers import ORJSONRenderer
+from utils.response_cache import store_response
 
 from django.conf import settings
 from django.http import HttpRequest
@@ -91,10 +94,18 @@ def generate_log_extra(request: HttpRequest, response: HttpResponse) -> LogExtra
 class LoggedNinjaAPI(NinjaAPI):
     """Extension for the NinjaAPI to log the requests to elastic
 
-    Overwriting the method that creates a response. The only thing done then
-    is that depending on the status, a log entry will be triggered.
+    Overwriting the method that creates a response. Depending on the status, a log entry will be
+    triggered. Successful responses of conditional operations additionally get their ETag and
+    Last-Modified headers (see `utils.conditional`) and those of cached operations are stored in
+    the response cache (see `utils.response_cache`).
+
+    Responses are rendered with orjson by default (see `utils.renderers`).
     """
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        kwargs.setdefault("renderer", ORJSONRenderer())
+        super().__init__(*args, **kwargs)
+
     def create_response(
         self,
         request: HttpRequest,
@@ -106,6 +117,8 @@ class LoggedNinjaAPI(NinjaAPI):
         response = super().create_response(
             request, data, *args, status=status, temporal_response=temporal_response
         )
+        apply_validators(request, response)
+        store_response(request, response)
 
         if response.status_code >= 200 and response.status_code < 400:
             logger.info(
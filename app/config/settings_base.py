@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 import os
 from pathlib import Path
+from typing import Any
 
 import environ
 import yaml
@@ -64,11 +65,14 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "utils.database_router.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "config.urls"
+# The ASGI application serves the async operations of the API (see config.asgi)
+API_ASYNC = env.bool("API_ASYNC", False)
+ROOT_URLCONF = "config.urls_async" if API_ASYNC else "config.urls"
 
 TEMPLATES = [
     {
@@ -91,7 +95,7 @@ WSGI_APPLICATION = "wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
+DATABASES: dict[str, dict[str, Any]] = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
         "NAME": env.str("DB_NAME", "service_control"),
@@ -116,6 +120,49 @@ DATABASES = {
     },
 }
 
+# Read replicas
+# Comma separated hosts of read replicas of the default database. If given, GET requests of the
+# API read the models of the apps in DB_REPLICA_APPS from the "replica" database (see
+# utils.database_router), new connections are balanced randomly over the hosts.
+DB_REPLICA_HOSTS = env.str("DB_REPLICA_HOSTS", "")
+if DB_REPLICA_HOSTS:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": DB_REPLICA_HOSTS,
+        "PORT": env.str("DB_REPLICA_PORT", "5432"),
+        "OPTIONS": {
+            "load_balance_hosts": "random"
+        },
+        "TEST": {
+            "MIRROR": "default"
+        },
+    }
+# Sessions, permissions and API tokens are always read from the primary
+DB_REPLICA_APPS = ["provider", "distributions", "access"]
+# Clients with a session keep reading from the primary for this many seconds after a write
+DB_REPLICA_STICKINESS = env.int("DB_REPLICA_STICKINESS", 10)
+
+# Connection pooling
+# If enabled, each process keeps a pool of connections per database (so the sizes are per gunicorn
+# worker). Requests take a connection when they first query a database and return it when they
+# finish. Under gevent, psycopg waits cooperatively and the workers of the pool are greenlets, as
+# long as the monkey patching is done before psycopg is imported (see wsgi.py).
+# DB_POOL_TIMEOUT is the number of seconds to wait for a free connection before failing,
+# DB_POOL_MAX_IDLE the number of seconds after which idle connections above the minimum are closed.
+DB_POOL = env.bool("DB_POOL", False)
+if DB_POOL:
+    for alias, database in DATABASES.items():
+        database["OPTIONS"] = {
+            **database.get("OPTIONS", {}),
+            "pool": {
+                "name": alias,
+                "min_size": env.int("DB_POOL_MIN_SIZE", 2),
+                "max_size": env.int("DB_POOL_MAX_SIZE", 10),
+                "timeout": env.int("DB_POOL_TIMEOUT", 10),
+                "max_idle": env.int("DB_POOL_MAX_IDLE", 600),
+            },
+        }
+
 DATABASE_ROUTERS = ["utils.database_router.CustomRouter"]
 
 # Password validation
@@ -162,10 +209,59 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 COGNITO_ENDPOINT_URL = env.str("COGNITO_ENDPOINT_URL", "http://localhost:9229")
 COGNITO_POOL_ID = env.str("COGNITO_POOL_ID", "local")
 COGNITO_MANAGED_FLAG_NAME = env.str("COGNITO_MANAGED_FLAG_NAME", "dev:custom:managed_by_service")
+# Connections to cognito kept open per process
+COGNITO_MAX_POOL_CONNECTIONS = env.int("COGNITO_MAX_POOL_CONNECTIONS", 10)
+# Write the changes of users to an outbox table instead of calling cognito within the request.
+# The outbox is applied to cognito by the cognito_outbox command, which must then be running.
+COGNITO_OUTBOX = env.bool("COGNITO_OUTBOX", False)
 
 # Testing
 TESTING = False
 
+# API response cache
+# The serialized list responses are cached in the "api" cache. By default, this is a local
+# in-process LRU cache, whose invalidation counters are only bumped by changes made in the same
+# process. Changes made by other workers or by commands (e.g. bod_sync, stac_sync or
+# cognito_outbox) then only invalidate the cached responses if they change the ETag of the
+# response, otherwise they are seen after API_CACHE_TIMEOUT. Use a shared backend (e.g.
+# "redis://host:6379/0") to share the responses and the invalidation counters between all workers
+# and processes.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "api": env.cache_url("API_CACHE_URL", default="locmemcache://api?max_entries=1000"),
+}
+API_CACHE_TIMEOUT = env.int("API_CACHE_TIMEOUT", 3600)
+
+# Permission and API token caches
+# Both are invalidated with the version counters of the "api" cache, so they are only enabled if
+# that cache is shared by all processes (see API_CACHE_URL).
+# Permission sets of API users are cached per process, this many at most and for this many seconds.
+PERMISSION_CACHE_MAX_ENTRIES = env.int("PERMISSION_CACHE_MAX_ENTRIES", 10000)
+PERMISSION_CACHE_TIMEOUT = env.int("PERMISSION_CACHE_TIMEOUT", 60)
+# Verified API tokens of service accounts are cached per process, this many at most and for this
+# many seconds.
+API_TOKEN_CACHE_MAX_ENTRIES = env.int("API_TOKEN_CACHE_MAX_ENTRIES", 1000)
+API_TOKEN_CACHE_TIMEOUT = env.int("API_TOKEN_CACHE_TIMEOUT", 60)
+
+# API pagination
+API_PAGINATION_DEFAULT_LIMIT = env.int("API_PAGINATION_DEFAULT_LIMIT", 100)
+API_PAGINATION_MAX_LIMIT = env.int("API_PAGINATION_MAX_LIMIT", 1000)
+
+# API change feed
+# Deletions are recorded for this many days, older "updated_since" timestamps are rejected.
+API_TOMBSTONE_RETENTION_DAYS = env.int("API_TOMBSTONE_RETENTION_DAYS", 30)
+
+# API batch requests
+API_BATCH_MAX_IDS = env.int("API_BATCH_MAX_IDS", 1000)
+
+# API streaming
+# If enabled, complete (unpaginated) lists are streamed from a server-side cursor instead of being
+# rendered in memory. Streamed responses are not stored in the response cache.
+API_STREAM_LIST_RESPONSES = env.bool("API_STREAM_LIST_RESPONSES", False)
+API_STREAM_CHUNK_SIZE = env.int("API_STREAM_CHUNK_SIZE", 500)
+
 # nanoid
 SHORT_ID_SIZE = env.int("SHORT_ID_SIZE", 12)
 SHORT_ID_ALPHABET = env.str("SHORT_ID_ALPHABET", "0123456789abcdefghijklmnopqrstuvwxyz")
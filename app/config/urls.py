@@ -14,14 +14,21 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from typing import Any
+
 from django.contrib import admin
 from django.urls import path
 
 from .api import api
 from .api import root
 
-urlpatterns = [
-    path('', root.urls),
-    path('api/v1/', api.urls),
-    path('admin/', admin.site.urls),
-]
+
+def get_urlpatterns(api_urls: Any) -> list[Any]:
+    return [
+        path('', root.urls),
+        path('api/v1/', api_urls),
+        path('admin/', admin.site.urls),
+    ]
+
+
+urlpatterns = get_urlpatterns(api.urls)
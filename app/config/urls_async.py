@@ -0,0 +1,8 @@
+"""
+URL configuration of the ASGI mode, the API is served by the async operations (see
+`config.asgi`).
+"""
+from .api import async_api
+from .urls import get_urlpatterns
+
+urlpatterns = get_urlpatterns(async_api.urls)
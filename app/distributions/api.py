@@ -1,12 +1,28 @@
+from datetime import datetime
+from typing import Any
+
+from ninja import Query
 from ninja import Router
-from schemas import TranslationsSchema
-from utils.authentication import PermissionAuth
+from provider.models import Provider
+from schemas import BatchSchema
+from schemas import PaginationParams
+from utils.authentication import permission_auth
+from utils.conditional import conditional
+from utils.fieldsets import Fieldset
+from utils.fieldsets import attribute_field
+from utils.fieldsets import project
+from utils.fieldsets import to_schema
+from utils.fieldsets import to_values
+from utils.fieldsets import translated_field
+from utils.fieldsets import translations_field
 from utils.language import LanguageCode
-from utils.language import get_language
-from utils.language import get_translation
+from utils.resources import Resource
+from utils.response_cache import cached
 
+from django.db.models import QuerySet
 from django.http import HttpRequest
-from django.shortcuts import get_object_or_404
+from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 
 from .models import Attribution
 from .models import Dataset
@@ -17,75 +33,157 @@ from .schemas import DatasetSchema
 
 router = Router()
 
+ATTRIBUTION_FIELDSET: Fieldset = {
+    "id": attribute_field("attribution_id"),
+    "name": translated_field("name"),
+    "name_translations": translations_field("name"),
+    "description": translated_field("description"),
+    "description_translations": translations_field("description"),
+    "provider_id": attribute_field("provider.provider_id"),
+}
+
+DATASET_FIELDSET: Fieldset = {
+    "id": attribute_field("dataset_id"),
+    "title": translated_field("title"),
+    "title_translations": translations_field("title"),
+    "description": translated_field("description"),
+    "description_translations": translations_field("description"),
+    "created": attribute_field("created"),
+    "updated": attribute_field("updated"),
+    "provider_id": attribute_field("provider.provider_id"),
+    "attribution_id": attribute_field("attribution.attribution_id"),
+}
+
+
+def attribution_queryset(
+    lang: LanguageCode,
+    fields: list[str] | None = None,
+) -> QuerySet[Attribution, dict[str, Any]]:
+    """
+    Returns a queryset of attribution rows only containing the columns needed by
+    `attribution_to_values` for the given response fields (all if None).
+
+    Translated fields are resolved in the given language by the database. The related provider
+    is joined in the same query to avoid one additional query per row.
+    """
+    # The primary key and the attribution ID are always loaded as they are the keys for
+    # pagination and batch requests
+    return project(
+        Attribution.objects.all(),
+        ATTRIBUTION_FIELDSET,
+        lang,
+        fields,
+        required=("id", "attribution_id")
+    )
+
+
+def dataset_queryset(
+    lang: LanguageCode,
+    fields: list[str] | None = None,
+) -> QuerySet[Dataset, dict[str, Any]]:
+    """
+    Returns a queryset of dataset rows only containing the columns needed by `dataset_to_values`
+    for the given response fields (all if None).
+
+    Translated fields are resolved in the given language by the database. The related provider
+    and attribution are joined in the same query to avoid additional queries per row.
+    """
+    # The dataset ID is always loaded as it is the key for pagination and batch requests
+    return project(Dataset.objects.all(), DATASET_FIELDSET, lang, fields, required=("dataset_id",))
+
 
 def attribution_to_response(model: Attribution, lang: LanguageCode) -> AttributionSchema:
     """
     Transforms the given model using the given language into a response object.
     """
-    response = AttributionSchema(
-        id=model.attribution_id,
-        name=get_translation(model, "name", lang),
-        name_translations=TranslationsSchema(
-            de=model.name_de,
-            fr=model.name_fr,
-            en=model.name_en,
-            it=model.name_it,
-            rm=model.name_rm,
-        ),
-        description=get_translation(model, "description", lang),
-        description_translations=TranslationsSchema(
-            de=model.description_de,
-            fr=model.description_fr,
-            en=model.description_en,
-            it=model.description_it,
-            rm=model.description_rm,
-        ),
-        provider_id=model.provider.provider_id,
-    )
-    return response
+    return to_schema(AttributionSchema, model, lang, ATTRIBUTION_FIELDSET)
+
+
+def attribution_to_values(row: dict[str, Any],
+                          lang: LanguageCode,
+                          fields: list[str] | None = None) -> dict[str, Any]:
+    """
+    Transforms the given row of `attribution_queryset` using the given language into the values
+    of a response object, only containing the given fields (all if None).
+
+    This is the same as `attribution_to_response`, but without building and validating any
+    schema.
+    """
+    return to_values(row, lang, ATTRIBUTION_FIELDSET, fields, exclude_none=True)
 
 
 def dataset_to_response(model: Dataset, lang: LanguageCode) -> DatasetSchema:
     """
     Transforms the given model using the given language into a response object.
     """
-    response = DatasetSchema(
-        id=model.dataset_id,
-        title=get_translation(model, "title", lang),
-        title_translations=TranslationsSchema(
-            de=model.title_de,
-            fr=model.title_fr,
-            en=model.title_en,
-            it=model.title_it,
-            rm=model.title_rm,
-        ),
-        description=get_translation(model, "description", lang),
-        description_translations=TranslationsSchema(
-            de=model.description_de,
-            fr=model.description_fr,
-            en=model.description_en,
-            it=model.description_it,
-            rm=model.description_rm,
-        ),
-        created=model.created,
-        updated=model.updated,
-        provider_id=model.provider.provider_id,
-        attribution_id=model.attribution.attribution_id,
-    )
-    return response
+    return to_schema(DatasetSchema, model, lang, DATASET_FIELDSET)
+
+
+def dataset_to_values(row: dict[str, Any],
+                      lang: LanguageCode,
+                      fields: list[str] | None = None) -> dict[str, Any]:
+    """
+    Transforms the given row of `dataset_queryset` using the given language into the values of a
+    response object, only containing the given fields (all if None).
+
+    This is the same as `dataset_to_response`, but without building and validating any schema.
+    """
+    return to_values(row, lang, DATASET_FIELDSET, fields, exclude_none=True)
+
+
+ATTRIBUTIONS = Resource(
+    Attribution,
+    ATTRIBUTION_FIELDSET,
+    attribution_queryset,
+    attribution_to_values,
+    batch_key="attribution_id",
+)
+
+DATASETS = Resource(
+    Dataset,
+    DATASET_FIELDSET,
+    dataset_queryset,
+    dataset_to_values,
+    batch_key="dataset_id",
+    page_key="dataset_id",
+)
+
+
+# Registered before the detail endpoint, so that "batch" is not taken for an ID
+@router.post(
+    "attributions/batch",
+    response={200: AttributionListSchema},
+    exclude_none=True,
+    auth=permission_auth('distributions.view_attribution')
+)
+def attributions_batch(
+    request: HttpRequest,
+    batch: BatchSchema,
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
+    """
+    Get the attributions with the given IDs, return translatable fields in the given language.
+
+    This is the same as passing "ids" to the endpoint for all attributions, for lists of IDs
+    which are too long for a query string.
+    """
+    return ATTRIBUTIONS.batch(request, batch.ids, lang, fields)
 
 
 @router.get(
     "attributions/{attribution_id}",
     response={200: AttributionSchema},
     exclude_none=True,
-    auth=PermissionAuth('distributions.view_attribution')
+    auth=permission_auth('distributions.view_attribution')
 )
+@conditional(Attribution, Provider)
 def attribution(
     request: HttpRequest,
     attribution_id: str,
-    lang: LanguageCode | None = None
-) -> AttributionSchema:
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
     """
     Get the attribution with the given ID, return translatable fields in the given language.
 
@@ -130,67 +228,138 @@ def attribution(
           are ignored (Example: "de;q=0.7, rm;q=0.8" --> "de")
         - Subtags in the header are ignored. So "en-US" is interpreted as "en".
         - Wildcards ("*") are ignored.
+
+    The response can be restricted to some of the fields by passing a comma separated list, for
+    example "fields=id,name". Only the columns needed for these fields are loaded.
     """
-    model = get_object_or_404(Attribution, attribution_id=attribution_id)
-    lang_to_use = get_language(lang, request.headers)
-    response = attribution_to_response(model, lang_to_use)
-    return response
+    return ATTRIBUTIONS.get(request, lang, fields, attribution_id=attribution_id)
 
 
 @router.get(
     "attributions",
     response={200: AttributionListSchema},
     exclude_none=True,
-    auth=PermissionAuth('distributions.view_attribution')
+    auth=permission_auth('distributions.view_attribution')
 )
-def attributions(request: HttpRequest,
-                 lang: LanguageCode | None = None) -> dict[str, list[AttributionSchema]]:
+@conditional(Attribution, Provider)
+@cached(Attribution, Provider)
+def attributions(
+    request: HttpRequest,
+    pagination: Query[PaginationParams],
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+    ids: str | None = None,
+    updated_since: datetime | None = None,
+) -> HttpResponse | StreamingHttpResponse:
     """
     Get all attributions, return translatable fields in the given language.
 
     For more details on how individual attributions are returned, see the
     corresponding endpoint for a specific attribution.
+
+    The result can be paginated by passing a "limit". If there are more results, the response
+    contains the URL of the next page in "next". Without a limit or cursor, all attributions are
+    returned at once.
+
+    The response can be restricted to some of the fields, see the endpoint for a specific
+    attribution.
+
+    Specific attributions can be requested by passing a comma separated list of IDs, for example
+    "ids=ch.bafu.kt,ch.swisstopo". They are returned in the given order, IDs without an
+    attribution are listed in "missing". See also the POST variant for long lists.
+
+    Only the attributions changed since a given time can be requested by passing an ISO 8601
+    timestamp, for example "updated_since=2025-01-31T12:00:00Z". The first page then also lists
+    the IDs of the attributions deleted since that time in "deleted". Timestamps older than the
+    retention period of deletions are rejected with 410 (Gone), a full sync is required then.
     """
-    models = Attribution.objects.order_by("id").all()
-    lang_to_use = get_language(lang, request.headers)
+    return ATTRIBUTIONS.get_list(
+        request, pagination, lang, fields, ids=ids, updated_since=updated_since
+    )
 
-    responses = [attribution_to_response(model, lang_to_use) for model in models]
-    return {"items": responses}
+
+# Registered before the detail endpoint, so that "batch" is not taken for an ID
+@router.post(
+    "datasets/batch",
+    response={200: DatasetListSchema},
+    exclude_none=True,
+    auth=permission_auth('distributions.view_dataset')
+)
+def datasets_batch(
+    request: HttpRequest,
+    batch: BatchSchema,
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
+    """
+    Get the datasets with the given IDs.
+
+    This is the same as passing "ids" to the endpoint for all datasets, for lists of IDs which
+    are too long for a query string.
+    """
+    return DATASETS.batch(request, batch.ids, lang, fields)
 
 
 @router.get(
     "datasets/{dataset_id}",
     response={200: DatasetSchema},
     exclude_none=True,
-    auth=PermissionAuth('distributions.view_dataset')
+    auth=permission_auth('distributions.view_dataset')
 )
+@conditional(Dataset, Attribution, Provider)
 def dataset(
-    request: HttpRequest, dataset_id: str, lang: LanguageCode | None = None
-) -> DatasetSchema:
+    request: HttpRequest,
+    dataset_id: str,
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
     """
     Get the dataset with the given ID.
+
+    The response can be restricted to some of the fields by passing a comma separated list, for
+    example "fields=id,title". Only the columns needed for these fields are loaded.
     """
-    model = get_object_or_404(Dataset, dataset_id=dataset_id)
-    lang_to_use = get_language(lang, request.headers)
-    response = dataset_to_response(model, lang_to_use)
-    return response
+    return DATASETS.get(request, lang, fields, dataset_id=dataset_id)
 
 
 @router.get(
     "datasets",
     response={200: DatasetListSchema},
     exclude_none=True,
-    auth=PermissionAuth('distributions.view_dataset')
+    auth=permission_auth('distributions.view_dataset')
 )
-def datasets(request: HttpRequest,
-             lang: LanguageCode | None = None) -> dict[str, list[DatasetSchema]]:
+@conditional(Dataset, Attribution, Provider)
+@cached(Dataset, Attribution, Provider)
+def datasets(
+    request: HttpRequest,
+    pagination: Query[PaginationParams],
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+    ids: str | None = None,
+    updated_since: datetime | None = None,
+) -> HttpResponse | StreamingHttpResponse:
     """
     Get all datasets.
 
     For more details on how individual datasets are returned, see the
     corresponding endpoint for a specific attribution.
+
+    The result can be paginated by passing a "limit". If there are more results, the response
+    contains the URL of the next page in "next". Without a limit or cursor, all datasets are
+    returned at once.
+
+    The response can be restricted to some of the fields, see the endpoint for a specific
+    dataset.
+
+    Specific datasets can be requested by passing a comma separated list of IDs, for example
+    "ids=ch.bafu.auen,ch.bafu.moore". They are returned in the given order, IDs without a dataset
+    are listed in "missing". See also the POST variant for long lists.
+
+    Only the datasets changed since a given time can be requested by passing an ISO 8601
+    timestamp, for example "updated_since=2025-01-31T12:00:00Z". The first page then also lists
+    the IDs of the datasets deleted since that time in "deleted". Timestamps older than the
+    retention period of deletions are rejected with 410 (Gone), a full sync is required then.
     """
-    models = Dataset.objects.order_by("dataset_id").all()
-    lang_to_use = get_language(lang, request.headers)
-    responses = [dataset_to_response(model, lang_to_use) for model in models]
-    return {"items": responses}
+    return DATASETS.get_list(
+        request, pagination, lang, fields, ids=ids, updated_since=updated_since
+    )
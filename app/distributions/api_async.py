@@ -0,0 +1,141 @@
+from datetime import datetime
+from inspect import getdoc
+
+from ninja import Query
+from ninja import Router
+from provider.models import Provider
+from schemas import BatchSchema
+from schemas import PaginationParams
+from utils.authentication import permission_auth
+from utils.conditional import conditional
+from utils.language import LanguageCode
+from utils.response_cache import cached
+
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+
+from . import api
+from .api import ATTRIBUTIONS
+from .api import DATASETS
+from .models import Attribution
+from .models import Dataset
+from .schemas import AttributionListSchema
+from .schemas import AttributionSchema
+from .schemas import DatasetListSchema
+from .schemas import DatasetSchema
+
+# Async versions of the operations of `distributions.api`, served in ASGI mode (see `config.asgi`)
+router = Router()
+
+
+# Registered before the detail endpoint, so that "batch" is not taken for an ID
+@router.post(
+    "attributions/batch",
+    response={200: AttributionListSchema},
+    exclude_none=True,
+    auth=permission_auth('distributions.view_attribution'),
+    description=getdoc(api.attributions_batch),
+)
+async def attributions_batch(
+    request: HttpRequest,
+    batch: BatchSchema,
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
+    return await ATTRIBUTIONS.abatch(request, batch.ids, lang, fields)
+
+
+@router.get(
+    "attributions/{attribution_id}",
+    response={200: AttributionSchema},
+    exclude_none=True,
+    auth=permission_auth('distributions.view_attribution'),
+    description=getdoc(api.attribution),
+)
+@conditional(Attribution, Provider)
+async def attribution(
+    request: HttpRequest,
+    attribution_id: str,
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
+    return await ATTRIBUTIONS.aget(request, lang, fields, attribution_id=attribution_id)
+
+
+@router.get(
+    "attributions",
+    response={200: AttributionListSchema},
+    exclude_none=True,
+    auth=permission_auth('distributions.view_attribution'),
+    description=getdoc(api.attributions),
+)
+@conditional(Attribution, Provider)
+@cached(Attribution, Provider)
+async def attributions(
+    request: HttpRequest,
+    pagination: Query[PaginationParams],
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+    ids: str | None = None,
+    updated_since: datetime | None = None,
+) -> HttpResponse | StreamingHttpResponse:
+    return await ATTRIBUTIONS.aget_list(
+        request, pagination, lang, fields, ids=ids, updated_since=updated_since
+    )
+
+
+# Registered before the detail endpoint, so that "batch" is not taken for an ID
+@router.post(
+    "datasets/batch",
+    response={200: DatasetListSchema},
+    exclude_none=True,
+    auth=permission_auth('distributions.view_dataset'),
+    description=getdoc(api.datasets_batch),
+)
+async def datasets_batch(
+    request: HttpRequest,
+    batch: BatchSchema,
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
+    return await DATASETS.abatch(request, batch.ids, lang, fields)
+
+
+@router.get(
+    "datasets/{dataset_id}",
+    response={200: DatasetSchema},
+    exclude_none=True,
+    auth=permission_auth('distributions.view_dataset'),
+    description=getdoc(api.dataset),
+)
+@conditional(Dataset, Attribution, Provider)
+async def dataset(
+    request: HttpRequest,
+    dataset_id: str,
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
+    return await DATASETS.aget(request, lang, fields, dataset_id=dataset_id)
+
+
+@router.get(
+    "datasets",
+    response={200: DatasetListSchema},
+    exclude_none=True,
+    auth=permission_auth('distributions.view_dataset'),
+    description=getdoc(api.datasets),
+)
+@conditional(Dataset, Attribution, Provider)
+@cached(Dataset, Attribution, Provider)
+async def datasets(
+    request: HttpRequest,
+    pagination: Query[PaginationParams],
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+    ids: str | None = None,
+    updated_since: datetime | None = None,
+) -> HttpResponse | StreamingHttpResponse:
+    return await DATASETS.aget_list(
+        request, pagination, lang, fields, ids=ids, updated_since=updated_since
+    )
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class DistributionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'distributions'
+
+    def ready(self) -> None:
+        # pylint: disable=import-outside-toplevel
+        from utils.response_cache import invalidate_on_change
+
+        invalidate_on_change(self.get_model("Attribution"))
+        invalidate_on_change(self.get_model("Dataset"))
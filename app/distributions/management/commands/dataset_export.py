@@ -52,6 +52,12 @@ class Command(CustomBaseCommand):
             action="store_true",
             help="Import datasets",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of rows read from the BOD at once, with a server-side cursor",
+        )
         parser.add_argument(
             "--target-env",
             type=str,
@@ -106,7 +112,7 @@ class Command(CustomBaseCommand):
         if options["providers"]:
             self.export_providers(client, options["target_env"])
         if options["layers_js"]:
-            self.export_layers_js(client, options["target_env"])
+            self.export_layers_js(client, options["target_env"], options["chunk_size"])
 
     def export_datasets(self, client: "DynamoDBClient", target_env: str, sample: bool) -> None:
         self.print("Fetching existing datasets from DynamoDB")
@@ -180,7 +186,9 @@ class Command(CustomBaseCommand):
                 }},
             )
 
-    def export_layers_js(self, client: "DynamoDBClient", target_env: str) -> None:
+    def export_layers_js(
+        self, client: "DynamoDBClient", target_env: str, chunk_size: int = 2000
+    ) -> None:
         self.print("Fetching existing layers from DynamoDB")
         obsolete = set()
         paginator = client.get_paginator("scan")
@@ -191,7 +199,9 @@ class Command(CustomBaseCommand):
             obsolete.update({item["layer_id"]["S"] for item in page["Items"]})
 
         self.print("Exporting layers_js to DynamoDB")
-        qs = BodLayersJS.objects.all().values()
+        # Read with a server-side cursor. Outside of a transaction, it is declared WITH HOLD, so
+        # that no transaction stays open on the BOD while exporting
+        qs = BodLayersJS.objects.all().values().iterator(chunk_size=chunk_size)
 
         for layer in qs:
             exp_item = exp_item = ExportLayersJS(
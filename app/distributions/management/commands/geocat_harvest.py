@@ -153,6 +153,12 @@ class Command(CustomBaseCommand):
             action="store_true",
             help="Harvest contact information of the available datasets",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of datasets read from the BOD at once, with a server-side cursor",
+        )
         parser.add_argument(
             "--target-env",
             type=str,
@@ -208,7 +214,9 @@ class Command(CustomBaseCommand):
             return
 
         # Harvest geocat information based on known BOD datasets
-        for dataset in BodDataset.objects.iterator():
+        # Read with a server-side cursor. Outside of a transaction, it is declared WITH HOLD, so
+        # that no transaction stays open on the BOD during the requests to geocat
+        for dataset in BodDataset.objects.iterator(chunk_size=options["chunk_size"]):
             if not dataset.fk_geocat:
                 self.print_warning(f"Dataset {dataset.id_dataset} has no valid geocat_id")
                 continue
@@ -0,0 +1,117 @@
+import json
+from datetime import datetime
+from datetime import timezone
+from time import perf_counter
+from typing import Any
+from typing import Callable
+
+from distributions.api import DATASET_FIELDSET
+from distributions.api import dataset_to_response
+from distributions.api import dataset_to_values
+from distributions.models import Attribution
+from distributions.models import Dataset
+from distributions.schemas import DatasetListSchema
+from ninja.responses import NinjaJSONEncoder
+from provider.models import Provider
+from utils.command import CustomBaseCommand
+from utils.fieldsets import get_row
+from utils.language import LanguageCode
+from utils.renderers import dumps
+
+from django.core.management.base import CommandParser
+
+
+class Command(CustomBaseCommand):
+    help = "Measures the per-row cost of serializing the dataset list with schemas and with rows"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10000,
+            help="Number of datasets in the serialized list",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of measurements, the fastest one is reported",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        models = self.build_datasets(options["rows"])
+        lang = LanguageCode.GERMAN
+        rows = [get_row(model, lang, DATASET_FIELDSET) for model in models]
+
+        def schemas() -> bytes:
+            # What ninja does with the list schema returned by the endpoints before: validate the
+            # response, dump it and render it with the standard library
+            data = DatasetListSchema(items=[dataset_to_response(model, lang) for model in models])
+            response = DatasetListSchema.model_validate(data.model_dump())
+            return json.dumps(response.model_dump(exclude_none=True), cls=NinjaJSONEncoder).encode()
+
+        def values() -> bytes:
+            return dumps({"items": [dataset_to_values(row, lang) for row in rows]})
+
+        if json.loads(schemas()) != json.loads(values()):
+            self.print_error("The serializations differ")
+            return
+
+        for name, serialize in (("schemas", schemas), ("rows", values)):
+            self.print_success(
+                "%s: %.2f µs per row",
+                name,
+                self.measure(serialize, options["repeat"]) / len(models) * 1e6,
+            )
+
+    def build_datasets(self, count: int) -> list[Dataset]:
+        """
+        Build (unsaved) datasets with all fields set, so no database is needed.
+        """
+        provider = Provider(
+            provider_id="ch.bafu",
+            name_de="Bundesamt für Umwelt",
+            name_fr="Office fédéral de l'environnement",
+            name_en="Federal Office for the Environment",
+            acronym_de="BAFU",
+            acronym_fr="OFEV",
+            acronym_en="FOEN",
+        )
+        attribution = Attribution(
+            attribution_id="ch.bafu",
+            name_de="BAFU",
+            name_fr="OFEV",
+            name_en="FOEN",
+            description_de="Bundesamt für Umwelt",
+            description_fr="Office fédéral de l'environnement",
+            description_en="Federal Office for the Environment",
+            provider=provider,
+        )
+        timestamp = datetime(2025, 1, 31, 12, 0, 0, 123456, tzinfo=timezone.utc)
+        return [
+            Dataset(
+                dataset_id=f"ch.bafu.dataset-{index}",
+                title_de=f"Datensatz {index}",
+                title_fr=f"Jeu de données {index}",
+                title_en=f"Dataset {index}",
+                description_de=f"Beschreibung {index}",
+                description_fr=f"Description {index}",
+                description_en=f"Description {index}",
+                created=timestamp,
+                updated=timestamp,
+                provider=provider,
+                attribution=attribution,
+            ) for index in range(count)
+        ]
+
+    def measure(self, serialize: Callable[[], bytes], repeat: int) -> float:
+        """
+        Return the fastest duration of the given serialization in seconds.
+        """
+        durations = []
+        for _ in range(repeat):
+            start = perf_counter()
+            serialize()
+            durations.append(perf_counter() - start)
+        return min(durations)
@@ -1,3 +1,5 @@
+from contextlib import AbstractContextManager
+from contextlib import nullcontext
 from difflib import SequenceMatcher
 from re import split
 from typing import Any
@@ -15,8 +17,13 @@ from provider.models import Provider
 from pystac.collection import Collection
 from pystac_client import Client
 from requests import get
+from utils.chunks import batches
+from utils.chunks import chunk_transaction
 from utils.command import CustomBaseCommand
+from utils.fingerprint import get_fingerprint
+from utils.response_cache import bump_version_on_commit
 
+from django.core.management.base import CommandError
 from django.core.management.base import CommandParser
 from django.db import transaction
 
@@ -36,6 +43,9 @@ class Command(CustomBaseCommand):
     ):
         super().__init__(stdout, stderr, no_color, force_color)
         self.counts: dict[str, Counter] = {}
+        self.datasets: dict[str, int] = {}
+        self.provider_names: dict[int, str] = {}
+        self.fingerprints: dict[str, str | None] = {}
 
     def add_arguments(self, parser: CommandParser) -> None:
         super().add_arguments(parser)
@@ -70,6 +80,13 @@ class Command(CustomBaseCommand):
             help=
             "Skip the sync with unmanaged collections (legacy web page at data.geo.admin.ch root)"
         )
+        parser.add_argument(
+            "--commit-every",
+            type=int,
+            default=0,
+            help="Commit the changes in chunks of the given number of collections instead of all "
+            "at once. An interrupted sync can be resumed by running it again"
+        )
 
     def increment_counter(self, model_name: str, operation: Operation, value: int = 1) -> None:
         """ Updates internal counters of operations on models. """
@@ -139,16 +156,17 @@ class Command(CustomBaseCommand):
             attribution=attribution
         )
 
-    def update_package_distribution(
-        self, collection_id: str, managed_by_stac: bool
-    ) -> Dataset | None:
-        """ Create or update the package distribution with the given ID. """
+    def update_package_distribution(self, collection_id: str, managed_by_stac: bool) -> int | None:
+        """ Create or update the package distribution with the given ID.
+
+        Returns the primary key of its dataset. Package distributions with an unchanged
+        fingerprint are skipped without loading them.
+        """
         managed = 'managed' if managed_by_stac else 'unmanaged'
 
         # Get dataset
         dataset = (
-            Dataset.objects.filter(dataset_id=collection_id).first() or
-            Dataset.objects.filter(dataset_id=self.options['default_dataset']).first()
+            self.datasets.get(collection_id) or self.datasets.get(self.options['default_dataset'])
         )
         if not dataset:
             self.print_warning("No dataset for collection id '%s'", collection_id)
@@ -158,6 +176,10 @@ class Command(CustomBaseCommand):
                 )
             return None
 
+        fingerprint = get_fingerprint([managed_by_stac, dataset])
+        if self.fingerprints.get(collection_id) == fingerprint:
+            return dataset
+
         # Get or create package distribution
         package_distribution = PackageDistribution.objects.filter(
             package_distribution_id=collection_id, _legacy_imported=True
@@ -166,8 +188,9 @@ class Command(CustomBaseCommand):
             package_distribution = PackageDistribution.objects.create(
                 package_distribution_id=collection_id,
                 _legacy_imported=True,
+                _legacy_fingerprint=fingerprint,
                 managed_by_stac=managed_by_stac,
-                dataset=dataset
+                dataset_id=dataset
             )
             self.increment_counter('package_distribution', 'added')
             self.print(f"Added package distribution '{collection_id}' ({managed})")
@@ -175,13 +198,18 @@ class Command(CustomBaseCommand):
         # Update package distribution
         if (
             package_distribution.managed_by_stac != managed_by_stac or
-            package_distribution.dataset != dataset
+            package_distribution.dataset_id != dataset
         ):
             package_distribution.managed_by_stac = managed_by_stac
-            package_distribution.dataset = dataset
+            package_distribution.dataset_id = dataset
+            package_distribution._legacy_fingerprint = fingerprint
             package_distribution.save()
             self.increment_counter('package_distribution', 'updated')
             self.print(f"Updated package distribution '{collection_id}' ({managed})")
+        elif package_distribution._legacy_fingerprint != fingerprint:
+            # Only the fingerprint is missing or outdated
+            PackageDistribution.objects.filter(pk=package_distribution.pk
+                                              ).update(_legacy_fingerprint=fingerprint)
 
         return dataset
 
@@ -196,17 +224,36 @@ class Command(CustomBaseCommand):
         """
         processed = set()
 
+        # Load the datasets and the fingerprints at once
+        for dataset_id, pk, provider_name in Dataset.objects.values_list(
+            'dataset_id', 'pk', 'provider__name_en'
+        ):
+            self.datasets[dataset_id] = pk
+            self.provider_names[pk] = provider_name
+        # Fingerprints not matching the stored values (e.g. edited in the admin) are ignored, so
+        # that local changes are overwritten again
+        imported = PackageDistribution.objects.filter(_legacy_imported=True)
+        package_distributions = imported.values_list(
+            'package_distribution_id', '_legacy_fingerprint', 'managed_by_stac', 'dataset'
+        )
+        for stored_id, fingerprint, stored_managed_by_stac, stored_dataset in package_distributions:
+            if fingerprint == get_fingerprint([stored_managed_by_stac, stored_dataset]):
+                self.fingerprints[stored_id] = fingerprint
+
         # Get managed collections from STAC API
         client = Client.open(urljoin(self.options['url'], self.options['endpoint']))
-        for collection in client.collection_search().collections():
-            collection_id = collection.id
+        collections = client.collection_search().collections()
+        for chunk in batches(collections, self.options['commit_every']):
+            with self.chunk_transaction():
+                for collection in chunk:
+                    collection_id = collection.id
 
-            dataset = self.update_package_distribution(collection_id, True)
-            if not dataset:
-                continue
+                    dataset = self.update_package_distribution(collection_id, True)
+                    if not dataset:
+                        continue
 
-            self.check_provider(collection, dataset)
-            processed.add(collection_id)
+                    self.check_provider(collection, self.provider_names[dataset])
+                    processed.add(collection_id)
 
         # Get unmanaged collections from the HTML root
         if not self.options['skip_unmanaged_collections']:
@@ -215,6 +262,7 @@ class Command(CustomBaseCommand):
             if not element:
                 raise ValueError(f"Error parsing {self.options['url']}")
 
+            collection_ids = []
             for line in split(r'\r?\n', element.text.strip()):
                 line = line.strip()
                 if not line:
@@ -227,25 +275,36 @@ class Command(CustomBaseCommand):
                 collection_id = values[0]
                 if collection_id in processed:
                     continue
+                collection_ids.append(collection_id)
 
-                dataset = self.update_package_distribution(collection_id, False)
-                if not dataset:
-                    continue
+            for ids in batches(collection_ids, self.options['commit_every']):
+                with self.chunk_transaction():
+                    for collection_id in ids:
+                        dataset = self.update_package_distribution(collection_id, False)
+                        if not dataset:
+                            continue
 
-                processed.add(collection_id)
+                        processed.add(collection_id)
 
         # Remove orphaned package distributions
         orphans = PackageDistribution.objects.filter(
             _legacy_imported=True
         ).exclude(package_distribution_id__in=processed,)
-        _, removed = orphans.delete()
+        # This happens once all collections were processed, so that only actual orphans are removed
+        with self.chunk_transaction():
+            _, removed = orphans.delete()
         for model_class, count in removed.items():
             model_name = model_class.split('.')[-1].lower()
             self.increment_counter(model_name, 'removed', count)
 
-    def check_provider(self, collection: Collection, dataset: Dataset) -> None:
-        """Checks whether the provider in the STAC collection matches the provider in the dataset
-        and warns if they do not.
+    def chunk_transaction(self) -> AbstractContextManager[None]:
+        """ Return the transaction of a chunk of changes, see `utils.chunks.chunk_transaction`. """
+
+        return chunk_transaction(self.options['commit_every'], Provider, Attribution, Dataset)
+
+    def check_provider(self, collection: Collection, name_dataset: str) -> None:
+        """Checks whether the provider in the STAC collection matches the given provider name of
+        the dataset and warns if they do not.
 
         A similarity ratio can be applied to minimize warnings for minor textual variations.
 
@@ -258,7 +317,6 @@ class Command(CustomBaseCommand):
             self.print_warning("Collection '%s' has more than one provider", collection_id)
         else:
             name_collection = providers[0].name
-            name_dataset = dataset.provider.name_en
             if name_dataset != name_collection:
                 similarity = SequenceMatcher(None, name_collection, name_dataset).ratio()
                 if similarity < self.options['similarity']:
@@ -272,15 +330,24 @@ class Command(CustomBaseCommand):
     def handle(self, *args: Any, **options: Any) -> None:
         """ Main entry point of command. """
 
-        with transaction.atomic():
+        if options['commit_every'] and options['dry_run']:
+            raise CommandError("--dry-run can not be used with --commit-every")
+
+        # Without --commit-every, all changes are committed at once in the end
+        with nullcontext() if options['commit_every'] else transaction.atomic():
             # Clear data
             if options['clear']:
-                self.clear_package_distributions()
+                with self.chunk_transaction():
+                    self.clear_package_distributions()
 
             # Import data
-            self.ensure_default_dataset()
+            with self.chunk_transaction():
+                self.ensure_default_dataset()
             self.import_package_distributions()
 
+            # Invalidate cached API responses once the changes are committed
+            bump_version_on_commit(Provider, Attribution, Dataset)
+
             # Print counts
             printed = False
             for model in sorted(self.counts):
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.14 on 2026-10-18 06:49
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distributions', '0014_attribution_created_attribution_updated_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attribution',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated'),
+        ),
+        migrations.AlterField(
+            model_name='dataset',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated'),
+        ),
+    ]
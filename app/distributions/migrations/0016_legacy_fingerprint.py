@@ -0,0 +1,47 @@
+# Generated by Django 5.2.14 on 2026-10-18 09:08
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distributions', '0015_alter_attribution_updated_alter_dataset_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attribution',
+            name='_legacy_fingerprint',
+            field=models.CharField(
+                blank=True,
+                help_text='This field is used to detect changes of objects imported from the BOD',
+                max_length=64,
+                null=True,
+                verbose_name='Legacy Fingerprint'
+            ),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='_legacy_fingerprint',
+            field=models.CharField(
+                blank=True,
+                help_text='This field is used to detect changes of objects imported from the BOD',
+                max_length=64,
+                null=True,
+                verbose_name='Legacy Fingerprint'
+            ),
+        ),
+        migrations.AddField(
+            model_name='packagedistribution',
+            name='_legacy_fingerprint',
+            field=models.CharField(
+                blank=True,
+                help_text='This field is used to detect changes of objects imported from STAC',
+                max_length=64,
+                null=True,
+                verbose_name='Legacy Fingerprint'
+            ),
+        ),
+    ]
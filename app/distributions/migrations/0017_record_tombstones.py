@@ -0,0 +1,18 @@
+from utils.tombstones import record_deletions
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distributions', '0016_legacy_fingerprint'),
+        ('support', '0003_record_tombstones'),
+    ]
+
+    operations = [
+        record_deletions(
+            "distributions_attribution", "distributions.Attribution", "attribution_id"
+        ),
+        record_deletions("distributions_dataset", "distributions.Dataset", "dataset_id"),
+    ]
@@ -19,7 +19,7 @@ class Attribution(models.Model):
         _(_context, "External ID"), max_length=100, unique=True, db_index=True
     )
     created = models.DateTimeField(_(_context, "Created"), auto_now_add=True)
-    updated = models.DateTimeField(_(_context, "Updated"), auto_now=True)
+    updated = models.DateTimeField(_(_context, "Updated"), auto_now=True, db_index=True)
 
     name_de = models.CharField(_(_context, "Name (German)"))
     name_fr = models.CharField(_(_context, "Name (French)"))
@@ -42,6 +42,13 @@ class Attribution(models.Model):
         db_index=False,
         help_text="This field is used to track objects imported from the BOD"
     )
+    _legacy_fingerprint = models.CharField(
+        _(_context, "Legacy Fingerprint"),
+        max_length=64,
+        null=True,
+        blank=True,
+        help_text="This field is used to detect changes of objects imported from the BOD"
+    )
 
     def save(
         self,
@@ -74,7 +81,7 @@ class Dataset(models.Model):
 
     dataset_id = CustomSlugField(_(_context, "External ID"), unique=True, max_length=100)
     created = models.DateTimeField(_(_context, "Created"), auto_now_add=True)
-    updated = models.DateTimeField(_(_context, "Updated"), auto_now=True)
+    updated = models.DateTimeField(_(_context, "Updated"), auto_now=True, db_index=True)
 
     title_de = models.CharField(_(_context, "Title (German)"))
     title_fr = models.CharField(_(_context, "Title (French)"))
@@ -98,6 +105,13 @@ class Dataset(models.Model):
         db_index=False,
         help_text="This field is used to track objects imported from the BOD"
     )
+    _legacy_fingerprint = models.CharField(
+        _(_context, "Legacy Fingerprint"),
+        max_length=64,
+        null=True,
+        blank=True,
+        help_text="This field is used to detect changes of objects imported from the BOD"
+    )
 
     def save(
         self,
@@ -140,6 +154,13 @@ class PackageDistribution(models.Model):
         default=False,
         help_text="This field is used to track objects imported from STAC"
     )
+    _legacy_fingerprint = models.CharField(
+        _(_context, "Legacy Fingerprint"),
+        max_length=64,
+        null=True,
+        blank=True,
+        help_text="This field is used to detect changes of objects imported from STAC"
+    )
 
     dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE)
 
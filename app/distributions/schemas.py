@@ -15,6 +15,9 @@ class AttributionSchema(Schema):
 
 class AttributionListSchema(Schema):
     items: list[AttributionSchema]
+    next: str | None = None
+    deleted: list[str] | None = None
+    missing: list[str] | None = None
 
 
 class DatasetSchema(Schema):
@@ -31,3 +34,6 @@ class DatasetSchema(Schema):
 
 class DatasetListSchema(Schema):
     items: list[DatasetSchema]
+    next: str | None = None
+    deleted: list[str] | None = None
+    missing: list[str] | None = None
@@ -1,55 +1,119 @@
+from datetime import datetime
+from typing import Any
+
+from ninja import Query
 from ninja import Router
-from utils.authentication import PermissionAuth
+from schemas import BatchSchema
+from schemas import PaginationParams
+from utils.authentication import permission_auth
+from utils.conditional import conditional
+from utils.fieldsets import Fieldset
+from utils.fieldsets import attribute_field
+from utils.fieldsets import project
+from utils.fieldsets import to_schema
+from utils.fieldsets import to_values
+from utils.fieldsets import translated_field
+from utils.fieldsets import translations_field
 from utils.language import LanguageCode
-from utils.language import get_language
-from utils.language import get_translation
+from utils.resources import Resource
+from utils.response_cache import cached
 
+from django.db.models import QuerySet
 from django.http import HttpRequest
-from django.shortcuts import get_object_or_404
+from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 
 from .models import Provider
 from .schemas import ProviderListSchema
 from .schemas import ProviderSchema
-from .schemas import TranslationsSchema
 
 router = Router()
 
+PROVIDER_FIELDSET: Fieldset = {
+    "id": attribute_field("provider_id"),
+    "name": translated_field("name"),
+    "name_translations": translations_field("name"),
+    "acronym": translated_field("acronym"),
+    "acronym_translations": translations_field("acronym"),
+}
+
+
+def provider_queryset(
+    lang: LanguageCode,
+    fields: list[str] | None = None,
+) -> QuerySet[Provider, dict[str, Any]]:
+    """
+    Returns a queryset of provider rows only containing the columns needed by
+    `provider_to_values` for the given response fields (all if None).
+
+    Translated fields are resolved in the given language by the database.
+    """
+    # The primary key and the provider ID are always loaded as they are the keys for pagination
+    # and batch requests
+    return project(
+        Provider.objects.all(), PROVIDER_FIELDSET, lang, fields, required=("id", "provider_id")
+    )
+
 
 def provider_to_response(model: Provider, lang: LanguageCode) -> ProviderSchema:
     """
     Transforms the given model using the given language into a response object.
     """
-    response = ProviderSchema(
-        id=model.provider_id,
-        name=get_translation(model, "name", lang),
-        name_translations=TranslationsSchema(
-            de=model.name_de,
-            fr=model.name_fr,
-            en=model.name_en,
-            it=model.name_it,
-            rm=model.name_rm,
-        ),
-        acronym=get_translation(model, "acronym", lang),
-        acronym_translations=TranslationsSchema(
-            de=model.acronym_de,
-            fr=model.acronym_fr,
-            en=model.acronym_en,
-            it=model.acronym_it,
-            rm=model.acronym_rm,
-        )
-    )
-    return response
+    return to_schema(ProviderSchema, model, lang, PROVIDER_FIELDSET)
+
+
+def provider_to_values(row: dict[str, Any],
+                       lang: LanguageCode,
+                       fields: list[str] | None = None) -> dict[str, Any]:
+    """
+    Transforms the given row of `provider_queryset` using the given language into the values of
+    a response object, only containing the given fields (all if None).
+
+    This is the same as `provider_to_response`, but without building and validating any schema.
+    """
+    return to_values(row, lang, PROVIDER_FIELDSET, fields, exclude_none=True)
+
+
+PROVIDERS = Resource(
+    Provider, PROVIDER_FIELDSET, provider_queryset, provider_to_values, batch_key="provider_id"
+)
+
+
+# Registered before the detail endpoint, so that "batch" is not taken for an ID
+@router.post(
+    "/providers/batch",
+    response={200: ProviderListSchema},
+    exclude_none=True,
+    auth=permission_auth('provider.view_provider')
+)
+def providers_batch(
+    request: HttpRequest,
+    batch: BatchSchema,
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
+    """
+    Get the providers with the given IDs, return translatable fields in the given language.
+
+    This is the same as passing "ids" to the endpoint for all providers, for lists of IDs which
+    are too long for a query string.
+    """
+    return PROVIDERS.batch(request, batch.ids, lang, fields)
 
 
 @router.get(
     "/providers/{provider_id}",
     response={200: ProviderSchema},
     exclude_none=True,
-    auth=PermissionAuth('provider.view_provider')
+    auth=permission_auth('provider.view_provider')
 )
+@conditional(Provider)
 def provider(
-    request: HttpRequest, provider_id: str, lang: LanguageCode | None = None
-) -> ProviderSchema:
+    request: HttpRequest,
+    provider_id: str,
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
     """
     Get the provider with the given ID, return translatable fields in the given language.
 
@@ -93,28 +157,51 @@ def provider(
           are ignored (Example: "de;q=0.7, rm;q=0.8" --> "de")
         - Subtags in the header are ignored. So "en-US" is interpreted as "en".
         - Wildcards ("*") are ignored.
+
+    The response can be restricted to some of the fields by passing a comma separated list, for
+    example "fields=id,name". Only the columns needed for these fields are loaded.
     """
-    model = get_object_or_404(Provider, provider_id=provider_id)
-    lang_to_use = get_language(lang, request.headers)
-    response = provider_to_response(model, lang_to_use)
-    return response
+    return PROVIDERS.get(request, lang, fields, provider_id=provider_id)
 
 
 @router.get(
     "/providers",
     response={200: ProviderListSchema},
     exclude_none=True,
-    auth=PermissionAuth('provider.view_provider')
+    auth=permission_auth('provider.view_provider')
 )
-def providers(request: HttpRequest, lang: LanguageCode | None = None) -> ProviderListSchema:
+@conditional(Provider)
+@cached(Provider)
+def providers(
+    request: HttpRequest,
+    pagination: Query[PaginationParams],
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+    ids: str | None = None,
+    updated_since: datetime | None = None,
+) -> HttpResponse | StreamingHttpResponse:
     """
     Get all providers, return translatable fields in the given language.
 
     For more details on how individual providers are returned, see the
     corresponding endpoint for a specific provider.
-    """
-    models = Provider.objects.order_by("id").all()
-    lang_to_use = get_language(lang, request.headers)
 
-    schemas = [provider_to_response(model, lang_to_use) for model in models]
-    return ProviderListSchema(items=schemas)
+    The result can be paginated by passing a "limit". If there are more results, the response
+    contains the URL of the next page in "next". Without a limit or cursor, all providers are
+    returned at once.
+
+    The response can be restricted to some of the fields, see the endpoint for a specific
+    provider.
+
+    Specific providers can be requested by passing a comma separated list of IDs, for example
+    "ids=ch.bafu,ch.swisstopo". They are returned in the given order, IDs without a provider are
+    listed in "missing". See also the POST variant for long lists.
+
+    Only the providers changed since a given time can be requested by passing an ISO 8601
+    timestamp, for example "updated_since=2025-01-31T12:00:00Z". The first page then also lists
+    the IDs of the providers deleted since that time in "deleted". Timestamps older than the
+    retention period of deletions are rejected with 410 (Gone), a full sync is required then.
+    """
+    return PROVIDERS.get_list(
+        request, pagination, lang, fields, ids=ids, updated_since=updated_since
+    )
@@ -0,0 +1,80 @@
+from datetime import datetime
+from inspect import getdoc
+
+from ninja import Query
+from ninja import Router
+from schemas import BatchSchema
+from schemas import PaginationParams
+from utils.authentication import permission_auth
+from utils.conditional import conditional
+from utils.language import LanguageCode
+from utils.response_cache import cached
+
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+
+from . import api
+from .api import PROVIDERS
+from .models import Provider
+from .schemas import ProviderListSchema
+from .schemas import ProviderSchema
+
+# Async versions of the operations of `provider.api`, served in ASGI mode (see `config.asgi`)
+router = Router()
+
+
+# Registered before the detail endpoint, so that "batch" is not taken for an ID
+@router.post(
+    "/providers/batch",
+    response={200: ProviderListSchema},
+    exclude_none=True,
+    auth=permission_auth('provider.view_provider'),
+    description=getdoc(api.providers_batch),
+)
+async def providers_batch(
+    request: HttpRequest,
+    batch: BatchSchema,
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
+    return await PROVIDERS.abatch(request, batch.ids, lang, fields)
+
+
+@router.get(
+    "/providers/{provider_id}",
+    response={200: ProviderSchema},
+    exclude_none=True,
+    auth=permission_auth('provider.view_provider'),
+    description=getdoc(api.provider),
+)
+@conditional(Provider)
+async def provider(
+    request: HttpRequest,
+    provider_id: str,
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+) -> HttpResponse:
+    return await PROVIDERS.aget(request, lang, fields, provider_id=provider_id)
+
+
+@router.get(
+    "/providers",
+    response={200: ProviderListSchema},
+    exclude_none=True,
+    auth=permission_auth('provider.view_provider'),
+    description=getdoc(api.providers),
+)
+@conditional(Provider)
+@cached(Provider)
+async def providers(
+    request: HttpRequest,
+    pagination: Query[PaginationParams],
+    lang: LanguageCode | None = None,
+    fields: str | None = None,
+    ids: str | None = None,
+    updated_since: datetime | None = None,
+) -> HttpResponse | StreamingHttpResponse:
+    return await PROVIDERS.aget_list(
+        request, pagination, lang, fields, ids=ids, updated_since=updated_since
+    )
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.14 on 2026-10-18 06:49
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('provider', '0010_provider_created_provider_updated'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='provider',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Updated'),
+        ),
+    ]
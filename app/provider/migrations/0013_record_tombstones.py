@@ -0,0 +1,15 @@
+from utils.tombstones import record_deletions
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('provider', '0012_legacy_fingerprint'),
+        ('support', '0003_record_tombstones'),
+    ]
+
+    operations = [
+        record_deletions("provider_provider", "provider.Provider", "provider_id"),
+    ]
@@ -23,7 +23,7 @@ class Provider(models.Model):
         _(_context, "External ID"), max_length=100, unique=True, db_index=True
     )
     created = models.DateTimeField(_(_context, "Created"), auto_now_add=True)
-    updated = models.DateTimeField(_(_context, "Updated"), auto_now=True)
+    updated = models.DateTimeField(_(_context, "Updated"), auto_now=True, db_index=True)
 
     name_de = models.CharField(_(_context, "Name (German)"))
     name_fr = models.CharField(_(_context, "Name (French)"))
@@ -44,6 +44,13 @@ class Provider(models.Model):
         db_index=False,
         help_text="This field is used to track objects imported from the BOD"
     )
+    _legacy_fingerprint = models.CharField(
+        _(_context, "Legacy Fingerprint"),
+        max_length=64,
+        null=True,
+        blank=True,
+        help_text="This field is used to detect changes of objects imported from the BOD"
+    )
 
     def save(
         self,
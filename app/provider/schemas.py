@@ -12,3 +12,6 @@ class ProviderSchema(Schema):
 
 class ProviderListSchema(Schema):
     items: list[ProviderSchema]
+    next: str | None = None
+    deleted: list[str] | None = None
+    missing: list[str] | None = None
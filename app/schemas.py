@@ -1,5 +1,8 @@
+from ninja import Field
 from ninja import Schema
 
+from django.conf import settings
+
 
 class TranslationsSchema(Schema):
     de: str
@@ -7,3 +10,12 @@ class TranslationsSchema(Schema):
     en: str
     it: str | None
     rm: str | None
+
+
+class PaginationParams(Schema):
+    limit: int | None = Field(None, ge=1, le=settings.API_PAGINATION_MAX_LIMIT)
+    cursor: str | None = None
+
+
+class BatchSchema(Schema):
+    ids: list[str]
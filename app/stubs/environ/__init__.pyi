@@ -34,3 +34,6 @@ class Env:
 
     def dict(self, var, cast=..., default=...) -> Dict[builtins.str, builtins.str | builtins.int]:
         ...
+
+    def cache_url(self, var: builtins.str = ..., default=..., backend=...) -> Dict[builtins.str, Incomplete]:
+        ...
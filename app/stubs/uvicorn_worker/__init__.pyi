@@ -0,0 +1,6 @@
+from typing import Any
+
+from gunicorn.workers.base import Worker
+
+class UvicornWorker(Worker):
+    CONFIG_KWARGS: dict[str, Any]
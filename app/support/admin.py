@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.http import HttpRequest
+
+from .models import ApiToken
+
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):  # type:ignore[type-arg]
+    '''Admin View for API tokens
+
+    Tokens are created with the management command `create_api_token`, as the key is only shown
+    once.
+    '''
+
+    list_display = ('name', 'user', 'prefix', 'created', 'expires')
+    readonly_fields = ('prefix', 'created')
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
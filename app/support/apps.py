@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class SupportConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'support'
+
+    def ready(self) -> None:
+        # pylint: disable=import-outside-toplevel
+        from utils.authentication import invalidate_permissions_on_change
+        from utils.authentication import invalidate_tokens_on_change
+        from utils.database_pool import register_pool_metrics
+
+        invalidate_permissions_on_change()
+        invalidate_tokens_on_change()
+        register_pool_metrics()
@@ -0,0 +1,104 @@
+from importlib import import_module
+from time import perf_counter
+from typing import Any
+from typing import Callable
+
+from support.models import ApiToken
+from utils.authentication import PermissionAuth
+from utils.authentication import TokenAuth
+from utils.command import CustomBaseCommand
+from utils.response_cache import is_shared_cache
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth import HASH_SESSION_KEY
+from django.contrib.auth import SESSION_KEY
+from django.contrib.auth import get_user
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.management.base import CommandParser
+from django.db import connection
+from django.db import transaction
+from django.http import HttpRequest
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils.functional import SimpleLazyObject
+
+
+class Command(CustomBaseCommand):
+    """Measure the cost of authenticating API requests with sessions and with API tokens
+
+    A temporary user with a session and a token is created, everything is rolled back at the end.
+    Both authentications are warmed up first, so the steady state of a client sending many
+    requests is measured.
+    """
+
+    help = "Measures the per-request cost of session and API token authentication"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=1000,
+            help="Number of authenticated requests per authentication",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not is_shared_cache():
+            self.print_warning(
+                "Permissions and tokens are not cached, as the \"api\" cache is not shared "
+                "by all processes (API_CACHE_URL)"
+            )
+        with transaction.atomic():
+            self.benchmark(options["requests"])
+            transaction.set_rollback(True)
+
+    def benchmark(self, count: int) -> None:
+        user = get_user_model().objects.create_user(username="authentication-benchmark")
+        user.user_permissions.add(
+            Permission.objects.get(content_type__app_label="provider", codename="view_provider")
+        )
+        _, key = ApiToken.create_token(user=user, name="authentication-benchmark")
+
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+
+        factory = RequestFactory()
+
+        def session_request() -> HttpRequest:
+            factory.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+            request = factory.get("/api/v1/providers")
+            request.session = import_module(settings.SESSION_ENGINE
+                                           ).SessionStore(session.session_key)
+            request.user = SimpleLazyObject(lambda: get_user(request))  # type: ignore[assignment]
+            return request
+
+        def token_request() -> HttpRequest:
+            return factory.get("/api/v1/providers", HTTP_AUTHORIZATION=f"Bearer {key}")
+
+        authentications: list[tuple[str, Callable[[HttpRequest], Any], Callable[[], HttpRequest]]]
+        authentications = [
+            ("session", PermissionAuth("provider.view_provider"), session_request),
+            ("token", TokenAuth("provider.view_provider"), token_request),
+        ]
+        for name, authenticate, build_request in authentications:
+            if authenticate(build_request()) is None:
+                self.print_error("The %s authentication failed", name)
+                return
+
+            requests = [build_request() for _ in range(count)]
+            with CaptureQueriesContext(connection) as context:
+                start = perf_counter()
+                for request in requests:
+                    authenticate(request)
+                duration = perf_counter() - start
+            self.print_success(
+                "%s: %.1f µs and %.1f queries per request",
+                name,
+                duration / count * 1e6,
+                len(context.captured_queries) / count,
+            )
@@ -0,0 +1,42 @@
+from datetime import timedelta
+from typing import Any
+
+from support.models import ApiToken
+from utils.command import CustomBaseCommand
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandParser
+from django.utils import timezone
+
+
+class Command(CustomBaseCommand):
+    """Create an API token for a service account
+
+    The key of the token is printed once, only its digest is stored. The permissions of the token
+    are the ones of the given user.
+    """
+
+    help = "Create an API token for the given user and print its key"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        super().add_arguments(parser)
+        parser.add_argument("username", type=str, help="User the token authenticates")
+        parser.add_argument("name", type=str, help="Name of the token, e.g. the client using it")
+        parser.add_argument(
+            "--expires-in-days",
+            type=int,
+            default=None,
+            help="Number of days after which the token expires, it never does if not given",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        user = get_user_model().objects.filter(username=options["username"]).first()
+        if user is None:
+            self.print_error("User %s does not exist", options["username"])
+            return
+
+        expires = None
+        if options["expires_in_days"] is not None:
+            expires = timezone.now() + timedelta(days=options["expires_in_days"])
+        token, key = ApiToken.create_token(user=user, name=options["name"], expires=expires)
+        self.print_success("Created the token %s, its key is: %s", token, key)
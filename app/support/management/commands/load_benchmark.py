@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+from threading import local
+from time import perf_counter
+from typing import Any
+
+import requests
+from utils.command import CustomBaseCommand
+
+from django.core.management.base import CommandParser
+
+
+def percentile(durations: list[float], percent: float) -> float:
+    """
+    Return the given percentile of the given (sorted) durations.
+    """
+    return durations[max(ceil(len(durations) * percent / 100) - 1, 0)]
+
+
+class Command(CustomBaseCommand):
+    """Measure the throughput and the latency of a running server under concurrent load
+
+    Used to compare the deployment modes, e.g. start `wsgi.py` once with gevent workers (the
+    default) and once with `SERVER_MODE=asgi`, and run this command against both with the same
+    options. The requests are sent from a pool of threads, each with its own keep-alive
+    connection.
+    """
+
+    help = "Sends concurrent requests to a running server and reports throughput and latencies"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        super().add_arguments(parser)
+        parser.add_argument("url", type=str, help="URL requested, e.g. of an API endpoint")
+        parser.add_argument(
+            "--token",
+            type=str,
+            default=None,
+            help="Key of an API token sent as bearer token",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Number of requests sent at the same time",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Total number of requests",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        headers = {}
+        if options["token"]:
+            headers["Authorization"] = f"Bearer {options['token']}"
+        sessions = local()
+
+        def send(_: int) -> tuple[float, bool]:
+            if not hasattr(sessions, "session"):
+                sessions.session = requests.Session()
+                sessions.session.headers.update(headers)
+            start = perf_counter()
+            response = sessions.session.get(options["url"], timeout=60)
+            return perf_counter() - start, response.status_code == 200
+
+        concurrency = options["concurrency"]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # Warm up the connections and the caches of the server
+            list(executor.map(send, range(concurrency)))
+
+            start = perf_counter()
+            results = list(executor.map(send, range(options["requests"])))
+            duration = perf_counter() - start
+
+        durations = sorted(duration for duration, _ in results)
+        errors = sum(1 for _, success in results if not success)
+        self.print_success(
+            "%d requests with %d errors: %.0f requests/s, p50 %.1f ms, p99 %.1f ms",
+            len(results),
+            errors,
+            len(results) / duration,
+            percentile(durations, 50) * 1000,
+            percentile(durations, 99) * 1000,
+        )
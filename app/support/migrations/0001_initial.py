@@ -0,0 +1,33 @@
+# Generated by Django 5.2.14 on 2026-10-18 06:49
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    )
+                ),
+                ('model', models.CharField(max_length=100, verbose_name='Model')),
+                ('object_id', models.CharField(max_length=100, verbose_name='External ID')),
+                ('deleted', models.DateTimeField(auto_now_add=True, verbose_name='Deleted')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['model', 'deleted'], name='support_tom_model_ec77e4_idx')
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.14 on 2026-10-18 07:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApiToken',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                    )
+                ),
+                ('name', models.CharField(max_length=100, verbose_name='Name')),
+                ('prefix', models.CharField(editable=False, max_length=8, verbose_name='Prefix')),
+                (
+                    'digest',
+                    models.CharField(
+                        editable=False, max_length=64, unique=True, verbose_name='Digest'
+                    )
+                ),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+                ('expires', models.DateTimeField(blank=True, null=True, verbose_name='Expires')),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='api_tokens',
+                        to=settings.AUTH_USER_MODEL
+                    )
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('support', '0002_apitoken'),
+    ]
+
+    operations = [
+        # Trigger function recording the tombstones of all rows deleted by a DELETE statement,
+        # called with the label of the model and the (external) key column as arguments.
+        migrations.RunSQL(
+            """
+            CREATE FUNCTION record_tombstones() RETURNS trigger LANGUAGE plpgsql AS $$
+            BEGIN
+                EXECUTE format(
+                    'INSERT INTO support_tombstone (model, object_id, deleted) '
+                    'SELECT %L, %I, clock_timestamp() FROM deleted_rows',
+                    TG_ARGV[0], TG_ARGV[1]
+                );
+                RETURN NULL;
+            END
+            $$
+            """,
+            "DROP FUNCTION record_tombstones()",
+        ),
+    ]
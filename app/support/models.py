@@ -0,0 +1,64 @@
+from hashlib import sha256
+from secrets import token_urlsafe
+from typing import Any
+
+from django.conf import settings
+from django.db import models
+from django.utils.translation import pgettext_lazy as _
+
+
+class Tombstone(models.Model):
+    """
+    Records the deletion of an object, so that deletions can be synced incrementally.
+
+    Tombstones are recorded by database triggers, see `utils.tombstones.record_deletions`.
+    """
+
+    _context = "Tombstone model"
+
+    class Meta:
+        indexes = [models.Index(fields=["model", "deleted"])]
+
+    def __str__(self) -> str:
+        return f"{self.model} {self.object_id}"
+
+    model = models.CharField(_(_context, "Model"), max_length=100)
+    object_id = models.CharField(_(_context, "External ID"), max_length=100)
+    deleted = models.DateTimeField(_(_context, "Deleted"), auto_now_add=True)
+
+
+def hash_token(key: str) -> str:
+    return sha256(key.encode()).hexdigest()
+
+
+class ApiToken(models.Model):
+    """
+    A token authenticating a service account (a Django user) with the API.
+
+    Only the SHA-256 digest of the key is stored. As keys are random with 256 bits of entropy, a
+    fast hash is sufficient and allows looking up the token by the digest. The key is only known
+    when the token is created (see `create_token`).
+    """
+
+    _context = "API token model"
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.prefix}...)"
+
+    name = models.CharField(_(_context, "Name"), max_length=100)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="api_tokens"
+    )
+    prefix = models.CharField(_(_context, "Prefix"), max_length=8, editable=False)
+    digest = models.CharField(_(_context, "Digest"), max_length=64, unique=True, editable=False)
+    created = models.DateTimeField(_(_context, "Created"), auto_now_add=True)
+    expires = models.DateTimeField(_(_context, "Expires"), null=True, blank=True)
+
+    @classmethod
+    def create_token(cls, **kwargs: Any) -> tuple["ApiToken", str]:
+        """
+        Create a token with the given attributes and return it along with its key.
+        """
+        key = token_urlsafe(32)
+        token = cls.objects.create(prefix=key[:8], digest=hash_token(key), **kwargs)
+        return token, key
@@ -1,3 +1,4 @@
+import json
 from unittest.mock import patch
 
 from access.api import user_to_response
@@ -6,6 +7,13 @@ from access.schemas import UserSchema
 from botocore.exceptions import EndpointConnectionError
 from pytest import fixture
 
+from django.utils import timezone
+
+# Queries per request: session, user, user permissions, group permissions, the fingerprint for
+# conditional requests and the data itself
+QUERY_BUDGET_USER = 6
+QUERY_BUDGET_USERS = 6
+
 
 @fixture(name='user')
 def fixture_user(provider):
@@ -608,3 +616,143 @@ def test_update_user_returns_503_and_leaves_user_as_is_if_cognito_down(
     user_after = User.objects.filter(username="dude").first()
     assert user_after == user_before
     assert cognito_client.return_value.update_user.called
+
+
+def test_get_user_stays_within_query_budget(
+    user, django_user_factory, client, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('access', 'user', 'view_user')])
+    client.login(username='test', password='test')
+
+    with django_assert_max_num_queries(QUERY_BUDGET_USER):
+        response = client.get("/api/v1/users/dude")
+
+    assert response.status_code == 200
+
+
+@patch('access.models.Client')
+def test_get_users_stays_within_query_budget_regardless_of_row_count(
+    cognito_client, user, django_user_factory, client, django_assert_max_num_queries
+):
+    cognito_client.return_value.create_user.return_value = True
+
+    django_user_factory('test', 'test', [('access', 'user', 'view_user')])
+    client.login(username='test', password='test')
+
+    for index in range(10):
+        User.objects.create(
+            username=f"user{index}",
+            first_name=f"First{index}",
+            last_name=f"Last{index}",
+            email=f"user{index}@bowling.com",
+            provider=user.provider,
+        )
+
+    with django_assert_max_num_queries(QUERY_BUDGET_USERS):
+        response = client.get("/api/v1/users")
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 11
+
+
+@patch('access.models.Client')
+def test_get_users_returns_pages_with_next_link_if_limit_given(
+    cognito_client, user, django_user_factory, client
+):
+    cognito_client.return_value.create_user.return_value = True
+
+    django_user_factory('test', 'test', [('access', 'user', 'view_user')])
+    client.login(username='test', password='test')
+
+    User.objects.create(
+        username="veteran",
+        first_name="Walter",
+        last_name="Sobchak",
+        email="veteran@bowling.com",
+        provider=user.provider,
+    )
+
+    response = client.get("/api/v1/users?limit=1")
+
+    assert response.status_code == 200
+    assert [item["username"] for item in response.json()["items"]] == ["dude"]
+
+    response = client.get(response.json()["next"])
+
+    assert response.status_code == 200
+    assert [item["username"] for item in response.json()["items"]] == ["veteran"]
+    assert "next" not in response.json()
+
+
+def test_get_users_returns_304_if_etag_matches(user, django_user_factory, client):
+    django_user_factory('test', 'test', [('access', 'user', 'view_user')])
+    client.login(username='test', password='test')
+    etag = client.get("/api/v1/users").headers["ETag"]
+
+    response = client.get("/api/v1/users", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+
+
+def test_get_users_streams_same_response_if_streaming_enabled(
+    user, django_user_factory, client, settings
+):
+    django_user_factory('test', 'test', [('access', 'user', 'view_user')])
+    client.login(username='test', password='test')
+
+    settings.API_STREAM_LIST_RESPONSES = True
+    response = client.get("/api/v1/users")
+
+    assert response.status_code == 200
+    assert response.streaming
+    streamed = json.loads(b"".join(response.streaming_content))
+
+    settings.API_STREAM_LIST_RESPONSES = False
+    assert streamed == client.get("/api/v1/users").json()
+
+
+def test_get_users_returns_only_requested_fields(user, django_user_factory, client):
+    django_user_factory('test', 'test', [('access', 'user', 'view_user')])
+    client.login(username='test', password='test')
+
+    response = client.get("/api/v1/users?fields=username,provider_id")
+
+    assert response.status_code == 200
+    assert response.json() == {"items": [{"username": "dude", "provider_id": "ch.bafu"}]}
+
+
+@patch('access.models.Client')
+def test_get_users_returns_changes_and_deletions_since_given_time(
+    cognito_client, user, django_user_factory, client
+):
+    cognito_client.return_value.create_user.return_value = True
+    cognito_client.return_value.disable_user.return_value = True
+    cognito_client.return_value.delete_user.return_value = True
+    django_user_factory('test', 'test', [('access', 'user', 'view_user')])
+    client.login(username='test', password='test')
+    deleted = User.objects.create(
+        username="veteran",
+        first_name="Walter",
+        last_name="Sobchak",
+        email="veteran@bowling.com",
+        provider=user.provider,
+    )
+    since = timezone.now()
+
+    deleted.delete()
+    user.disable()
+    User.objects.create(
+        username="donny",
+        first_name="Theodore Donald",
+        last_name="Kerabatsos",
+        email="donny@bowling.com",
+        provider=user.provider,
+    )
+    response = client.get(
+        "/api/v1/users", {
+            "fields": "username", "updated_since": since.isoformat()
+        }
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"items": [{"username": "donny"}], "deleted": ["veteran", "dude"]}
@@ -2,10 +2,12 @@ from unittest.mock import call
 from unittest.mock import patch
 
 from access.models import CognitoInconsistencyError
+from access.models import CognitoOperation
 from access.models import User
 from pytest import raises
 
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.forms import ModelForm
 from django.utils import timezone
 
@@ -331,3 +333,48 @@ def test_form_invalid_for_user_with_invalid_email(client, provider):
     form = UserForm(data)
 
     assert not form.is_valid()
+
+
+@patch('access.models.Client')
+def test_user_changes_written_to_outbox_with_cognito_outbox(client, provider, settings):
+    settings.COGNITO_OUTBOX = True
+
+    user = User.objects.create(
+        user_id="2ihg2ox304po",
+        username="dude",
+        first_name="Jeffrey",
+        last_name="Lebowski",
+        email="dude@bowling.com",
+        provider=provider,
+    )
+    user.email = "jeffrey.lebowski@bowling.com"
+    user.save()
+    user.disable()
+    user.delete()
+
+    assert not client.called
+    operations = CognitoOperation.objects.order_by("id")
+    assert [(operation.type, operation.user_id, operation.email) for operation in operations] == [
+        ("create", "2ihg2ox304po", "dude@bowling.com"),
+        ("update", "2ihg2ox304po", "jeffrey.lebowski@bowling.com"),
+        ("disable", "2ihg2ox304po", "jeffrey.lebowski@bowling.com"),
+        ("delete", "2ihg2ox304po", "jeffrey.lebowski@bowling.com"),
+    ]
+
+
+def test_user_outbox_rolled_back_with_user(provider, settings):
+    settings.COGNITO_OUTBOX = True
+
+    with raises(RuntimeError):
+        with transaction.atomic():
+            User.objects.create(
+                username="dude",
+                first_name="Jeffrey",
+                last_name="Lebowski",
+                email="dude@bowling.com",
+                provider=provider,
+            )
+            raise RuntimeError()
+
+    assert User.objects.count() == 0
+    assert CognitoOperation.objects.count() == 0
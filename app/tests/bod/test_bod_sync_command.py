@@ -1,4 +1,5 @@
 from io import StringIO
+from unittest.mock import patch
 
 from bod.models import BodContactOrganisation
 from bod.models import BodDataset
@@ -8,8 +9,12 @@ from distributions.models import Attribution
 from distributions.models import Dataset
 from provider.models import Provider
 from pytest import fixture
+from pytest import mark
+from pytest import raises
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 
 
 @fixture(name='bod_translation')
@@ -78,10 +83,17 @@ def fixture_bod_geocat_publish_missing_english(bod_dataset):
     )
 
 
-def test_command_imports(bod_geocat_publish):
+@mark.parametrize("engine", ["orm", "merge"])
+def test_command_imports(bod_geocat_publish, engine):
     out = StringIO()
     call_command(
-        "bod_sync", providers=True, attributions=True, datasets=True, verbosity=2, stdout=out
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        verbosity=2,
+        stdout=out
     )
     assert "Added provider 'Federal Office for the Environment'" in out.getvalue()
     assert "1 provider(s) added" in out.getvalue()
@@ -421,7 +433,8 @@ def test_command_skips_non_prod_datasets(bod_dataset, bod_geocat_publish):
 
 
 #pylint: disable=too-many-statements
-def test_command_updates(bod_contact_organisation, bod_dataset, bod_geocat_publish):
+@mark.parametrize("engine", ["orm", "merge"])
+def test_command_updates(bod_contact_organisation, bod_dataset, bod_geocat_publish, engine):
     # Add objects that will be updated
     provider = Provider.objects.create(
         provider_id="ch.bafu",
@@ -460,7 +473,13 @@ def test_command_updates(bod_contact_organisation, bod_dataset, bod_geocat_publi
 
     out = StringIO()
     call_command(
-        "bod_sync", providers=True, attributions=True, datasets=True, verbosity=2, stdout=out
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        verbosity=2,
+        stdout=out
     )
     assert f"Changed Provider {provider.id} name_de" in out.getvalue()
     assert f"Changed Provider {provider.id} acronym_de" not in out.getvalue()
@@ -468,7 +487,9 @@ def test_command_updates(bod_contact_organisation, bod_dataset, bod_geocat_publi
     assert f"Changed Attribution {attribution.id} name_de" in out.getvalue()
     assert f"Changed Attribution {attribution.id} description_de" not in out.getvalue()
     assert "1 attribution(s) updated" in out.getvalue()
-    assert f"Changed Dataset {dataset.id} dataset_id" in out.getvalue()
+    assert (
+        f"Changed Dataset {dataset.id} dataset_id from 'xxx' to 'ch.bafu.auen-vegetationskarten'"
+    ) in out.getvalue()
     assert "1 dataset(s) updated" in out.getvalue()
     assert Provider.objects.count() == 1
     assert Attribution.objects.count() == 1
@@ -660,7 +681,8 @@ def test_command_removes_orphaned_attribution(bod_contact_organisation):
     assert {'BAFU'} == set(Attribution.objects.values_list('name_de', flat=True))
 
 
-def test_command_removes_orphaned_dataset(bod_contact_organisation):
+@mark.parametrize("engine", ["orm", "merge"])
+def test_command_removes_orphaned_dataset(bod_contact_organisation, engine):
     # Add objects which will not be removed
     provider = Provider.objects.create(
         provider_id="ch.xxx",
@@ -701,7 +723,13 @@ def test_command_removes_orphaned_dataset(bod_contact_organisation):
 
     out = StringIO()
     call_command(
-        "bod_sync", providers=True, attributions=True, datasets=True, verbosity=2, stdout=out
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        verbosity=2,
+        stdout=out
     )
     assert "provider(s) removed" not in out.getvalue()
     assert "attribution(s) removed" not in out.getvalue()
@@ -785,3 +813,362 @@ def test_command_clears_existing_data(bod_geocat_publish):
 
     dataset = provider.dataset_set.first()
     assert dataset.dataset_id == "ch.bafu.auen-vegetationskarten"
+
+
+def create_bod_rows(count):
+    for index in range(count):
+        BodTranslations.objects.create(msg_id=f"ch.org{index}", de=f"ORG{index}")
+        BodContactOrganisation.objects.create(
+            pk_contactorganisation_id=index + 1,
+            name_de=f"Organisation {index}",
+            name_fr=f"Organisation {index}",
+            name_en=f"Organisation {index}",
+            abkuerzung_de=f"ORG{index}",
+            abkuerzung_fr=f"ORG{index}",
+            abkuerzung_en=f"ORG{index}",
+            attribution=f"ch.org{index}"
+        )
+        BodDataset.objects.create(
+            id=index + 1,
+            id_dataset=f"ch.org{index}.dataset",
+            fk_geocat=f"geocat-{index}",
+            fk_contactorganisation_id=index + 1,
+            staging="prod"
+        )
+        BodGeocatPublish.objects.create(
+            bgdi_id=index + 1,
+            fk_id_dataset=f"ch.org{index}.dataset",
+            bezeichnung_de=f"Datensatz {index}",
+            bezeichnung_fr=f"Jeu de données {index}",
+            abstract_de=f"Beschreibung {index}",
+            abstract_fr=f"Description {index}",
+        )
+
+
+@mark.parametrize("engine", ["orm", "merge"])
+def test_command_queries_do_not_depend_on_number_of_rows(db, django_assert_max_num_queries, engine):
+    create_bod_rows(30)
+
+    with django_assert_max_num_queries(40):
+        call_command(
+            "bod_sync",
+            providers=True,
+            attributions=True,
+            datasets=True,
+            engine=engine,
+            stdout=StringIO()
+        )
+    assert Provider.objects.count() == 30
+    assert Attribution.objects.count() == 30
+    assert Dataset.objects.count() == 30
+
+    BodGeocatPublish.objects.filter(bgdi_id__lte=10).update(bezeichnung_de="Changed")
+    out = StringIO()
+    with django_assert_max_num_queries(40):
+        call_command(
+            "bod_sync", providers=True, attributions=True, datasets=True, engine=engine, stdout=out
+        )
+    assert "10 dataset(s) updated" in out.getvalue()
+    assert Dataset.objects.filter(title_de="Changed").count() == 10
+
+
+@mark.parametrize("engine", ["orm", "merge"])
+def test_command_sets_updated_of_changed_models_only(bod_geocat_publish, engine):
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        stdout=StringIO()
+    )
+    unchanged = Provider.objects.get().updated
+    before = Dataset.objects.get().updated
+
+    bod_geocat_publish.bezeichnung_de = "Changed"
+    bod_geocat_publish.save()
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        stdout=StringIO()
+    )
+
+    assert Provider.objects.get().updated == unchanged
+    assert Dataset.objects.get().updated > before
+
+
+@mark.parametrize("engine", ["orm", "merge"])
+def test_command_skips_dataset_with_existing_geocat_id(bod_geocat_publish, engine):
+    provider = Provider.objects.create(
+        provider_id="ch.yyy",
+        name_de="YYY",
+        name_fr="YYY",
+        name_en="YYY",
+        acronym_de="YYY",
+        acronym_fr="YYY",
+        acronym_en="YYY",
+    )
+    attribution = Attribution.objects.create(
+        attribution_id="ch.yyy",
+        name_de="YYY",
+        name_fr="YYY",
+        name_en="YYY",
+        description_de="YYY",
+        description_fr="YYY",
+        description_en="YYY",
+        provider=provider
+    )
+    Dataset.objects.create(
+        dataset_id="yyyy",
+        geocat_id="ab76361f-657d-4705-9053-95f89ecab126",
+        title_de="yyyy",
+        title_fr="yyyy",
+        title_en="yyyy",
+        description_de="yyyy",
+        description_fr="yyyy",
+        description_en="yyyy",
+        provider=provider,
+        attribution=attribution
+    )
+
+    out = StringIO()
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        verbosity=2,
+        stdout=out
+    )
+    assert (
+        "Creating dataset 'ch.bafu.auen-vegetationskarten' failed: "
+        "{'geocat_id': ['Dataset with this Geocat ID already exists.']}"
+    ) in out.getvalue()
+    assert "dataset(s) added" not in out.getvalue()
+    assert Dataset.objects.count() == 1
+
+
+@mark.parametrize("engine", ["orm", "merge"])
+def test_command_skips_datasets_with_same_geocat_id(bod_geocat_publish, engine):
+    BodDataset.objects.create(
+        id=171,
+        id_dataset="ch.bafu.auen-vegetationskarten-kopie",
+        fk_geocat="ab76361f-657d-4705-9053-95f89ecab126",
+        fk_contactorganisation_id=17,
+        staging="prod"
+    )
+
+    out = StringIO()
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        verbosity=2,
+        stdout=out
+    )
+    assert (
+        "Creating dataset 'ch.bafu.auen-vegetationskarten-kopie' failed: "
+        "{'geocat_id': ['Dataset with this Geocat ID already exists.']}"
+    ) in out.getvalue()
+    assert "1 dataset(s) added" in out.getvalue()
+    assert Dataset.objects.get().dataset_id == "ch.bafu.auen-vegetationskarten"
+
+
+def test_command_adds_dataset_taking_over_id_of_renamed_dataset(bod_geocat_publish, bod_dataset):
+    call_command("bod_sync", providers=True, attributions=True, datasets=True, stdout=StringIO())
+    bod_dataset.id_dataset = "ch.bafu.auen-vegetationskarten-alt"
+    bod_dataset.save()
+    BodDataset.objects.create(
+        id=171,
+        id_dataset="ch.bafu.auen-vegetationskarten",
+        fk_geocat="cb0f8401-c49a-4bdf-aff6-40a7015ba43a",
+        fk_contactorganisation_id=bod_dataset.fk_contactorganisation_id,
+        staging="prod"
+    )
+
+    out = StringIO()
+    call_command(
+        "bod_sync", providers=True, attributions=True, datasets=True, verbosity=2, stdout=out
+    )
+    assert "1 dataset(s) added" in out.getvalue()
+    assert "1 dataset(s) updated" in out.getvalue()
+    assert dict(Dataset.objects.values_list("_legacy_id", "dataset_id")) == {
+        170: "ch.bafu.auen-vegetationskarten-alt",
+        171: "ch.bafu.auen-vegetationskarten",
+    }
+
+
+@mark.parametrize("engine", ["orm", "merge"])
+def test_command_skips_unchanged_rows(bod_geocat_publish, engine, django_assert_max_num_queries):
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        stdout=StringIO(),
+    )
+    assert Dataset.objects.get()._legacy_fingerprint
+
+    out = StringIO()
+    # Reading the BOD tables (with server-side cursors) and the fingerprints, deleting the orphans
+    # and purging the expired tombstones
+    with django_assert_max_num_queries(22):
+        call_command(
+            "bod_sync",
+            providers=True,
+            attributions=True,
+            datasets=True,
+            engine=engine,
+            stdout=out,
+        )
+    assert "nothing to be done, already in sync" in out.getvalue()
+
+
+@mark.parametrize("engine", ["orm", "merge"])
+def test_command_sets_missing_fingerprints(bod_geocat_publish, engine):
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        stdout=StringIO(),
+    )
+    fingerprint = Dataset.objects.get()._legacy_fingerprint
+    updated = Dataset.objects.get().updated
+    Dataset.objects.update(_legacy_fingerprint=None)
+
+    out = StringIO()
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        stdout=out,
+    )
+    assert "nothing to be done, already in sync" in out.getvalue()
+    assert Dataset.objects.get()._legacy_fingerprint == fingerprint
+    assert Dataset.objects.get().updated == updated
+
+
+@mark.parametrize("engine", ["orm", "merge"])
+def test_command_restores_locally_edited_rows(bod_geocat_publish, engine):
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        stdout=StringIO(),
+    )
+    dataset = Dataset.objects.get()
+    title = dataset.title_de
+    dataset.title_de = "Edited"
+    dataset.save()
+
+    out = StringIO()
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        verbosity=2,
+        stdout=out,
+    )
+    assert "1 dataset(s) updated" in out.getvalue()
+    assert Dataset.objects.get().title_de == title
+
+
+@mark.parametrize("engine", ["orm", "merge"])
+@patch("utils.chunks.bump_version_on_commit")
+def test_command_commits_in_chunks(bump_version_on_commit, db, engine):
+    create_bod_rows(5)
+
+    out = StringIO()
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        commit_every=2,
+        stdout=out,
+    )
+    assert "5 provider(s) added" in out.getvalue()
+    assert "5 attribution(s) added" in out.getvalue()
+    assert "5 dataset(s) added" in out.getvalue()
+    # Three chunks per model
+    assert bump_version_on_commit.call_count == 9
+
+
+def test_command_resumes_interrupted_import(transactional_db):
+    create_bod_rows(4)
+
+    # Interrupt the import while committing the second chunk of datasets
+    with patch(
+        "utils.chunks.bump_version_on_commit",
+        side_effect=[None, None, None, None, None, RuntimeError("interrupted")]
+    ):
+        with raises(RuntimeError):
+            call_command(
+                "bod_sync",
+                providers=True,
+                attributions=True,
+                datasets=True,
+                commit_every=2,
+                stdout=StringIO(),
+            )
+    # The chunks were actually committed, not only released as savepoints
+    assert not connection.in_atomic_block
+    assert Provider.objects.count() == 4
+    assert Attribution.objects.count() == 4
+    assert Dataset.objects.count() == 2
+
+    out = StringIO()
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        commit_every=2,
+        stdout=out,
+    )
+    assert "2 dataset(s) added" in out.getvalue()
+    assert "provider(s)" not in out.getvalue()
+    assert "attribution(s)" not in out.getvalue()
+    assert Dataset.objects.count() == 4
+
+
+def test_command_does_not_commit_in_chunks_if_dry_run(db):
+    with raises(CommandError):
+        call_command("bod_sync", providers=True, dry_run=True, commit_every=2, stdout=StringIO())
+
+
+@mark.parametrize("engine", ["orm", "merge"])
+def test_command_reads_bod_in_chunks(db, engine):
+    create_bod_rows(5)
+
+    out = StringIO()
+    call_command(
+        "bod_sync",
+        providers=True,
+        attributions=True,
+        datasets=True,
+        engine=engine,
+        chunk_size=2,
+        stdout=out,
+    )
+    assert "5 provider(s) added" in out.getvalue()
+    assert "5 attribution(s) added" in out.getvalue()
+    assert "5 dataset(s) added" in out.getvalue()
+    assert set(Dataset.objects.values_list("title_de", flat=True)
+              ) == {f"Datensatz {index}" for index in range(5)}
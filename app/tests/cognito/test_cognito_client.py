@@ -1,8 +1,28 @@
 from unittest.mock import call
 from unittest.mock import patch
 
+from botocore.stub import Stubber
 from cognito.utils.client import Client
+from cognito.utils.client import count_calls
+from cognito.utils.client import get_boto_client
 from cognito.utils.client import user_attributes_to_dict
+from pytest import fixture
+
+
+class UserNotFoundException(Exception):
+    pass
+
+
+@fixture(name='stubbed_client')
+def fixture_stubbed_client(monkeypatch):
+    """ A client with a real boto client answering with stubbed responses. """
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-central-2')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'test')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'test')
+    client = Client()
+    with Stubber(client.client) as stubber:
+        yield client, stubber
+        stubber.assert_no_pending_responses()
 
 
 def test_user_attributes_to_dict():
@@ -47,28 +67,6 @@ def test_list_users_pagination(boto3, cognito_user_response_factory):
     ) in boto3.mock_calls
 
 
-@patch('cognito.utils.client.client')
-def test_user_exists_managed(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=True)]
-    }
-
-    client = Client()
-    assert client.user_exists('1234')
-    assert client.user_exists('1234', check_unmanaged=True)
-
-
-@patch('cognito.utils.client.client')
-def test_user_exists_unmanaged(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=False)]
-    }
-
-    client = Client()
-    assert not client.user_exists('1234')
-    assert client.user_exists('1234', check_unmanaged=True)
-
-
 @patch('cognito.utils.client.client')
 def test_get_user_returns_managed(boto3, cognito_user_response_factory):
     response = cognito_user_response_factory(
@@ -115,7 +113,8 @@ def test_get_user_returns_unmanaged(boto3, cognito_user_response_factory):
 
 @patch('cognito.utils.client.client')
 def test_create_user_creates_managed(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {'Users': []}
+    boto3.return_value.exceptions.UserNotFoundException = UserNotFoundException
+    boto3.return_value.admin_get_user.side_effect = UserNotFoundException()
 
     client = Client()
     created = client.create_user('2ihg2ox304po', '1234', 'test@example.org')
@@ -139,9 +138,9 @@ def test_create_user_creates_managed(boto3, cognito_user_response_factory):
 
 @patch('cognito.utils.client.client')
 def test_create_user_does_not_create_if_managed_exists(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=True)]
-    }
+    boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
+        '2ihg2ox304po', '1234', managed=True, attributes_key='UserAttributes'
+    )
 
     client = Client()
     created = client.create_user('2ihg2ox304po', '1234', 'test@example.org')
@@ -151,9 +150,9 @@ def test_create_user_does_not_create_if_managed_exists(boto3, cognito_user_respo
 
 @patch('cognito.utils.client.client')
 def test_create_user_does_not_create_if_unmanaged_exists(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=False)]
-    }
+    boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
+        '2ihg2ox304po', '1234', managed=False, attributes_key='UserAttributes'
+    )
 
     client = Client()
     created = client.create_user('2ihg2ox304po', '1234', 'test@example.org')
@@ -163,9 +162,9 @@ def test_create_user_does_not_create_if_unmanaged_exists(boto3, cognito_user_res
 
 @patch('cognito.utils.client.client')
 def test_delete_user_deletes_managed(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=True)]
-    }
+    boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
+        '2ihg2ox304po', '1234', managed=True, attributes_key='UserAttributes'
+    )
 
     client = Client()
     deleted = client.delete_user('1234')
@@ -177,9 +176,9 @@ def test_delete_user_deletes_managed(boto3, cognito_user_response_factory):
 
 @patch('cognito.utils.client.client')
 def test_delete_user_does_not_delete_unmanaged(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=False)]
-    }
+    boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
+        '2ihg2ox304po', '1234', managed=False, attributes_key='UserAttributes'
+    )
 
     client = Client()
     deleted = client.delete_user('1234')
@@ -191,10 +190,6 @@ def test_delete_user_does_not_delete_unmanaged(boto3, cognito_user_response_fact
 
 @patch('cognito.utils.client.client')
 def test_update_user_updates_managed(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=True)]
-    }
-
     boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
         '2ihg2ox304po', '1234', managed=True, attributes_key='UserAttributes'
     )
@@ -222,10 +217,6 @@ def test_update_user_updates_managed(boto3, cognito_user_response_factory):
 
 @patch('cognito.utils.client.client')
 def test_update_user_updates_partial_managed(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=True)]
-    }
-
     boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
         '2ihg2ox304po', '1234', managed=True, attributes_key='UserAttributes'
     )
@@ -246,10 +237,6 @@ def test_update_user_updates_partial_managed(boto3, cognito_user_response_factor
 
 @patch('cognito.utils.client.client')
 def test_update_user_does_not_update_unchanged_managed(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=True)]
-    }
-
     boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
         '2ihg2ox304po', '1234', managed=True, attributes_key='UserAttributes'
     )
@@ -263,10 +250,6 @@ def test_update_user_does_not_update_unchanged_managed(boto3, cognito_user_respo
 
 @patch('cognito.utils.client.client')
 def test_update_user_does_not_update_unmanaged(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=False)]
-    }
-
     boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
         '2ihg2ox304po', '1234', managed=False, attributes_key='UserAttributes'
     )
@@ -279,9 +262,9 @@ def test_update_user_does_not_update_unmanaged(boto3, cognito_user_response_fact
 
 @patch('cognito.utils.client.client')
 def test_disable_user_disables_managed(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=True)]
-    }
+    boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
+        '2ihg2ox304po', '1234', managed=True, attributes_key='UserAttributes'
+    )
 
     client = Client()
     disabled = client.disable_user('1234')
@@ -293,9 +276,9 @@ def test_disable_user_disables_managed(boto3, cognito_user_response_factory):
 
 @patch('cognito.utils.client.client')
 def test_disable_user_does_not_disable_unmanaged(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=False)]
-    }
+    boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
+        '2ihg2ox304po', '1234', managed=False, attributes_key='UserAttributes'
+    )
 
     client = Client()
     disabled = client.disable_user('1234')
@@ -307,9 +290,9 @@ def test_disable_user_does_not_disable_unmanaged(boto3, cognito_user_response_fa
 
 @patch('cognito.utils.client.client')
 def test_enable_user_enables_managed(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=True)]
-    }
+    boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
+        '2ihg2ox304po', '1234', managed=True, attributes_key='UserAttributes'
+    )
 
     client = Client()
     enabled = client.enable_user('1234')
@@ -321,9 +304,9 @@ def test_enable_user_enables_managed(boto3, cognito_user_response_factory):
 
 @patch('cognito.utils.client.client')
 def test_enable_user_does_not_enable_unmanaged(boto3, cognito_user_response_factory):
-    boto3.return_value.list_users.return_value = {
-        'Users': [cognito_user_response_factory('2ihg2ox304po', '1234', managed=False)]
-    }
+    boto3.return_value.admin_get_user.return_value = cognito_user_response_factory(
+        '2ihg2ox304po', '1234', managed=False, attributes_key='UserAttributes'
+    )
 
     client = Client()
     enabled = client.enable_user('1234')
@@ -331,3 +314,64 @@ def test_enable_user_does_not_enable_unmanaged(boto3, cognito_user_response_fact
     assert call().admin_enable_user(
         UserPoolId=client.user_pool_id, Username='1234'
     ) not in boto3.mock_calls
+
+
+@patch('cognito.utils.client.client')
+def test_boto_client_shared_between_clients(boto3, settings):
+    settings.COGNITO_MAX_POOL_CONNECTIONS = 20
+
+    assert Client().client is Client().client
+    assert boto3.call_count == 1
+    assert boto3.call_args.args == ("cognito-idp",)
+    assert boto3.call_args.kwargs["endpoint_url"] == settings.COGNITO_ENDPOINT_URL
+    assert boto3.call_args.kwargs["config"].max_pool_connections == 20
+    assert boto3.call_args.kwargs["config"].tcp_keepalive
+
+    # Dropped in forked processes
+    get_boto_client.cache_clear()
+    Client()
+    assert boto3.call_count == 2
+
+
+def test_create_user_calls_cognito_twice(stubbed_client):
+    client, stubber = stubbed_client
+    stubber.add_client_error('admin_get_user', service_error_code='UserNotFoundException')
+    stubber.add_response('admin_create_user', {})
+
+    with count_calls() as calls:
+        assert client.create_user('2ihg2ox304po', '1234', 'test@example.org')
+
+    assert calls == {'AdminGetUser': 1, 'AdminCreateUser': 1}
+
+
+def test_update_user_calls_cognito_once_per_change(stubbed_client, cognito_user_response_factory):
+    client, stubber = stubbed_client
+    stubber.add_response(
+        'admin_get_user',
+        cognito_user_response_factory(
+            '2ihg2ox304po', '1234', managed=True, attributes_key='UserAttributes'
+        )
+    )
+    stubber.add_response('admin_update_user_attributes', {})
+    stubber.add_response('admin_reset_user_password', {})
+
+    with count_calls() as calls:
+        assert client.update_user('2ihg2ox304po', '5678', 'new@example.org')
+
+    assert calls == {'AdminGetUser': 1, 'AdminUpdateUserAttributes': 1, 'AdminResetUserPassword': 1}
+
+
+def test_delete_user_calls_cognito_twice(stubbed_client, cognito_user_response_factory):
+    client, stubber = stubbed_client
+    stubber.add_response(
+        'admin_get_user',
+        cognito_user_response_factory(
+            '2ihg2ox304po', '1234', managed=True, attributes_key='UserAttributes'
+        )
+    )
+    stubber.add_response('admin_delete_user', {})
+
+    with count_calls() as calls:
+        assert client.delete_user('2ihg2ox304po')
+
+    assert calls == {'AdminGetUser': 1, 'AdminDeleteUser': 1}
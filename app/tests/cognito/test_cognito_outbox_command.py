@@ -0,0 +1,141 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import call
+from unittest.mock import patch
+
+from access.models import CognitoOperation
+from access.models import CognitoSyncState
+from access.models import User
+from botocore.exceptions import ClientError
+from botocore.exceptions import EndpointConnectionError
+from pytest import fixture
+
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@fixture(name='user')
+def fixture_user(provider, settings):
+    settings.COGNITO_OUTBOX = True
+    return User.objects.create(
+        user_id='2ihg2ox304po',
+        username='1',
+        first_name='1',
+        last_name='1',
+        email='1@example.org',
+        provider=provider
+    )
+
+
+@patch('cognito.management.commands.cognito_outbox.Client')
+def test_command_applies_operations_in_order(cognito_client, user):
+    cognito_client.return_value.create_user.return_value = True
+    cognito_client.return_value.update_user.return_value = True
+    cognito_client.return_value.disable_user.return_value = True
+    user.email = '2@example.org'
+    user.save()
+    user.disable()
+
+    out = StringIO()
+    call_command('cognito_outbox', verbosity=2, stdout=out)
+
+    assert '3 operation(s) applied' in out.getvalue()
+    assert cognito_client.return_value.mock_calls == [
+        call.create_user('2ihg2ox304po', '1', '1@example.org'),
+        call.update_user('2ihg2ox304po', '1', '2@example.org'),
+        call.disable_user('2ihg2ox304po'),
+    ]
+    assert CognitoOperation.objects.count() == 0
+
+
+@patch('cognito.management.commands.cognito_outbox.Client')
+def test_command_retries_failed_operation_later(cognito_client, user):
+    cognito_client.return_value.create_user.side_effect = EndpointConnectionError(
+        endpoint_url='http://localhost'
+    )
+    user.email = '2@example.org'
+    user.save()
+
+    out = StringIO()
+    err = StringIO()
+    call_command('cognito_outbox', verbosity=2, stdout=out, stderr=err)
+
+    assert '1 operation(s) failed' in out.getvalue()
+    assert 'Could not create 2ihg2ox304po (attempt 1)' in err.getvalue()
+    # The update waits for the creation of the user
+    assert not cognito_client.return_value.update_user.called
+    failed = CognitoOperation.objects.get(type='create')
+    assert failed.attempts == 1
+    assert failed.next_attempt > timezone.now()
+    assert 'Could not connect' in failed.last_error
+
+    # Applied in order once the creation is due again
+    cognito_client.return_value.create_user.side_effect = None
+    cognito_client.return_value.create_user.return_value = True
+    cognito_client.return_value.update_user.return_value = True
+    CognitoOperation.objects.update(next_attempt=timezone.now() - timedelta(seconds=1))
+    call_command('cognito_outbox', verbosity=2, stdout=out)
+
+    assert '2 operation(s) applied' in out.getvalue()
+    assert cognito_client.return_value.update_user.called
+    assert CognitoOperation.objects.count() == 0
+
+
+@patch('cognito.management.commands.cognito_outbox.Client')
+def test_command_drops_inconsistent_operation(cognito_client, user):
+    cognito_client.return_value.create_user.return_value = False
+
+    out = StringIO()
+    err = StringIO()
+    call_command('cognito_outbox', verbosity=2, stdout=out, stderr=err)
+
+    assert '1 operation(s) inconsistent' in out.getvalue()
+    assert 'Could not create 2ihg2ox304po, inconsistent with cognito' in err.getvalue()
+    assert CognitoOperation.objects.count() == 0
+
+
+@patch('cognito.management.commands.cognito_outbox.Client')
+def test_command_gives_up_rejected_operation(cognito_client, user):
+    CognitoSyncState.objects.create(user_id='2ihg2ox304po', remote_hash='', synced=timezone.now())
+    cognito_client.return_value.create_user.side_effect = ClientError(
+        {
+            'Error': {
+                'Code': 'InvalidParameterException', 'Message': 'Invalid email address format.'
+            }
+        },
+        'AdminCreateUser',
+    )
+    cognito_client.return_value.update_user.return_value = True
+    user.email = '2@example.org'
+    user.save()
+
+    out = StringIO()
+    err = StringIO()
+    call_command('cognito_outbox', verbosity=2, stdout=out, stderr=err)
+
+    assert '1 operation(s) given up' in out.getvalue()
+    assert 'Could not create 2ihg2ox304po, giving up after 1 attempt(s)' in err.getvalue()
+    # The later operations of the user are not blocked
+    assert '1 operation(s) applied' in out.getvalue()
+    assert CognitoOperation.objects.count() == 0
+    # The user is reconciled by the next incremental cognito_sync
+    assert CognitoSyncState.objects.get().synced < user.updated
+
+
+@patch('cognito.management.commands.cognito_outbox.MAX_ATTEMPTS', 2)
+@patch('cognito.management.commands.cognito_outbox.Client')
+def test_command_gives_up_operation_after_max_attempts(cognito_client, user):
+    cognito_client.return_value.create_user.side_effect = EndpointConnectionError(
+        endpoint_url='http://localhost'
+    )
+
+    out = StringIO()
+    call_command('cognito_outbox', verbosity=2, stdout=out, stderr=StringIO())
+    assert '1 operation(s) failed' in out.getvalue()
+
+    CognitoOperation.objects.update(next_attempt=timezone.now() - timedelta(seconds=1))
+    out = StringIO()
+    call_command('cognito_outbox', verbosity=2, stdout=out, stderr=StringIO())
+
+    assert '1 operation(s) given up' in out.getvalue()
+    assert CognitoOperation.objects.count() == 0
@@ -0,0 +1,59 @@
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from cognito.utils.rate_limiter import RateLimiter
+from cognito.utils.rate_limiter import TokenBucket
+
+
+@patch('cognito.utils.rate_limiter.sleep')
+@patch('cognito.utils.rate_limiter.monotonic')
+def test_token_bucket_waits_for_tokens(monotonic, sleep):
+    monotonic.return_value = 0
+    bucket = TokenBucket(2)
+
+    bucket.acquire()
+    bucket.acquire()
+    assert not sleep.called
+
+    # The third request waits half a second for the next token
+    sleep.side_effect = lambda seconds: setattr(monotonic, 'return_value', seconds)
+    bucket.acquire()
+    assert sleep.call_args.args[0] == 0.5
+
+
+def test_token_bucket_adapts_rate():
+    bucket = TokenBucket(10)
+
+    bucket.slow_down()
+    assert bucket.rate == 5
+    bucket.slow_down()
+    bucket.slow_down()
+    bucket.slow_down()
+    bucket.slow_down()
+    assert bucket.rate == 1
+
+    for _ in range(20):
+        bucket.speed_up()
+    assert bucket.rate == 10
+
+
+def test_rate_limiter_shares_buckets_by_category():
+    limiter = RateLimiter()
+
+    assert limiter.get_bucket('AdminDeleteUser') is limiter.get_bucket('AdminDisableUser')
+    assert limiter.get_bucket('AdminDeleteUser').quota == 25
+    assert limiter.get_bucket('AdminGetUser').quota == 120
+    assert limiter.get_bucket('DescribeUserPool') is None
+
+
+def test_rate_limiter_slows_down_on_throttling():
+    limiter = RateLimiter()
+    model = Mock()
+    model.name = 'AdminCreateUser'
+
+    limiter.before_call(model)
+    limiter.after_call(model, {'Error': {'Code': 'TooManyRequestsException'}})
+    assert limiter.get_bucket('AdminCreateUser').rate == 25
+
+    limiter.after_call(model, {})
+    assert limiter.get_bucket('AdminCreateUser').rate == 26
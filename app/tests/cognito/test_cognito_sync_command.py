@@ -2,7 +2,9 @@ from io import StringIO
 from unittest.mock import call
 from unittest.mock import patch
 
+from access.models import CognitoSyncState
 from access.models import User
+from botocore.exceptions import ClientError
 from pytest import fixture
 
 from django.core.management import call_command
@@ -125,6 +127,28 @@ def test_command_clears_if_confirmed(cognito_client, input_, user, cognito_user_
     assert call().create_user('2ihg2ox304po', '1', '1@example.org') in cognito_client.mock_calls
 
 
+@patch('builtins.input')
+@patch('cognito.management.commands.cognito_sync.Client')
+def test_command_keeps_sync_states_of_cleared_users(
+    cognito_client, input_, user, cognito_user_response_factory
+):
+    input_.side_effect = ['yes']
+    cognito_client.return_value.list_users.return_value = [
+        cognito_user_response_factory('2ihg2ox304po', '1', '1@example.org')
+    ]
+    cognito_client.return_value.create_user.return_value = True
+    call_command('cognito_sync', clear=True, stdout=StringIO())
+
+    assert CognitoSyncState.objects.get().user_id == '2ihg2ox304po'
+
+    cognito_client.reset_mock()
+    out = StringIO()
+    call_command('cognito_sync', incremental=True, verbosity=2, stdout=out)
+
+    assert 'nothing to be done' in out.getvalue()
+    assert not cognito_client.return_value.get_user.called
+
+
 @patch('builtins.input')
 @patch('cognito.management.commands.cognito_sync.Client')
 def test_command_does_not_clears_if_not_confirmed(
@@ -171,3 +195,111 @@ def test_command_runs_dry(cognito_client, provider, user, cognito_user_response_
     assert not cognito_client.return_value.create_user.called
     assert not cognito_client.return_value.delete_user.called
     assert not cognito_client.return_value.update_user.called
+
+
+@patch('cognito.management.commands.cognito_sync.Client')
+def test_command_syncs_concurrently(cognito_client, provider, cognito_user_response_factory):
+    with patch('access.models.Client') as client:
+        client.return_value.create_user.return_value = True
+        for index in range(20):
+            User.objects.create(
+                username=str(index),
+                first_name='1',
+                last_name='1',
+                email=f'{index}@example.org',
+                provider=provider
+            )
+    cognito_client.return_value.list_users.return_value = [
+        cognito_user_response_factory(f'remote{index}', str(index)) for index in range(10)
+    ]
+
+    out = StringIO()
+    call_command('cognito_sync', concurrency=8, verbosity=2, stdout=out)
+
+    assert '20 user(s) added' in out.getvalue()
+    assert '10 user(s) deleted' in out.getvalue()
+    assert cognito_client.return_value.create_user.call_count == 20
+    assert cognito_client.return_value.delete_user.call_count == 10
+
+
+@patch('cognito.management.commands.cognito_sync.sleep')
+@patch('cognito.management.commands.cognito_sync.Client')
+def test_command_retries_throttled_calls(cognito_client, sleep, user):
+    throttled = ClientError({'Error': {'Code': 'TooManyRequestsException'}}, 'AdminCreateUser')
+    cognito_client.return_value.list_users.return_value = []
+    cognito_client.return_value.create_user.side_effect = [throttled, throttled, True]
+
+    out = StringIO()
+    call_command('cognito_sync', verbosity=2, stdout=out)
+
+    assert '1 user(s) added' in out.getvalue()
+    assert cognito_client.return_value.create_user.call_count == 3
+    assert sleep.call_count == 2
+    # The maximum delay doubles with every attempt
+    assert sleep.call_args_list[0].args[0] <= 1
+    assert sleep.call_args_list[1].args[0] <= 2
+
+
+@patch('cognito.management.commands.cognito_sync.Client')
+def test_command_records_sync_states(cognito_client, user, cognito_user_response_factory):
+    CognitoSyncState.objects.create(user_id='gone', remote_hash='', synced=timezone.now())
+    cognito_client.return_value.list_users.return_value = [
+        cognito_user_response_factory('2ihg2ox304po', '1', '1@example.org')
+    ]
+
+    call_command('cognito_sync', stdout=StringIO())
+
+    state = CognitoSyncState.objects.get()
+    assert state.user_id == '2ihg2ox304po'
+    assert state.remote_hash == CognitoSyncState.get_hash(user)
+    assert state.synced == user.updated
+
+
+@patch('cognito.management.commands.cognito_sync.Client')
+def test_command_syncs_incrementally(cognito_client, provider, user, cognito_user_response_factory):
+    cognito_client.return_value.list_users.return_value = [
+        cognito_user_response_factory('2ihg2ox304po', '1', '1@example.org')
+    ]
+    call_command('cognito_sync', stdout=StringIO())
+    cognito_client.reset_mock()
+
+    # Unchanged users and changes of attributes which are not synchronized do not call cognito
+    user.first_name = 'changed'
+    user.save()
+    out = StringIO()
+    call_command('cognito_sync', incremental=True, verbosity=2, stdout=out)
+
+    assert 'nothing to be done' in out.getvalue()
+    assert not cognito_client.return_value.get_user.called
+    assert not cognito_client.return_value.list_users.called
+    assert CognitoSyncState.objects.get().synced == user.updated
+
+    # Changed, new and deleted users are reconciled one by one
+    user.email = '2@example.org'
+    user.save()
+    User.objects.create(
+        user_id='goho4o3ggg2o',
+        username='2',
+        first_name='2',
+        last_name='2',
+        email='2@example.org',
+        provider=provider
+    )
+    CognitoSyncState.objects.create(user_id='04i4p3g4iggh', remote_hash='', synced=timezone.now())
+    cognito_client.return_value.get_user.side_effect = lambda user_id: {
+        '2ihg2ox304po':
+            cognito_user_response_factory(
+                '2ihg2ox304po', '1', '1@example.org', attributes_key='UserAttributes'
+            ),}.get(user_id)
+    out = StringIO()
+    call_command('cognito_sync', incremental=True, verbosity=2, stdout=out)
+
+    assert '1 user(s) added' in out.getvalue()
+    assert '1 user(s) deleted' in out.getvalue()
+    assert '1 user(s) updated' in out.getvalue()
+    assert not cognito_client.return_value.list_users.called
+    assert call().create_user('goho4o3ggg2o', '2', '2@example.org') in cognito_client.mock_calls
+    assert call().update_user('2ihg2ox304po', '1', '2@example.org') in cognito_client.mock_calls
+    assert call().delete_user('04i4p3g4iggh') in cognito_client.mock_calls
+    assert set(CognitoSyncState.objects.values_list('user_id',
+                                                    flat=True)) == {'2ihg2ox304po', 'goho4o3ggg2o'}
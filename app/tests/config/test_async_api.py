@@ -0,0 +1,136 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import mock_api
+from access.models import User
+from asgiref.sync import async_to_sync
+from config.api import api
+from config.api import async_api
+from distributions.models import Dataset
+from pytest import fixture
+from pytest import mark
+from utils.response_cache import get_cache
+
+from django.utils import timezone
+
+
+@fixture(name='viewer')
+def fixture_viewer(attribution, client, django_user_factory):
+    with patch('access.models.Client') as cognito:
+        cognito.return_value.create_user.return_value = True
+        User.objects.create(
+            username="dude",
+            first_name="Jeffrey",
+            last_name="Lebowski",
+            email="dude@bowling.com",
+            provider=attribution.provider
+        )
+    Dataset.objects.create(
+        dataset_id="ch.bafu.neophyten-haargurke",
+        geocat_id="ab76361f-657d-4705-9053-95f89ecab126",
+        title_de="Haargurke",
+        title_fr="Sicyos anguleux",
+        title_en="Sicyos angulatus",
+        description_de="Beschreibung Haargurke",
+        description_fr="Description Sicyos anguleux",
+        description_en="Description Sicyos angulatus",
+        provider=attribution.provider,
+        attribution=attribution
+    )
+    django_user_factory(
+        'test',
+        'test',
+        [
+            ('provider', 'provider', 'view_provider'),
+            ('distributions', 'attribution', 'view_attribution'),
+            ('distributions', 'dataset', 'view_dataset'),
+            ('access', 'user', 'view_user'),
+            ('access', 'user', 'delete_user'),
+        ],
+    )
+    client.login(username='test', password='test')
+    yield client
+
+
+async def join(content):
+    return b"".join([chunk async for chunk in content])
+
+
+def get(client, path):
+    response = client.get(path)
+    if response.streaming and response.is_async:
+        return response.status_code, async_to_sync(join)(response.streaming_content)
+    if response.streaming:
+        return response.status_code, b"".join(response.streaming_content)
+    return response.status_code, response.content
+
+
+@mark.parametrize(
+    "path",
+    [
+        "/api/v1/providers",
+        "/api/v1/providers?limit=1&lang=de",
+        "/api/v1/providers?ids=ch.bafu,ch.missing",
+        "/api/v1/providers?updated_since={since}",
+        "/api/v1/providers/ch.bafu?fields=id,name",
+        "/api/v1/providers/ch.missing",
+        "/api/v1/attributions?lang=fr",
+        "/api/v1/attributions/ch.bafu.kt",
+        "/api/v1/datasets?fields=id,title",
+        "/api/v1/datasets/ch.bafu.neophyten-haargurke",
+        "/api/v1/users",
+        "/api/v1/users?updated_since={since}",
+        "/api/v1/users/dude",
+        "/api/v1/users?cursor=invalid",
+    ],
+)
+def test_async_api_responds_like_sync_api(viewer, settings, path):
+    since = timezone.now() - timedelta(hours=1)
+    path = path.format(since=since.isoformat().replace("+00:00", "Z"))
+    expected = get(viewer, path)
+
+    get_cache().clear()
+    settings.ROOT_URLCONF = "config.urls_async"
+    assert get(viewer, path) == expected
+
+
+def test_async_api_streams_like_sync_api(viewer, settings):
+    settings.API_STREAM_LIST_RESPONSES = True
+    settings.API_STREAM_CHUNK_SIZE = 1
+    expected = get(viewer, "/api/v1/datasets")
+
+    get_cache().clear()
+    settings.ROOT_URLCONF = "config.urls_async"
+    assert get(viewer, "/api/v1/datasets") == expected
+
+
+def test_async_api_serves_batches_and_conditional_requests(viewer, settings):
+    settings.ROOT_URLCONF = "config.urls_async"
+
+    response = viewer.post(
+        "/api/v1/providers/batch", {"ids": ["ch.bafu", "ch.missing"]},
+        content_type="application/json"
+    )
+    assert response.status_code == 200
+    assert response.json()["missing"] == ["ch.missing"]
+
+    response = viewer.get("/api/v1/attributions")
+    assert response.status_code == 200
+    response = viewer.get("/api/v1/attributions", HTTP_IF_NONE_MATCH=response["ETag"])
+    assert response.status_code == 304
+
+
+def test_async_api_serves_sync_operations(viewer, settings):
+    settings.ROOT_URLCONF = "config.urls_async"
+
+    assert viewer.delete("/api/v1/users/missing").status_code == 404
+
+
+def test_async_api_is_documented_like_sync_api(settings):
+    expected = api.get_openapi_schema()
+    # Other tests add operations to the sync API, these are not part of the async API
+    for path in mock_api.router.path_operations:
+        expected["paths"].pop(f"/api/v1/{path.lstrip('/')}", None)
+
+    settings.ROOT_URLCONF = "config.urls_async"
+    assert async_api.get_openapi_schema() == expected
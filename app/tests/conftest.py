@@ -1,13 +1,39 @@
 from typing import Any
 
+from cognito.utils.client import get_boto_client
 from distributions.models import Attribution
 from provider.models import Provider
 from pytest import fixture
+from utils.response_cache import get_cache
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
+from django.test import override_settings
+
+
+@fixture(autouse=True)
+def clear_response_cache():
+    """Clear the API response cache before each test, so that tests do not influence each other."""
+    get_cache().clear()
+
+
+@fixture(autouse=True)
+def clear_boto_client():
+    """Drop the shared cognito boto client, so that tests can mock it."""
+    get_boto_client.cache_clear()
+
+
+@fixture(name='shared_api_cache')
+def fixture_shared_api_cache(tmp_path):
+    """Use a file based "api" cache, which is shared by all processes unlike the default one."""
+    api_cache = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": str(tmp_path / "api"),
+    }
+    with override_settings(CACHES={**settings.CACHES, "api": api_cache}):
+        yield
 
 
 @fixture(name='provider')
@@ -1,4 +1,5 @@
 import datetime
+import json
 from unittest import mock
 
 from distributions.api import attribution_to_response
@@ -9,12 +10,58 @@ from provider.models import Provider
 from pytest import fixture
 from schemas import TranslationsSchema
 
+from django.utils import timezone
+
+# Queries per request: session, user, user permissions, group permissions, the fingerprint for
+# conditional requests and the data itself
+QUERY_BUDGET_ATTRIBUTION = 6
+QUERY_BUDGET_ATTRIBUTIONS = 6
+QUERY_BUDGET_DATASET = 6
+QUERY_BUDGET_DATASETS = 6
+
 
 @fixture(name='time_created')
 def fixture_time_created():
     yield datetime.datetime(2024, 9, 12, 15, 28, 0, tzinfo=datetime.UTC)
 
 
+@fixture(name='many_datasets')
+def fixture_many_datasets(dataset):
+    for index in range(10):
+        provider = Provider.objects.create(
+            provider_id=f"ch.provider{index}",
+            acronym_de=f"Provider{index}",
+            acronym_fr=f"Provider{index}",
+            acronym_en=f"Provider{index}",
+            name_de=f"Provider{index}",
+            name_fr=f"Provider{index}",
+            name_en=f"Provider{index}",
+        )
+        attribution = Attribution.objects.create(
+            attribution_id=f"ch.provider{index}.attribution",
+            name_de=f"Attribution{index}",
+            name_fr=f"Attribution{index}",
+            name_en=f"Attribution{index}",
+            description_de=f"Attribution{index}",
+            description_fr=f"Attribution{index}",
+            description_en=f"Attribution{index}",
+            provider=provider,
+        )
+        Dataset.objects.create(
+            dataset_id=f"ch.provider{index}.dataset",
+            geocat_id=f"dataset{index}",
+            title_de=f"Dataset{index}",
+            title_fr=f"Dataset{index}",
+            title_en=f"Dataset{index}",
+            description_de=f"Dataset{index}",
+            description_fr=f"Dataset{index}",
+            description_en=f"Dataset{index}",
+            provider=provider,
+            attribution=attribution,
+        )
+    yield Dataset.objects.all()
+
+
 @fixture(name='dataset')
 def fixture_dataset(attribution, time_created):
     with mock.patch('django.utils.timezone.now', mock.Mock(return_value=time_created)):
@@ -795,3 +842,328 @@ def test_get_datasets_returns_403_if_no_permission(dataset, client, django_user_
 
     assert response.status_code == 403
     assert response.json() == {"code": 403, "description": "Forbidden"}
+
+
+def test_get_attribution_stays_within_query_budget(
+    attribution, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('distributions', 'attribution', 'view_attribution')])
+    client.login(username='test', password='test')
+
+    with django_assert_max_num_queries(QUERY_BUDGET_ATTRIBUTION):
+        response = client.get(f"/api/v1/attributions/{attribution.attribution_id}")
+
+    assert response.status_code == 200
+
+
+def test_get_attributions_stays_within_query_budget_regardless_of_row_count(
+    many_datasets, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('distributions', 'attribution', 'view_attribution')])
+    client.login(username='test', password='test')
+
+    with django_assert_max_num_queries(QUERY_BUDGET_ATTRIBUTIONS):
+        response = client.get("/api/v1/attributions")
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 11
+
+
+def test_get_dataset_stays_within_query_budget(
+    dataset, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+
+    with django_assert_max_num_queries(QUERY_BUDGET_DATASET):
+        response = client.get(f"/api/v1/datasets/{dataset.dataset_id}")
+
+    assert response.status_code == 200
+
+
+def test_get_datasets_stays_within_query_budget_regardless_of_row_count(
+    many_datasets, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+
+    with django_assert_max_num_queries(QUERY_BUDGET_DATASETS):
+        response = client.get("/api/v1/datasets")
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 11
+
+
+def test_get_attributions_returns_pages_with_next_link_if_limit_given(
+    many_datasets, client, django_user_factory
+):
+    django_user_factory('test', 'test', [('distributions', 'attribution', 'view_attribution')])
+    client.login(username='test', password='test')
+
+    ids = []
+    url = "/api/v1/attributions?limit=4"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert len(response.json()["items"]) <= 4
+        ids.extend(item["id"] for item in response.json()["items"])
+        url = response.json().get("next")
+
+    expected = list(Attribution.objects.order_by("id").values_list("attribution_id", flat=True))
+    assert ids == expected
+
+
+def test_get_datasets_returns_pages_with_next_link_if_limit_given(
+    many_datasets, client, django_user_factory
+):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+
+    ids = []
+    url = "/api/v1/datasets?limit=4&lang=de"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert len(response.json()["items"]) <= 4
+        ids.extend(item["id"] for item in response.json()["items"])
+        url = response.json().get("next")
+        if url:
+            assert "lang=de" in url
+
+    expected = list(Dataset.objects.order_by("dataset_id").values_list("dataset_id", flat=True))
+    assert ids == expected
+
+
+def test_get_datasets_returns_400_if_cursor_invalid(dataset, client, django_user_factory):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+
+    response = client.get("/api/v1/datasets?cursor=invalid")
+
+    assert response.status_code == 400
+    assert response.json() == {"code": 400, "description": "Invalid cursor"}
+
+
+def test_get_datasets_returns_304_if_etag_matches(dataset, client, django_user_factory):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+    etag = client.get("/api/v1/datasets").headers["ETag"]
+
+    response = client.get("/api/v1/datasets", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+
+
+def test_get_datasets_returns_200_if_related_provider_changed(dataset, client, django_user_factory):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+    etag = client.get("/api/v1/datasets").headers["ETag"]
+
+    dataset.provider.provider_id = "ch.bafu.changed"
+    dataset.provider.save()
+    response = client.get("/api/v1/datasets", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()["items"][0]["provider_id"] == "ch.bafu.changed"
+
+
+def test_get_attributions_returns_200_if_attribution_deleted(
+    many_datasets, client, django_user_factory
+):
+    django_user_factory('test', 'test', [('distributions', 'attribution', 'view_attribution')])
+    client.login(username='test', password='test')
+    etag = client.get("/api/v1/attributions").headers["ETag"]
+
+    Attribution.objects.filter(attribution_id="ch.provider0.attribution").delete()
+    response = client.get("/api/v1/attributions", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 10
+
+
+def test_get_attributions_streams_same_response_if_streaming_enabled(
+    many_datasets, client, django_user_factory, settings
+):
+    django_user_factory('test', 'test', [('distributions', 'attribution', 'view_attribution')])
+    client.login(username='test', password='test')
+
+    settings.API_STREAM_LIST_RESPONSES = True
+    settings.API_STREAM_CHUNK_SIZE = 3
+    response = client.get("/api/v1/attributions?lang=de")
+
+    assert response.status_code == 200
+    assert response.streaming
+    streamed = json.loads(b"".join(response.streaming_content))
+
+    settings.API_STREAM_LIST_RESPONSES = False
+    assert streamed == client.get("/api/v1/attributions?lang=de").json()
+
+
+def test_get_datasets_streams_same_response_if_streaming_enabled(
+    many_datasets, client, django_user_factory, settings
+):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+
+    settings.API_STREAM_LIST_RESPONSES = True
+    settings.API_STREAM_CHUNK_SIZE = 3
+    response = client.get("/api/v1/datasets")
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response.headers["ETag"]
+    streamed = json.loads(b"".join(response.streaming_content))
+
+    settings.API_STREAM_LIST_RESPONSES = False
+    assert streamed == client.get("/api/v1/datasets").json()
+
+
+def test_get_datasets_returns_only_requested_fields_without_joins(
+    many_datasets, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+
+    with django_assert_max_num_queries(QUERY_BUDGET_DATASETS) as context:
+        response = client.get("/api/v1/datasets?fields=id,title&limit=2&lang=de")
+
+    assert response.status_code == 200
+    assert response.json()["items"] == [
+        {
+            "id": "ch.bafu.neophyten-haargurke",
+            "title": "Invasive gebietsfremde Pflanzen - Potentialkarte Haargurke",
+        },
+        {
+            "id": "ch.provider0.dataset", "title": "Dataset0"
+        },
+    ]
+    assert "next" in response.json()
+    assert "JOIN" not in context.captured_queries[-1]["sql"]
+    assert "description_de" not in context.captured_queries[-1]["sql"]
+
+
+def test_get_attribution_returns_only_requested_fields(attribution, client, django_user_factory):
+    django_user_factory('test', 'test', [('distributions', 'attribution', 'view_attribution')])
+    client.login(username='test', password='test')
+
+    response = client.get(
+        f"/api/v1/attributions/{attribution.attribution_id}?fields=provider_id,id"
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"id": "ch.bafu.kt", "provider_id": "ch.bafu"}
+
+
+def test_get_dataset_returns_400_if_field_unknown(dataset, client, django_user_factory):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+
+    response = client.get(f"/api/v1/datasets/{dataset.dataset_id}?fields=name")
+
+    assert response.status_code == 400
+
+
+def test_get_datasets_returns_requested_ids_in_order_and_missing_ids(
+    many_datasets, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+
+    with django_assert_max_num_queries(QUERY_BUDGET_DATASETS):
+        response = client.get(
+            "/api/v1/datasets?ids=ch.provider5.dataset,ch.unknown,ch.provider1.dataset"
+        )
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]
+           ] == ["ch.provider5.dataset", "ch.provider1.dataset"]
+    assert response.json()["items"][0]["attribution_id"] == "ch.provider5.attribution"
+    assert response.json()["missing"] == ["ch.unknown"]
+    assert "next" not in response.json()
+
+
+def test_post_attributions_batch_returns_requested_attributions(
+    many_datasets, client, django_user_factory
+):
+    django_user_factory('test', 'test', [('distributions', 'attribution', 'view_attribution')])
+    client.login(username='test', password='test')
+
+    response = client.post(
+        "/api/v1/attributions/batch?fields=id,name",
+        data={"ids": ["ch.provider3.attribution", "ch.bafu.kt"]},
+        content_type="application/json",
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "items": [
+            {
+                "id": "ch.provider3.attribution", "name": "Attribution3"
+            },
+            {
+                "id": "ch.bafu.kt", "name": "FOEN + cantons"
+            },
+        ],
+        "missing": [],
+    }
+
+
+def test_post_datasets_batch_returns_400_if_too_many_ids(
+    dataset, client, django_user_factory, settings
+):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+    settings.API_BATCH_MAX_IDS = 1
+
+    response = client.post(
+        "/api/v1/datasets/batch",
+        data={"ids": ["ch.bafu.neophyten-haargurke", "ch.other"]},
+        content_type="application/json",
+    )
+
+    assert response.status_code == 400
+
+
+def test_get_datasets_returns_changes_and_deletions_since_given_time(
+    attribution, client, django_user_factory
+):
+    django_user_factory('test', 'test', [('distributions', 'dataset', 'view_dataset')])
+    client.login(username='test', password='test')
+    for index in range(3):
+        Dataset.objects.create(
+            dataset_id=f"ch.bafu.dataset{index}",
+            geocat_id=f"dataset{index}",
+            title_de=f"Dataset{index}",
+            title_fr=f"Dataset{index}",
+            title_en=f"Dataset{index}",
+            description_de=f"Dataset{index}",
+            description_fr=f"Dataset{index}",
+            description_en=f"Dataset{index}",
+            provider=attribution.provider,
+            attribution=attribution,
+        )
+    since = timezone.now()
+
+    Dataset.objects.filter(dataset_id="ch.bafu.dataset0").delete()
+    changed = Dataset.objects.get(dataset_id="ch.bafu.dataset2")
+    changed.title_en = "Changed"
+    changed.save()
+    response = client.get(
+        "/api/v1/datasets", {
+            "fields": "id", "limit": 5, "updated_since": since.isoformat()
+        }
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "items": [{
+            "id": "ch.bafu.dataset2"
+        }], "deleted": ["ch.bafu.dataset0"]
+    }
+
+    since = timezone.now()
+    attribution.provider.delete()
+    response = client.get("/api/v1/datasets", {"updated_since": since.isoformat()})
+
+    assert response.json()["items"] == []
+    assert sorted(response.json()["deleted"]) == ["ch.bafu.dataset1", "ch.bafu.dataset2"]
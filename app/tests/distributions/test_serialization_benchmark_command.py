@@ -0,0 +1,13 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+
+def test_command_reports_cost_per_row():
+    out = StringIO()
+    call_command("serialization_benchmark", rows=10, repeat=1, verbosity=2, stdout=out)
+
+    output = out.getvalue()
+    assert "schemas: " in output
+    assert "rows: " in output
+    assert "µs per row" in output
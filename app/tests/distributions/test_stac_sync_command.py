@@ -5,8 +5,10 @@ from distributions.models import Dataset
 from distributions.models import PackageDistribution
 from pystac.collection import Collection
 from pystac.provider import Provider as StacProvider
+from pytest import raises
 
 from django.core.management import call_command
+from django.core.management.base import CommandError
 
 
 @patch('distributions.management.commands.stac_sync.Client')
@@ -217,7 +219,9 @@ def test_command_creates_default_dataset(get, stac_client, provider, attribution
 
 @patch('distributions.management.commands.stac_sync.Client')
 @patch('distributions.management.commands.stac_sync.get')
-def test_command_does_not_need_to_import(get, stac_client, provider, attribution):
+def test_command_does_not_need_to_import(
+    get, stac_client, provider, attribution, django_assert_max_num_queries
+):
     dataset_1 = Dataset.objects.create(
         dataset_id="ch.bafu.alpweiden-herdenschutzhunde",
         geocat_id="ab76361f-657d-4705-9053-95f89ecab126",
@@ -277,6 +281,53 @@ def test_command_does_not_need_to_import(get, stac_client, provider, attribution
     call_command("stac_sync", verbosity=2, stdout=out)
     out = out.getvalue()
     assert "nothing to be done, already up to date" in out
+    assert not PackageDistribution.objects.filter(_legacy_fingerprint=None).exists()
+
+    # The package distributions are skipped by their fingerprints without loading them
+    out = StringIO()
+    with django_assert_max_num_queries(5):
+        call_command("stac_sync", verbosity=2, stdout=out)
+    out = out.getvalue()
+    assert "nothing to be done, already up to date" in out
+
+
+@patch('distributions.management.commands.stac_sync.Client')
+@patch('distributions.management.commands.stac_sync.get')
+def test_command_restores_locally_edited_package_distributions(
+    get, stac_client, provider, attribution
+):
+    Dataset.objects.create(
+        dataset_id="ch.bafu.alpweiden-herdenschutzhunde",
+        geocat_id="ab76361f-657d-4705-9053-95f89ecab126",
+        title_de="Alpweiden mit Herdenschutzhunden",
+        title_fr="Alpages protégés par des chiens",
+        title_en="Alps with livestock guardian dogs",
+        description_de="Beschreibung",
+        description_fr="Description",
+        description_en="Description",
+        provider=provider,
+        attribution=attribution,
+    )
+    stac_client.open.return_value.collection_search.return_value.collections.return_value = [
+        Collection(
+            id='ch.bafu.alpweiden-herdenschutzhunde',
+            description=None,
+            extent=None,
+            providers=[StacProvider(name='Federal Office for the Environment')]
+        )
+    ]
+    get.return_value.text = '<div id="data"></div>'
+    call_command("stac_sync", verbosity=2, stdout=StringIO())
+
+    package_distribution = PackageDistribution.objects.get()
+    package_distribution.managed_by_stac = False
+    package_distribution.save()
+
+    out = StringIO()
+    call_command("stac_sync", verbosity=2, stdout=out)
+    out = out.getvalue()
+    assert "Updated package distribution 'ch.bafu.alpweiden-herdenschutzhunde' (managed)" in out
+    assert PackageDistribution.objects.get().managed_by_stac is True
 
 
 @patch('distributions.management.commands.stac_sync.Client')
@@ -933,3 +984,31 @@ def test_command_does_not_warn_about_similar_provider(get, stac_client, provider
     assert "1 package_distribution(s) added" in out
     assert "Provider in collection and dataset differ" not in out
     assert PackageDistribution.objects.first()
+
+
+@patch('utils.chunks.bump_version_on_commit')
+@patch('distributions.management.commands.stac_sync.Client')
+@patch('distributions.management.commands.stac_sync.get')
+def test_command_commits_in_chunks(get, stac_client, bump_version_on_commit, db):
+    stac_client.open.return_value.collection_search.return_value.collections.return_value = [
+        Collection(
+            id='ch.bafu.alpweiden-herdenschutzhunde',
+            description=None,
+            extent=None,
+            providers=[StacProvider(name='#Missing')]
+        )
+    ]
+    get.return_value.text = '<div id="data">ch.bafu.hydrologie-hintergrundkarte</div>'
+
+    out = StringIO()
+    call_command("stac_sync", default_dataset='default', commit_every=1, verbosity=2, stdout=out)
+    out = out.getvalue()
+    assert "Added default dataset 'default'" in out
+    assert "2 package_distribution(s) added" in out
+    # The default dataset, one chunk per collection and the orphans
+    assert bump_version_on_commit.call_count == 4
+
+
+def test_command_does_not_commit_in_chunks_if_dry_run(db):
+    with raises(CommandError):
+        call_command("stac_sync", dry_run=True, commit_every=1, stdout=StringIO())
@@ -1,8 +1,18 @@
+import json
+from datetime import timedelta
+
 from provider.api import provider_to_response
 from provider.models import Provider
 from provider.schemas import ProviderSchema
 from schemas import TranslationsSchema
 
+from django.utils import timezone
+
+# Queries per request: session, user, user permissions, group permissions, the fingerprint for
+# conditional requests and the data itself
+QUERY_BUDGET_PROVIDER = 6
+QUERY_BUDGET_PROVIDERS = 6
+
 
 def test_provider_to_response_returns_response_with_language_as_defined(provider):
     actual = provider_to_response(provider, lang="de")
@@ -525,3 +535,405 @@ def test_get_providers_returns_403_if_no_permission(client, django_user_factory)
 
     assert response.status_code == 403
     assert response.json() == {"code": 403, "description": "Forbidden"}
+
+
+def test_get_provider_stays_within_query_budget(
+    provider, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    with django_assert_max_num_queries(QUERY_BUDGET_PROVIDER):
+        response = client.get(f"/api/v1/providers/{provider.provider_id}")
+
+    assert response.status_code == 200
+
+
+def test_get_providers_stays_within_query_budget_regardless_of_row_count(
+    provider, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    for index in range(10):
+        Provider.objects.create(
+            provider_id=f"ch.provider{index}",
+            acronym_de=f"Provider{index}",
+            acronym_fr=f"Provider{index}",
+            acronym_en=f"Provider{index}",
+            name_de=f"Provider{index}",
+            name_fr=f"Provider{index}",
+            name_en=f"Provider{index}",
+        )
+
+    with django_assert_max_num_queries(QUERY_BUDGET_PROVIDERS):
+        response = client.get("/api/v1/providers")
+
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 11
+
+
+def test_get_providers_returns_pages_with_next_link_if_limit_given(
+    provider, client, django_user_factory
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    for index in range(4):
+        Provider.objects.create(
+            provider_id=f"ch.provider{index}",
+            acronym_de=f"Provider{index}",
+            acronym_fr=f"Provider{index}",
+            acronym_en=f"Provider{index}",
+            name_de=f"Provider{index}",
+            name_fr=f"Provider{index}",
+            name_en=f"Provider{index}",
+        )
+
+    response = client.get("/api/v1/providers?limit=2")
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == ["ch.bafu", "ch.provider0"]
+    assert response.json()["next"].startswith("http://testserver/api/v1/providers?limit=2&cursor=")
+
+    response = client.get(response.json()["next"])
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == ["ch.provider1", "ch.provider2"]
+
+    response = client.get(response.json()["next"])
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == ["ch.provider3"]
+    assert "next" not in response.json()
+
+
+def test_get_providers_returns_400_if_cursor_invalid(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    response = client.get("/api/v1/providers?cursor=invalid")
+
+    assert response.status_code == 400
+    assert response.json() == {"code": 400, "description": "Invalid cursor"}
+
+
+def test_get_providers_returns_422_if_limit_invalid(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    response = client.get("/api/v1/providers?limit=0")
+
+    assert response.status_code == 422
+
+
+def test_get_providers_returns_etag_and_last_modified(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    response = client.get("/api/v1/providers")
+
+    assert response.status_code == 200
+    assert response.headers["ETag"].startswith('"')
+    assert response.headers["Last-Modified"]
+    assert "Accept-Language" in response.headers["Vary"]
+
+
+def test_get_providers_returns_304_if_etag_matches_without_loading_rows(
+    provider, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+    etag = client.get("/api/v1/providers").headers["ETag"]
+
+    with django_assert_max_num_queries(QUERY_BUDGET_PROVIDERS - 1):
+        response = client.get("/api/v1/providers", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+def test_get_providers_returns_200_if_etag_outdated(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+    etag = client.get("/api/v1/providers").headers["ETag"]
+
+    provider.name_en = "Changed"
+    provider.save()
+    response = client.get("/api/v1/providers", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["items"][0]["name"] == "Changed"
+
+
+def test_get_providers_returns_different_etags_per_language(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    etag_de = client.get("/api/v1/providers", headers={"Accept-Language": "de"}).headers["ETag"]
+    etag_fr = client.get("/api/v1/providers", headers={"Accept-Language": "fr"}).headers["ETag"]
+
+    assert etag_de != etag_fr
+
+
+def test_get_provider_returns_304_if_not_modified_since(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+    last_modified = client.get(f"/api/v1/providers/{provider.provider_id}").headers["Last-Modified"]
+
+    response = client.get(
+        f"/api/v1/providers/{provider.provider_id}", headers={"If-Modified-Since": last_modified}
+    )
+
+    assert response.status_code == 304
+
+
+def test_get_providers_returns_200_if_modified_since_by_deletion(
+    provider, client, django_user_factory
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+    Provider.objects.create(
+        provider_id="ch.swisstopo",
+        acronym_de="swisstopo",
+        acronym_fr="swisstopo",
+        acronym_en="swisstopo",
+        name_de="Bundesamt für Landestopografie",
+        name_fr="Office fédéral de topographie",
+        name_en="Federal Office of Topography",
+    )
+    Provider.objects.update(updated=timezone.now() - timedelta(hours=1))
+    last_modified = client.get("/api/v1/providers").headers["Last-Modified"]
+
+    Provider.objects.get(provider_id="ch.swisstopo").delete()
+    response = client.get("/api/v1/providers", headers={"If-Modified-Since": last_modified})
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == ["ch.bafu"]
+    assert response.headers["Last-Modified"] != last_modified
+
+
+def test_get_providers_does_not_return_304_if_not_logged_in(provider, client):
+    response = client.get("/api/v1/providers", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 401
+
+
+def test_get_providers_returns_cached_response_without_loading_rows(
+    provider, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+    expected = client.get("/api/v1/providers?lang=de").json()
+
+    with django_assert_max_num_queries(QUERY_BUDGET_PROVIDERS - 1):
+        response = client.get("/api/v1/providers?lang=de")
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/json; charset=utf-8"
+    assert response.headers["ETag"]
+    assert response.json() == expected
+
+
+def test_get_providers_caches_responses_per_language(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    client.get("/api/v1/providers?lang=de")
+    response = client.get("/api/v1/providers?lang=fr")
+
+    assert response.json()["items"][0]["name"] == "Office fédéral de l'environnement"
+
+
+def test_get_providers_invalidates_cached_response_on_change(
+    provider, client, django_user_factory, django_capture_on_commit_callbacks
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+    client.get("/api/v1/providers")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        provider.name_en = "Changed"
+        provider.save()
+    response = client.get("/api/v1/providers")
+
+    assert response.json()["items"][0]["name"] == "Changed"
+
+
+def test_get_providers_invalidates_cached_response_on_deletion(
+    provider, client, django_user_factory
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+    client.get("/api/v1/providers")
+
+    Provider.objects.all().delete()
+    response = client.get("/api/v1/providers")
+
+    assert response.json()["items"] == []
+
+
+def test_get_providers_streams_same_response_if_streaming_enabled(
+    provider, client, django_user_factory, settings
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    settings.API_STREAM_LIST_RESPONSES = True
+    settings.API_STREAM_CHUNK_SIZE = 1
+    response = client.get("/api/v1/providers?lang=fr")
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response.headers["Content-Type"] == "application/json; charset=utf-8"
+    assert response.headers["ETag"]
+    streamed = json.loads(b"".join(response.streaming_content))
+
+    settings.API_STREAM_LIST_RESPONSES = False
+    assert streamed == client.get("/api/v1/providers?lang=fr").json()
+
+
+def test_get_providers_does_not_stream_pages(provider, client, django_user_factory, settings):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+    settings.API_STREAM_LIST_RESPONSES = True
+
+    response = client.get("/api/v1/providers?limit=1")
+
+    assert response.status_code == 200
+    assert not response.streaming
+
+
+def test_get_providers_returns_only_requested_fields(
+    provider, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    with django_assert_max_num_queries(QUERY_BUDGET_PROVIDERS) as context:
+        response = client.get("/api/v1/providers?fields=id,name&lang=de")
+
+    assert response.status_code == 200
+    assert response.json() == {"items": [{"id": "ch.bafu", "name": "Bundesamt für Umwelt"}]}
+    sql = context.captured_queries[-1]["sql"]
+    assert "acronym_de" not in sql
+    # The name is resolved in the requested language by the database
+    assert 'COALESCE(NULLIF("provider_provider"."name_de"' in sql
+    assert "name_fr" not in sql
+
+
+def test_get_provider_returns_only_requested_fields(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    response = client.get(f"/api/v1/providers/{provider.provider_id}?fields=acronym_translations")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "acronym_translations": {
+            "de": "BAFU", "fr": "OFEV", "en": "FOEN", "it": "UFAM", "rm": "UFAM"
+        }
+    }
+
+
+def test_get_providers_returns_400_if_field_unknown(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    response = client.get("/api/v1/providers?fields=id,unknown")
+
+    assert response.status_code == 400
+    assert response.json() == {"code": 400, "description": "Unknown fields: unknown"}
+
+
+def test_get_providers_returns_requested_ids_in_order_and_missing_ids(
+    provider, client, django_user_factory, django_assert_max_num_queries
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+    Provider.objects.create(
+        provider_id="ch.swisstopo",
+        acronym_de="swisstopo",
+        acronym_fr="swisstopo",
+        acronym_en="swisstopo",
+        name_de="swisstopo",
+        name_fr="swisstopo",
+        name_en="swisstopo",
+    )
+
+    with django_assert_max_num_queries(QUERY_BUDGET_PROVIDERS):
+        response = client.get("/api/v1/providers?ids=ch.swisstopo,ch.unknown,ch.bafu&fields=id")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "items": [{
+            "id": "ch.swisstopo"
+        }, {
+            "id": "ch.bafu"
+        }], "missing": ["ch.unknown"]
+    }
+
+
+def test_post_providers_batch_returns_requested_providers(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    response = client.post(
+        "/api/v1/providers/batch?lang=de",
+        data={"ids": ["ch.bafu", "ch.unknown"]},
+        content_type="application/json",
+    )
+
+    assert response.status_code == 200
+    assert response.json()["items"] == [client.get("/api/v1/providers/ch.bafu?lang=de").json()]
+    assert response.json()["missing"] == ["ch.unknown"]
+
+
+def test_post_providers_batch_returns_403_if_no_permission(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [])
+    client.login(username='test', password='test')
+
+    response = client.post(
+        "/api/v1/providers/batch", data={"ids": ["ch.bafu"]}, content_type="application/json"
+    )
+
+    assert response.status_code == 403
+
+
+def test_get_providers_returns_changes_and_deletions_since_given_time(
+    provider, client, django_user_factory
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+    removed = Provider.objects.create(
+        provider_id="ch.removed",
+        acronym_de="Removed",
+        acronym_fr="Removed",
+        acronym_en="Removed",
+        name_de="Removed",
+        name_fr="Removed",
+        name_en="Removed",
+    )
+    since = timezone.now()
+
+    removed.delete()
+    provider.name_en = "Changed"
+    provider.save()
+    response = client.get("/api/v1/providers", {"updated_since": since.isoformat()})
+
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()["items"]] == ["Changed"]
+    assert response.json()["deleted"] == ["ch.removed"]
+
+    response = client.get("/api/v1/providers", {"updated_since": timezone.now().isoformat()})
+
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "deleted": []}
+
+
+def test_get_providers_returns_410_if_updated_since_too_old(provider, client, django_user_factory):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    response = client.get("/api/v1/providers?updated_since=2000-01-01T00:00:00Z")
+
+    assert response.status_code == 410
@@ -0,0 +1,51 @@
+from io import StringIO
+
+from support.models import ApiToken
+from support.models import hash_token
+
+from django.core.management import call_command
+
+
+def test_create_api_token_prints_key_and_stores_digest(django_user_factory):
+    user = django_user_factory('service', 'test', [])
+    out = StringIO()
+
+    call_command("create_api_token", "service", "client", expires_in_days=30, stdout=out)
+
+    token = ApiToken.objects.get(user=user)
+    key = out.getvalue().strip().rsplit(" ", 1)[-1]
+    assert token.name == "client"
+    assert token.digest == hash_token(key)
+    assert key.startswith(token.prefix)
+    assert token.expires is not None
+
+
+def test_create_api_token_fails_for_unknown_user(db):
+    err = StringIO()
+
+    call_command("create_api_token", "unknown", "client", stderr=err)
+
+    assert "User unknown does not exist" in err.getvalue()
+    assert not ApiToken.objects.exists()
+
+
+def test_authentication_benchmark_reports_cost_per_request(db, shared_api_cache):
+    out = StringIO()
+
+    call_command("authentication_benchmark", requests=5, stdout=out)
+
+    output = out.getvalue()
+    assert "session: " in output
+    assert "token: " in output
+    assert "token: 0.0 µs" not in output
+    assert "0.0 queries per request" in output
+
+
+def test_authentication_benchmark_warns_without_shared_cache(db):
+    out = StringIO()
+
+    call_command("authentication_benchmark", requests=5, stdout=out)
+
+    output = out.getvalue()
+    assert "Permissions and tokens are not cached" in output
+    assert "token: " in output
@@ -0,0 +1,21 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+
+def test_load_benchmark_reports_throughput_and_latencies(live_server):
+    out = StringIO()
+
+    call_command(
+        "load_benchmark",
+        f"{live_server.url}/checker",
+        concurrency=2,
+        requests=10,
+        verbosity=2,
+        stdout=out,
+    )
+
+    output = out.getvalue()
+    assert "10 requests with 0 errors" in output
+    assert "requests/s, p50 " in output
+    assert " ms, p99 " in output
@@ -0,0 +1,193 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from support.models import ApiToken
+from utils.authentication import get_permissions
+from utils.authentication import verify_token
+
+from django.contrib.auth.models import Group
+from django.contrib.auth.models import Permission
+from django.utils import timezone
+
+
+def permission_queries(context):
+    return [query for query in context.captured_queries if "auth_permission" in query["sql"]]
+
+
+def test_api_calls_do_not_query_permissions_once_cached(
+    provider, client, django_user_factory, django_assert_max_num_queries, shared_api_cache
+):
+    django_user_factory('test', 'test', [('provider', 'provider', 'view_provider')])
+    client.login(username='test', password='test')
+
+    with django_assert_max_num_queries(10) as context:
+        assert client.get("/api/v1/providers/ch.bafu").status_code == 200
+    assert permission_queries(context)
+
+    with django_assert_max_num_queries(10) as context:
+        assert client.get("/api/v1/providers/ch.bafu").status_code == 200
+    assert not permission_queries(context)
+
+
+def test_api_calls_are_forbidden_without_permission(client, django_user_factory):
+    django_user_factory('test', 'test', [('access', 'user', 'view_user')])
+    client.login(username='test', password='test')
+
+    assert client.get("/api/v1/providers/ch.bafu").status_code == 403
+    assert client.get("/api/v1/providers/ch.bafu").status_code == 403
+
+
+def test_get_permissions_reloads_permissions_after_membership_change(
+    django_user_factory, django_capture_on_commit_callbacks
+):
+    user = django_user_factory('test', 'test', [])
+    assert get_permissions(user) == frozenset()
+
+    group = Group.objects.create(name="providers")
+    group.permissions.add(Permission.objects.get(codename="view_provider"))
+    with django_capture_on_commit_callbacks(execute=True):
+        user.groups.add(group)
+
+    # A fresh user object, as permissions are also cached on the user by Django
+    user = type(user).objects.get(pk=user.pk)
+    assert get_permissions(user) == frozenset({"provider.view_provider"})
+
+
+def test_get_permissions_is_not_cached_without_shared_cache(
+    django_user_factory, django_assert_num_queries
+):
+    # Revocations in other processes would not bump the version of a per-process cache
+    user = django_user_factory('test', 'test', [])
+
+    for _ in range(2):
+        user = type(user).objects.get(pk=user.pk)
+        with django_assert_num_queries(2):
+            get_permissions(user)
+
+
+@patch("utils.authentication.monotonic")
+def test_get_permissions_expires_cached_permissions(
+    monotonic, django_user_factory, django_assert_num_queries, shared_api_cache
+):
+    user = django_user_factory('test', 'test', [])
+    monotonic.return_value = 1000
+    get_permissions(user)
+
+    # A fresh user object, as permissions are also cached on the user by Django
+    user = type(user).objects.get(pk=user.pk)
+    monotonic.return_value = 1059
+    with django_assert_num_queries(0):
+        get_permissions(user)
+
+    user = type(user).objects.get(pk=user.pk)
+    monotonic.return_value = 1060
+    with django_assert_num_queries(2):
+        get_permissions(user)
+
+
+@patch("utils.authentication.permission_cache_lookups")
+def test_get_permissions_counts_hits_and_misses(counter, django_user_factory, shared_api_cache):
+    user = django_user_factory('test', 'test', [])
+
+    get_permissions(user)
+    get_permissions(user)
+
+    assert [call.args for call in counter.add.call_args_list] == [
+        (1, {
+            "result": "miss"
+        }),
+        (1, {
+            "result": "hit"
+        }),
+    ]
+
+
+def test_api_calls_with_token_do_not_query_database_once_cached(
+    provider, client, django_user_factory, django_assert_max_num_queries, shared_api_cache
+):
+    user = django_user_factory('service', 'test', [('provider', 'provider', 'view_provider')])
+    _, key = ApiToken.create_token(user=user, name="client")
+    headers = {"Authorization": f"Bearer {key}"}
+
+    assert client.get("/api/v1/providers/ch.bafu", headers=headers).status_code == 200
+
+    with django_assert_max_num_queries(10) as context:
+        assert client.get("/api/v1/providers/ch.bafu", headers=headers).status_code == 200
+    # Only the provider is queried (and fingerprinted)
+    assert all("provider_provider" in query["sql"] for query in context.captured_queries)
+
+
+def test_api_calls_with_token_require_permission(provider, client, django_user_factory):
+    user = django_user_factory('service', 'test', [('access', 'user', 'view_user')])
+    _, key = ApiToken.create_token(user=user, name="client")
+
+    response = client.get("/api/v1/providers/ch.bafu", headers={"Authorization": f"Bearer {key}"})
+    assert response.status_code == 403
+
+
+def test_api_calls_with_unknown_or_expired_token_are_unauthorized(
+    provider, client, django_user_factory
+):
+    user = django_user_factory('service', 'test', [('provider', 'provider', 'view_provider')])
+    yesterday = timezone.now() - timedelta(days=1)
+    _, key = ApiToken.create_token(user=user, name="client", expires=yesterday)
+
+    for key in (key, "unknown"):
+        response = client.get(
+            "/api/v1/providers/ch.bafu", headers={"Authorization": f"Bearer {key}"}
+        )
+        assert response.status_code == 401
+
+
+def test_verify_token_rejects_deleted_token(
+    django_user_factory, django_capture_on_commit_callbacks
+):
+    user = django_user_factory('service', 'test', [])
+    token, key = ApiToken.create_token(user=user, name="client")
+    assert verify_token(key) == user
+
+    with django_capture_on_commit_callbacks(execute=True):
+        token.delete()
+
+    assert verify_token(key) is None
+
+
+def test_verify_token_rejects_deactivated_user(
+    django_user_factory, django_capture_on_commit_callbacks
+):
+    user = django_user_factory('service', 'test', [])
+    _, key = ApiToken.create_token(user=user, name="client")
+    assert verify_token(key) == user
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.is_active = False
+        user.save()
+
+    assert verify_token(key) is None
+
+
+def test_verify_token_is_not_cached_without_shared_cache(django_user_factory):
+    user = django_user_factory('service', 'test', [])
+    token, key = ApiToken.create_token(user=user, name="client")
+    assert verify_token(key) == user
+
+    # Deleted by another process, whose version bump is not seen by this one
+    token.delete()
+
+    assert verify_token(key) is None
+
+
+@patch("utils.authentication.monotonic")
+def test_verify_token_expires_cached_tokens(monotonic, django_user_factory, shared_api_cache):
+    user = django_user_factory('service', 'test', [])
+    _, key = ApiToken.create_token(user=user, name="client")
+    monotonic.return_value = 1000
+    assert verify_token(key) == user
+
+    # Deactivated without signals, so without version bump
+    type(user).objects.filter(pk=user.pk).update(is_active=False)
+    monotonic.return_value = 1059
+    assert verify_token(key) == user
+
+    monotonic.return_value = 1060
+    assert verify_token(key) is None
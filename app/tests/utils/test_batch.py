@@ -0,0 +1,46 @@
+from ninja.errors import HttpError
+from provider.models import Provider
+from pytest import raises
+from utils.batch import get_by_ids
+from utils.batch import parse_ids
+
+
+def test_parse_ids_returns_ids_in_order_without_duplicates():
+    assert parse_ids("b, a,,b,c ") == ["b", "a", "c"]
+
+
+def test_get_by_ids_returns_models_in_order_of_ids_and_missing_ids(
+    provider, django_assert_num_queries
+):
+    other = Provider.objects.create(
+        provider_id="ch.swisstopo",
+        acronym_de="swisstopo",
+        acronym_fr="swisstopo",
+        acronym_en="swisstopo",
+        name_de="swisstopo",
+        name_fr="swisstopo",
+        name_en="swisstopo",
+    )
+
+    with django_assert_num_queries(1):
+        models, missing = get_by_ids(
+            Provider.objects.all(), "provider_id", ["ch.swisstopo", "ch.unknown", "ch.bafu"]
+        )
+
+    assert models == [other, provider]
+    assert missing == ["ch.unknown"]
+
+
+def test_get_by_ids_raises_400_if_no_ids_given(db):
+    with raises(HttpError) as error:
+        get_by_ids(Provider.objects.all(), "provider_id", [])
+    assert error.value.status_code == 400
+
+
+def test_get_by_ids_raises_400_if_too_many_ids_given(db, settings):
+    settings.API_BATCH_MAX_IDS = 2
+
+    with raises(HttpError) as error:
+        get_by_ids(Provider.objects.all(), "provider_id", ["a", "b", "c"])
+    assert error.value.status_code == 400
+    assert error.value.message == "Too many IDs, at most 2 are allowed"
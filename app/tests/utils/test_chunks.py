@@ -0,0 +1,36 @@
+from provider.models import Provider
+from pytest import raises
+from utils.chunks import batches
+from utils.chunks import chunk_transaction
+from utils.chunks import stream
+
+from django.db import connection
+
+
+def test_batches_splits_items():
+    assert [list(batch) for batch in batches(range(5), 2)] == [[0, 1], [2, 3], [4]]
+    assert [list(batch) for batch in batches(range(5), 0)] == [[0, 1, 2, 3, 4]]
+
+
+def test_chunk_transaction_rolls_back_failed_chunk(provider):
+    with chunk_transaction(1, Provider):
+        Provider.objects.filter(pk=provider.pk).update(name_de="first")
+    with raises(RuntimeError):
+        with chunk_transaction(1, Provider):
+            Provider.objects.filter(pk=provider.pk).update(name_de="second")
+            raise RuntimeError("interrupted")
+
+    provider.refresh_from_db()
+    assert provider.name_de == "first"
+
+
+def test_stream_returns_all_rows(provider):
+    assert list(stream(Provider.objects.all(), 1)) == [provider]
+    assert [row["provider_id"] for row in stream(Provider.objects.values(), 1)] == ["ch.bafu"]
+
+
+def test_stream_does_not_open_transaction_on_default_database(transactional_db, provider):
+    rows = stream(Provider.objects.all(), 1)
+
+    assert next(rows) == provider
+    assert not connection.in_atomic_block
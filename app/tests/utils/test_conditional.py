@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+from access.models import User
+from distributions.models import Attribution
+from distributions.models import Dataset
+from provider.models import Provider
+from support.models import Tombstone
+from utils.conditional import get_fingerprints
+
+
+def test_get_fingerprints_returns_count_and_last_update_per_model(attribution):
+    fingerprints = {
+        label: (count, updated)
+        for label, count, updated in get_fingerprints([Provider, Attribution, Dataset])
+    }
+
+    assert fingerprints == {
+        "provider.Provider": (1, attribution.provider.updated),
+        "provider.Provider:deleted": (0, None),
+        "distributions.Attribution": (1, attribution.updated),
+        "distributions.Attribution:deleted": (0, None),
+        "distributions.Dataset": (0, None),
+        "distributions.Dataset:deleted": (0, None),
+    }
+
+
+def test_get_fingerprints_uses_a_single_query(attribution, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        get_fingerprints([Provider, Attribution, Dataset])
+
+
+def test_get_fingerprints_include_deletions(attribution):
+    provider = Provider.objects.create(
+        provider_id="ch.swisstopo",
+        acronym_de="swisstopo",
+        acronym_fr="swisstopo",
+        acronym_en="swisstopo",
+        name_de="Bundesamt für Landestopografie",
+        name_fr="Office fédéral de topographie",
+        name_en="Federal Office of Topography",
+    )
+    provider.delete()
+    deleted = Tombstone.objects.get(object_id="ch.swisstopo").deleted
+
+    fingerprints = {
+        label: (count, updated) for label, count, updated in get_fingerprints([Provider])
+    }
+
+    assert fingerprints == {
+        "provider.Provider": (1, attribution.provider.updated),
+        "provider.Provider:deleted": (1, deleted),
+    }
+
+
+@patch('access.models.Client')
+def test_get_fingerprints_include_disabled_rows(client, provider):
+    user = User.objects.create(
+        username="dude",
+        first_name="Jeffrey",
+        last_name="Lebowski",
+        email="dude@bowling.com",
+        provider=provider
+    )
+    user.disable()
+
+    fingerprints = {label: (count, updated) for label, count, updated in get_fingerprints([User])}
+
+    assert fingerprints == {
+        "access.User": (0, None),
+        "access.User:deleted": (0, None),
+        "access.User:disabled": (1, user.deleted_at),
+    }
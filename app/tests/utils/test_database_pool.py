@@ -0,0 +1,47 @@
+from unittest.mock import patch
+
+from psycopg_pool import ConnectionPool
+from pytest import fixture
+from utils.database_pool import get_pools
+from utils.database_pool import observe_connections
+from utils.database_pool import observe_requests
+from utils.database_pool import observe_utilization
+from utils.database_pool import observe_waiting
+
+from django.db import connection
+
+
+@fixture(name='pool')
+def fixture_pool(db):
+    pool = ConnectionPool(
+        kwargs=connection.get_connection_params(),
+        min_size=1,
+        max_size=4,
+        name="default",
+        open=True
+    )
+    pool.wait()
+    with patch("utils.database_pool.get_pools", return_value={"default": pool}):
+        yield pool
+    pool.close()
+
+
+def values(observations):
+    return {tuple(sorted(o.attributes.items())): o.value for o in observations}
+
+
+def test_get_pools_is_empty_without_pooling():
+    assert not get_pools()
+
+
+def test_pool_metrics_report_used_connections(pool):
+    with pool.connection():
+        assert values(observe_connections(None)) == {
+            (("database", "default"), ("state", "idle")): 0,
+            (("database", "default"), ("state", "used")): 1,
+        }
+        assert values(observe_utilization(None)) == {(("database", "default"),): 0.25}
+
+    assert values(observe_connections(None))[(("database", "default"), ("state", "used"))] == 0
+    assert values(observe_waiting(None)) == {(("database", "default"),): 0}
+    assert values(observe_requests(None)) == {(("database", "default"),): 1}
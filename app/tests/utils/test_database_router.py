@@ -1,6 +1,17 @@
+from time import time
+
+from asgiref.sync import async_to_sync
+from asgiref.sync import sync_to_async
 from bod.models import BodContactOrganisation
 from provider.models import Provider
+from pytest import fixture
 from pytest import raises
+from utils.database_router import PINNED_UNTIL_SESSION_KEY
+from utils.database_router import ReplicaRoutingMiddleware
+
+from django.contrib.auth import get_user_model
+from django.db import router
+from django.http import HttpResponse
 
 
 def test_database_routing_inside_tests():
@@ -23,3 +34,95 @@ def test_writing_to_bod_not_supported_outside_tests(settings, db):
     settings.TESTING = False
     with raises(RuntimeError):
         BodContactOrganisation.objects.create()
+
+
+@fixture(name='replica')
+def fixture_replica(settings):
+    settings.TESTING = False
+    settings.DATABASES = {**settings.DATABASES, 'replica': settings.DATABASES['default']}
+
+
+def read_database(rf, method='get', path='/api/v1/providers', **kwargs):
+    databases = []
+
+    def view(request):
+        databases.append(Provider.objects.db)
+        return HttpResponse()
+
+    ReplicaRoutingMiddleware(view)(getattr(rf, method)(path, **kwargs))
+    return databases[0]
+
+
+def test_database_routing_uses_replica_for_api_reads(replica, rf):
+    assert read_database(rf) == 'replica'
+    assert read_database(rf, path='/admin/') == 'default'
+    assert read_database(rf, method='post') == 'default'
+    assert Provider.objects.db == 'default'
+
+
+def test_database_routing_does_not_use_replica_without_replica(settings, rf):
+    settings.TESTING = False
+    assert read_database(rf) == 'default'
+
+
+def test_database_routing_does_not_use_replica_for_other_apps(replica, rf):
+    databases = []
+
+    def view(request):
+        databases.append(get_user_model().objects.db)
+        return HttpResponse()
+
+    ReplicaRoutingMiddleware(view)(rf.get('/api/v1/providers'))
+    assert databases == ['default']
+
+
+def test_database_routing_reads_from_primary_after_write_in_request(replica, rf):
+    databases = []
+
+    def view(request):
+        databases.append(Provider.objects.db)
+        router.db_for_write(Provider)
+        databases.append(Provider.objects.db)
+        return HttpResponse()
+
+    ReplicaRoutingMiddleware(view)(rf.get('/api/v1/providers'))
+    assert databases == ['replica', 'default']
+
+
+def test_database_routing_pins_session_to_primary_after_write(replica, rf, settings):
+    session = {}
+
+    def request(method, write):
+        databases = []
+
+        def view(request):
+            databases.append(Provider.objects.db)
+            if write:
+                router.db_for_write(Provider)
+            return HttpResponse()
+
+        request = getattr(rf, method)('/api/v1/providers')
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = 'key'
+        request.session = session
+        ReplicaRoutingMiddleware(view)(request)
+        return databases[0]
+
+    assert request('get', write=False) == 'replica'
+    assert request('post', write=True) == 'default'
+    assert request('get', write=False) == 'default'
+
+    session[PINNED_UNTIL_SESSION_KEY] = time() - 1
+    assert request('get', write=False) == 'replica'
+
+
+def test_database_routing_uses_replica_for_async_api_reads(replica, rf):
+    databases = []
+
+    async def view(request):
+        databases.append(Provider.objects.db)
+        await sync_to_async(router.db_for_write)(Provider)
+        databases.append(Provider.objects.db)
+        return HttpResponse()
+
+    async_to_sync(ReplicaRoutingMiddleware(view))(rf.get('/api/v1/providers'))
+    assert databases == ['replica', 'default']
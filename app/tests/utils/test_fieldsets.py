@@ -0,0 +1,120 @@
+from distributions.models import Dataset
+from ninja.errors import HttpError
+from provider.models import Provider
+from pytest import raises
+from utils.fieldsets import attribute_field
+from utils.fieldsets import get_columns
+from utils.fieldsets import get_row_or_404
+from utils.fieldsets import parse_fields
+from utils.fieldsets import project
+from utils.fieldsets import to_values
+from utils.fieldsets import translated_field
+from utils.fieldsets import translations_field
+from utils.language import LanguageCode
+
+from django.http import Http404
+
+FIELDSET = {
+    "id": attribute_field("dataset_id"),
+    "title": translated_field("title"),
+    "title_translations": translations_field("title"),
+    "provider_id": attribute_field("provider.provider_id"),
+}
+
+ROW = {
+    "dataset_id": "ch.bafu.dataset",
+    "title_de": "",
+    "title_fr": "Titre",
+    "title_it": None,
+    "title_rm": None,
+    "title_en": "Title",
+    "title": "Titre",
+    "provider__provider_id": "ch.bafu",
+}
+
+
+def test_parse_fields_returns_none_if_not_given():
+    assert parse_fields(None, FIELDSET) is None
+
+
+def test_parse_fields_returns_fields_in_fieldset_order():
+    assert parse_fields(" title,id ,", FIELDSET) == ["id", "title"]
+
+
+def test_parse_fields_raises_400_if_unknown():
+    with raises(HttpError) as error:
+        parse_fields("id,name,foo", FIELDSET)
+    assert error.value.status_code == 400
+    assert error.value.message == "Unknown fields: foo, name"
+
+
+def test_parse_fields_raises_400_if_empty():
+    with raises(HttpError) as error:
+        parse_fields(",", FIELDSET)
+    assert error.value.status_code == 400
+
+
+def test_get_columns_returns_columns_of_given_fields():
+    assert get_columns(FIELDSET, ["id", "provider_id"]) == ["dataset_id", "provider__provider_id"]
+
+
+def test_get_columns_does_not_return_columns_of_translated_fields():
+    assert get_columns(FIELDSET, ["id", "title"]) == ["dataset_id"]
+
+
+def test_get_columns_returns_all_columns_if_no_fields_given():
+    assert get_columns(FIELDSET) == [
+        "dataset_id",
+        "title_de",
+        "title_fr",
+        "title_it",
+        "title_rm",
+        "title_en",
+        "provider__provider_id",
+    ]
+
+
+def test_to_values_computes_fields_of_row():
+    assert to_values(ROW, LanguageCode.FRENCH, FIELDSET, ["id", "title"]) == {
+        "id": "ch.bafu.dataset", "title": "Titre"
+    }
+
+
+def test_to_values_excludes_none_values_of_translations():
+    values = to_values(ROW, LanguageCode.FRENCH, FIELDSET, exclude_none=True)
+
+    assert values["title_translations"] == {"de": "", "fr": "Titre", "en": "Title"}
+    assert values["provider_id"] == "ch.bafu"
+
+
+def test_get_row_or_404_returns_row(provider):
+    row = get_row_or_404(Provider.objects.values("provider_id"), provider_id="ch.bafu")
+    assert row == {"provider_id": "ch.bafu"}
+
+
+def test_get_row_or_404_raises_404_if_not_found(db):
+    with raises(Http404):
+        get_row_or_404(Dataset.objects.values("dataset_id"), dataset_id="ch.unknown")
+
+
+def test_project_resolves_translations_in_database(provider):
+    provider.name_it = ""
+    provider.save()
+    fieldset = {"id": attribute_field("provider_id"), "name": translated_field("name")}
+
+    rows = project(Provider.objects.all(), fieldset, LanguageCode.GERMAN)
+    assert list(rows) == [{"provider_id": "ch.bafu", "name": provider.name_de}]
+
+    rows = project(Provider.objects.all(), fieldset, LanguageCode.ITALIAN)
+    assert list(rows) == [{"provider_id": "ch.bafu", "name": provider.name_en}]
+
+
+def test_project_joins_only_needed_relations(db):
+    sql = str(project(Dataset.objects.all(), FIELDSET, LanguageCode.GERMAN, ["id", "title"]).query)
+    assert "JOIN" not in sql
+    assert "title_de" in sql
+    assert "title_fr" not in sql
+
+    sql = str(project(Dataset.objects.all(), FIELDSET, LanguageCode.GERMAN, ["provider_id"]).query)
+    assert "provider_provider" in sql
+    assert "attribution" not in sql
@@ -1,7 +1,9 @@
 import pytest
+from provider.models import Provider
 from utils.language import LanguageCode
 from utils.language import get_language
 from utils.language import get_translation
+from utils.language import resolve_translation
 
 
 def test_get_language_returns_value_of_query_param_if_defined():
@@ -115,3 +117,13 @@ def test_get_translation_raises_exception_if_even_default_field_none():
 
     with pytest.raises(AttributeError):
         get_translation(obj=test, field_name="field1", lang="de", default_lang="en")
+
+
+def test_resolve_translation_falls_back_to_default_if_null(provider):
+    provider.acronym_rm = None
+    provider.save()
+
+    acronyms = Provider.objects.values_list(
+        resolve_translation("acronym", LanguageCode.ROMANSH), flat=True
+    )
+    assert list(acronyms) == ["FOEN"]
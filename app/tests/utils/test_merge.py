@@ -0,0 +1,48 @@
+from access.models import CognitoSyncState
+from provider.models import Provider
+from support.models import Tombstone
+from utils.merge import merge_rows
+
+from django.utils import timezone
+
+
+def test_merge_rows_sets_auto_now_fields_of_changed_rows(provider):
+    created, updated = provider.created, provider.updated
+
+    result = merge_rows(Provider, ["provider_id"], ["name_en"], [], [("ch.bafu", "Changed")])
+
+    assert [row.new for row in result.updated] == [{"name_en": "Changed"}]
+    provider.refresh_from_db()
+    assert provider.name_en == "Changed"
+    assert provider.created == created
+    assert provider.updated > updated
+
+
+def test_merge_rows_sets_auto_now_add_fields_of_added_rows(db):
+    before = timezone.now()
+    tombstone = Tombstone.objects.create(model="provider.Provider", object_id="ch.bafu")
+
+    rows = [("ch.bafu", "provider.Provider"), ("ch.bafu.kt", "distributions.Attribution")]
+
+    result = merge_rows(Tombstone, ["object_id"], ["model"], [], rows)
+
+    assert [row.key for row in result.added] == [("ch.bafu.kt",)]
+    assert not result.updated
+    assert Tombstone.objects.get(pk=tombstone.pk).deleted == tombstone.deleted
+    assert Tombstone.objects.get(object_id="ch.bafu.kt").deleted >= before
+
+
+def test_merge_rows_supports_models_without_timestamps(db):
+    synced = timezone.now()
+    CognitoSyncState.objects.create(user_id="1", remote_hash="old", synced=synced)
+
+    rows = [("1", "new", synced), ("2", "added", synced)]
+
+    result = merge_rows(CognitoSyncState, ["user_id"], ["remote_hash", "synced"], [], rows)
+
+    assert [row.key for row in result.added] == [("2",)]
+    assert [row.key for row in result.updated] == [("1",)]
+    assert dict(CognitoSyncState.objects.values_list("user_id", "remote_hash")) == {
+        "1": "new",
+        "2": "added",
+    }
@@ -0,0 +1,26 @@
+from ninja.errors import HttpError
+from pytest import raises
+from utils.pagination import decode_cursor
+from utils.pagination import encode_cursor
+
+
+def test_encode_and_decode_cursor_roundtrips_strings():
+    assert decode_cursor(
+        encode_cursor("ch.bafu.neophyten-haargurke")
+    ) == "ch.bafu.neophyten-haargurke"
+
+
+def test_encode_and_decode_cursor_roundtrips_integers():
+    assert decode_cursor(encode_cursor(42)) == 42
+
+
+def test_decode_cursor_raises_400_if_malformed():
+    with raises(HttpError) as error:
+        decode_cursor("not a cursor")
+    assert error.value.status_code == 400
+
+
+def test_decode_cursor_raises_400_if_unsupported_type():
+    with raises(HttpError) as error:
+        decode_cursor(encode_cursor(["a", "b"]))  # type: ignore[arg-type]
+    assert error.value.status_code == 400
@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+from datetime import timezone
+from decimal import Decimal
+
+from config.api import api
+from ninja.responses import NinjaJSONEncoder
+from pytest import mark
+from schemas import TranslationsSchema
+from utils.language import LanguageCode
+from utils.renderers import ORJSONRenderer
+from utils.renderers import dumps
+from utils.renderers import json_response
+
+
+def test_dumps_formats_values_like_ninja():
+    data = {
+        "updated": datetime(2025, 1, 31, 12, 0, 0, 123456, tzinfo=timezone.utc),
+        "lang": LanguageCode.GERMAN,
+        "amount": Decimal("1.50"),
+        "translations": TranslationsSchema(de="de", fr="fr", en="en", it=None, rm=None),
+        "items": [1, "a", None, True],
+    }
+
+    assert json.loads(dumps(data)) == json.loads(json.dumps(data, cls=NinjaJSONEncoder))
+    assert b'"updated":"2025-01-31T12:00:00.123Z"' in dumps(data)
+
+
+def test_json_response_renders_data():
+    response = json_response({"items": [{"id": "ch.bafu"}]})
+
+    assert response["Content-Type"] == "application/json; charset=utf-8"
+    assert response.content == b'{"items":[{"id":"ch.bafu"}]}'
+
+
+def test_api_renders_with_orjson():
+    assert isinstance(api.renderer, ORJSONRenderer)
+
+
+@mark.parametrize(
+    "path,schema",
+    [
+        ("/api/v1/providers", "ProviderListSchema"),
+        ("/api/v1/providers/{provider_id}", "ProviderSchema"),
+        ("/api/v1/attributions", "AttributionListSchema"),
+        ("/api/v1/datasets", "DatasetListSchema"),
+        ("/api/v1/datasets/{dataset_id}", "DatasetSchema"),
+        ("/api/v1/users", "UserListSchema"),
+    ],
+)
+def test_openapi_schema_documents_response_schemas(path, schema):
+    operation = api.get_openapi_schema()["paths"][path]["get"]
+
+    content = operation["responses"][200]["content"]["application/json"]
+    assert content["schema"] == {"$ref": f"#/components/schemas/{schema}"}
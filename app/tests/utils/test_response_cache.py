@@ -0,0 +1,43 @@
+from distributions.models import Attribution
+from provider.models import Provider
+from utils.response_cache import bump_version
+from utils.response_cache import get_versions
+
+
+def test_get_versions_initializes_missing_counters():
+    versions = get_versions([Provider, Attribution])
+
+    assert len(versions) == 2
+    assert get_versions([Provider, Attribution]) == versions
+
+
+def test_bump_version_increments_only_given_counters():
+    provider_version, attribution_version = get_versions([Provider, Attribution])
+
+    bump_version(Provider)
+
+    assert get_versions([Provider, Attribution]) == [provider_version + 1, attribution_version]
+
+
+def test_saving_a_model_bumps_its_version_on_commit(provider, django_capture_on_commit_callbacks):
+    version = get_versions([Provider])[0]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        provider.name_en = "Changed"
+        provider.save()
+        assert get_versions([Provider])[0] == version
+
+    assert get_versions([Provider])[0] == version + 1
+
+
+def test_deleting_a_model_does_not_bump_its_version(
+    attribution, django_capture_on_commit_callbacks
+):
+    version = get_versions([Attribution])[0]
+
+    # Deletions change the tombstones (and thus the cache key) instead, see the API tests
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        attribution.delete()
+
+    assert not callbacks
+    assert get_versions([Attribution])[0] == version
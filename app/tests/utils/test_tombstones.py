@@ -0,0 +1,85 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+from distributions.models import Attribution
+from ninja.errors import HttpError
+from provider.models import Provider
+from pytest import raises
+from support.models import Tombstone
+from utils.tombstones import filter_updated_since
+from utils.tombstones import get_deleted_ids
+from utils.tombstones import parse_updated_since
+from utils.tombstones import purge_tombstones
+
+from django.utils import timezone
+
+
+def test_deleting_provider_records_tombstone(provider):
+    since = timezone.now()
+
+    provider.delete()
+
+    assert get_deleted_ids(Provider, "provider_id", since) == ["ch.bafu"]
+    assert not get_deleted_ids(Provider, "provider_id", timezone.now())
+
+
+def test_deleting_queryset_records_tombstones_of_cascades(attribution):
+    since = timezone.now()
+
+    Provider.objects.all().delete()
+
+    assert get_deleted_ids(Provider, "provider_id", since) == ["ch.bafu"]
+    assert get_deleted_ids(Attribution, "attribution_id", since) == ["ch.bafu.kt"]
+
+
+def test_deleting_queryset_records_tombstones_without_extra_queries(
+    attribution, django_assert_max_num_queries
+):
+    with django_assert_max_num_queries(10) as captured:
+        Provider.objects.all().delete()
+
+    assert not [query for query in captured if "support_tombstone" in query["sql"]]
+    assert Tombstone.objects.count() == 2
+
+
+def test_get_deleted_ids_excludes_recreated_objects(provider):
+    since = timezone.now()
+    provider.delete()
+
+    provider.pk = None
+    provider.save()
+
+    assert not get_deleted_ids(Provider, "provider_id", since)
+
+
+def test_purge_tombstones_removes_expired_tombstones(provider, settings):
+    settings.API_TOMBSTONE_RETENTION_DAYS = 1
+    Tombstone.objects.create(model="provider.Provider", object_id="ch.expired")
+    Tombstone.objects.update(deleted=timezone.now() - timedelta(days=2))
+    provider.delete()
+
+    assert purge_tombstones() == 1
+
+    assert list(Tombstone.objects.values_list("object_id", flat=True)) == ["ch.bafu"]
+
+
+def test_parse_updated_since_makes_naive_timestamps_aware():
+    now = datetime.now(dt_timezone.utc)
+
+    assert parse_updated_since(now.replace(tzinfo=None)) == now
+
+
+def test_parse_updated_since_raises_410_if_older_than_retention(settings):
+    settings.API_TOMBSTONE_RETENTION_DAYS = 1
+
+    with raises(HttpError) as error:
+        parse_updated_since(timezone.now() - timedelta(days=2))
+    assert error.value.status_code == 410
+
+
+def test_filter_updated_since_filters_only_if_given(provider):
+    later = timezone.now()
+
+    assert list(filter_updated_since(Provider.objects.all(), None)) == [provider]
+    assert not filter_updated_since(Provider.objects.all(), later).exists()
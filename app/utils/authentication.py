@@ -1,9 +1,189 @@
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from time import monotonic
 from typing import Any
+from typing import Generic
+from typing import Hashable
+from typing import TypeVar
 
 from ninja.errors import HttpError
+from ninja.security import HttpBearer
+from ninja.security.base import AuthBase
 from ninja.security.session import SessionAuth
+from opentelemetry.metrics import get_meter
+from support.models import ApiToken
+from support.models import hash_token
 
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.contrib.auth.models import Permission
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
 from django.http import HttpRequest
+from django.utils import timezone
+
+from .response_cache import bump_version_on_commit
+from .response_cache import get_versions
+from .response_cache import is_shared_cache
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+ValueT = TypeVar("ValueT")
+
+
+class LRUCache(Generic[KeyT, ValueT]):
+    """
+    A thread-safe per-process cache evicting the least recently used entries once the number of
+    entries given by the setting of the given name is exceeded, and the entries older than the
+    number of seconds given by the timeout setting.
+
+    The entries are keyed by version counters of the "api" cache. If that cache is local to the
+    process, changes made by other processes would never be seen, so nothing is cached then.
+    """
+
+    def __init__(self, max_entries_setting: str, timeout_setting: str) -> None:
+        self.max_entries_setting = max_entries_setting
+        self.timeout_setting = timeout_setting
+        self.entries: OrderedDict[KeyT, tuple[float, ValueT]] = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key: KeyT) -> ValueT | None:
+        if not is_shared_cache():
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: KeyT, value: ValueT) -> None:
+        if not is_shared_cache():
+            return
+        with self.lock:
+            self.entries[key] = (monotonic() + int(getattr(settings, self.timeout_setting)), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > int(getattr(settings, self.max_entries_setting)):
+                self.entries.popitem(last=False)
+
+
+# Permission sets of users, keyed by user ID and permission version
+_permissions: LRUCache[
+    tuple[Any, int],
+    frozenset[str]] = LRUCache("PERMISSION_CACHE_MAX_ENTRIES", "PERMISSION_CACHE_TIMEOUT")
+
+# Users and expiry dates of verified API tokens, keyed by digest and token version
+_tokens: LRUCache[tuple[str, int],
+                  tuple[User, datetime |
+                        None]] = LRUCache("API_TOKEN_CACHE_MAX_ENTRIES", "API_TOKEN_CACHE_TIMEOUT")
+
+meter = get_meter(__name__)
+permission_cache_lookups = meter.create_counter(
+    "permission_cache.lookups",
+    unit="{lookup}",
+    description="Lookups of the per-process permission cache, by result (hit or miss)",
+)
+
+
+def get_permissions(user: User) -> frozenset[str]:
+    """
+    Return all permissions of the given user (e.g. "provider.view_provider").
+
+    The permissions are cached per process for `PERMISSION_CACHE_TIMEOUT` seconds, keyed by the
+    user ID and the permission version, which is bumped whenever groups, permissions or
+    memberships change (see `invalidate_permissions_on_change`). The least recently used sets are
+    evicted once `PERMISSION_CACHE_MAX_ENTRIES` is reached. Nothing is cached unless the "api"
+    cache holding the version is shared by all processes.
+    """
+    key = (user.pk, get_versions([Permission])[0])
+    permissions = _permissions.get(key)
+    if permissions is not None:
+        permission_cache_lookups.add(1, {"result": "hit"})
+        return permissions
+
+    permission_cache_lookups.add(1, {"result": "miss"})
+    permissions = frozenset(user.get_all_permissions())
+    _permissions.set(key, permissions)
+    return permissions
+
+
+def has_permission(user: Any, permission: str) -> bool:
+    """
+    Same as `user.has_perm`, but with the permissions of the cache (see `get_permissions`).
+    """
+    if not user.is_active:
+        return False
+    if user.is_superuser:
+        return True
+    return permission in get_permissions(user)
+
+
+def invalidate_permissions_on_change() -> None:
+    """
+    Connect the signals of groups, permissions and memberships to the permission version.
+    """
+
+    def receiver(**kwargs: Any) -> None:
+        bump_version_on_commit(Permission)
+
+    for model in (Group, Permission):
+        uid = f"permission_cache_{model._meta.label}"
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=f"{uid}_save")
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=f"{uid}_delete")
+    for through in (User.groups.through, User.user_permissions.through, Group.permissions.through):
+        m2m_changed.connect(
+            receiver,
+            sender=through,
+            weak=False,
+            dispatch_uid=f"permission_cache_{through._meta.label}",
+        )
+
+
+def verify_token(key: str) -> User | None:
+    """
+    Return the active user of the unexpired API token with the given key, None if there is none.
+
+    Verified tokens are cached per process for `API_TOKEN_CACHE_TIMEOUT` seconds, keyed by the
+    digest of the key and the token version, which is bumped whenever tokens or users change (see
+    `invalidate_tokens_on_change`). So a client using the same token repeatedly is authenticated
+    without any database query. The least recently used tokens are evicted once
+    `API_TOKEN_CACHE_MAX_ENTRIES` is reached. Nothing is cached unless the "api" cache holding the
+    version is shared by all processes, otherwise deleted tokens and deactivated users would keep
+    authenticating in the other processes.
+    """
+    digest = hash_token(key)
+    cache_key = (digest, get_versions([ApiToken])[0])
+    entry = _tokens.get(cache_key)
+    if entry is None:
+        token = ApiToken.objects.select_related("user").filter(digest=digest).first()
+        if token is None:
+            return None
+        entry = (token.user, token.expires)
+        _tokens.set(cache_key, entry)
+
+    user, expires = entry
+    if not user.is_active or (expires is not None and expires <= timezone.now()):
+        return None
+    return user
+
+
+def invalidate_tokens_on_change() -> None:
+    """
+    Connect the signals of API tokens and users to the token version.
+    """
+
+    def receiver(**kwargs: Any) -> None:
+        bump_version_on_commit(ApiToken)
+
+    for model in (ApiToken, User):
+        uid = f"token_cache_{model._meta.label}"
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=f"{uid}_save")
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=f"{uid}_delete")
 
 
 class PermissionAuth(SessionAuth):
@@ -15,6 +195,33 @@ class PermissionAuth(SessionAuth):
 
     def authenticate(self, request: HttpRequest, key: str | None) -> None | Any:
         user = super().authenticate(request, key)
-        if user is not None and not user.has_perm(self.permission):
+        if user is not None and not has_permission(user, self.permission):
             raise HttpError(403, "Forbidden")
         return user
+
+
+class TokenAuth(HttpBearer):
+    """
+    Ninja authentication for service accounts with API tokens ("Authorization: Bearer <key>"),
+    with the same permission checks as `PermissionAuth`.
+
+    Neither sessions nor CSRF tokens are involved.
+    """
+
+    def __init__(self, permission: str) -> None:
+        super().__init__()
+        self.permission = permission
+
+    def authenticate(self, request: HttpRequest, token: str) -> None | Any:
+        user = verify_token(token)
+        if user is not None and not has_permission(user, self.permission):
+            raise HttpError(403, "Forbidden")
+        return user
+
+
+def permission_auth(permission: str) -> list[AuthBase]:
+    """
+    Return the authentications of API operations requiring the given permission: API tokens for
+    service accounts and sessions.
+    """
+    return [TokenAuth(permission), PermissionAuth(permission)]
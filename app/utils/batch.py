@@ -0,0 +1,74 @@
+from typing import TypeVar
+
+from ninja.errors import HttpError
+
+from django.conf import settings
+from django.db.models import Model
+from django.db.models import QuerySet
+
+from .pagination import get_key
+
+ModelT = TypeVar("ModelT", bound=Model)
+RowT = TypeVar("RowT")
+
+
+def parse_ids(ids: str) -> list[str]:
+    """
+    Return the IDs of the given comma separated list, without duplicates.
+    """
+    return list(dict.fromkeys(id_.strip() for id_ in ids.split(",") if id_.strip()))
+
+
+def check_ids(ids: list[str]) -> list[str]:
+    """
+    Return the given IDs without duplicates.
+
+    Raises an HTTP 400 error if no or too many IDs are given.
+    """
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HttpError(400, "No IDs given")
+    max_ids = int(settings.API_BATCH_MAX_IDS)
+    if len(ids) > max_ids:
+        raise HttpError(400, f"Too many IDs, at most {max_ids} are allowed")
+    return ids
+
+
+def order_by_ids(rows: list[RowT], key: str, ids: list[str]) -> tuple[list[RowT], list[str]]:
+    """
+    Return the given rows in the order of the given IDs and the IDs without a row.
+    """
+    rows_by_id = {get_key(row, key): row for row in rows}
+    found = [rows_by_id[id_] for id_ in ids if id_ in rows_by_id]
+    missing = [id_ for id_ in ids if id_ not in rows_by_id]
+    return found, missing
+
+
+def get_by_ids(
+    queryset: QuerySet[ModelT, RowT],
+    key: str,
+    ids: list[str],
+) -> tuple[list[RowT], list[str]]:
+    """
+    Return the rows of the given queryset whose (unique) key is one of the given IDs, in the
+    order of the IDs, and the IDs which have not been found. The rows can be models or dicts of a
+    `values()` queryset containing the key.
+
+    All rows are loaded with a single query. Raises an HTTP 400 error if no or too many IDs are
+    given.
+    """
+    ids = check_ids(ids)
+    return order_by_ids(list(queryset.filter(**{f"{key}__in": ids})), key, ids)
+
+
+async def aget_by_ids(
+    queryset: QuerySet[ModelT, RowT],
+    key: str,
+    ids: list[str],
+) -> tuple[list[RowT], list[str]]:
+    """
+    Async version of `get_by_ids`.
+    """
+    ids = check_ids(ids)
+    rows = [row async for row in queryset.filter(**{f"{key}__in": ids})]
+    return order_by_ids(rows, key, ids)
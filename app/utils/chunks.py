@@ -0,0 +1,57 @@
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from itertools import batched
+from typing import Any
+from typing import TypeVar
+
+from utils.response_cache import bump_version_on_commit
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db import transaction
+from django.db.models import Model
+from django.db.models import QuerySet
+
+T = TypeVar("T")
+
+
+def batches(items: Iterable[T], size: int) -> Iterable[Iterable[T]]:
+    """
+    Split the items into batches of the given size. All items are returned as one batch if the size
+    is 0.
+    """
+    if not size:
+        return [items]
+    return batched(items, size)
+
+
+@contextmanager
+def chunk_transaction(size: int, *models: type[Model]) -> Iterator[None]:
+    """
+    Commit the changes made within in their own transaction, if committing in chunks of the given
+    size. The cached responses of the given models are invalidated with every commit.
+
+    Without chunks (size 0), the changes are part of the surrounding transaction.
+    """
+    if not size:
+        yield
+        return
+    with transaction.atomic():
+        yield
+        bump_version_on_commit(*models)
+
+
+def stream(queryset: "QuerySet[Any, T]", chunk_size: int) -> Iterator[T]:
+    """
+    Iterate over the queryset with a named server-side cursor, fetching chunks of the given size.
+
+    The cursor is read within a transaction on the database of the queryset, so that the rows are
+    streamed from the server instead of being materialized for a cursor WITH HOLD. This is not done
+    if the queryset is read from the default database (e.g. the BOD in tests), as the commits of
+    `chunk_transaction` would then only be savepoints of this transaction.
+    """
+    if queryset.db == DEFAULT_DB_ALIAS:
+        yield from queryset.iterator(chunk_size=chunk_size)
+        return
+    with transaction.atomic(using=queryset.db):
+        yield from queryset.iterator(chunk_size=chunk_size)
@@ -0,0 +1,197 @@
+from datetime import datetime
+from functools import wraps
+from hashlib import sha256
+from typing import Any
+from typing import Callable
+from typing import Sequence
+from typing import TypeVar
+from typing import cast
+
+from asgiref.sync import iscoroutinefunction
+from support.models import Tombstone
+
+from django.db.models import CharField
+from django.db.models import Count
+from django.db.models import Max
+from django.db.models import Model
+from django.db.models import QuerySet
+from django.db.models import Value
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+
+from .language import get_language
+
+ViewT = TypeVar("ViewT", bound=Callable[..., Any])
+
+Validators = tuple[str, datetime | None]
+
+# Name of the request attribute used to pass the validators to the response
+VALIDATORS_ATTRIBUTE = "_conditional_validators"
+
+
+def aggregate_fingerprint(queryset: QuerySet[Any, Any], label: str,
+                          updated: str) -> QuerySet[Any, tuple[str, int, datetime | None]]:
+    fingerprint: QuerySet[Any, tuple[str, int, datetime | None]]
+    fingerprint = queryset.order_by().annotate(
+        label=Value(label, output_field=CharField())
+    ).values("label").annotate(count=Count("pk"),
+                               updated=Max(updated)).values_list("label", "count", "updated")
+    return fingerprint
+
+
+def get_fingerprint_queryset(
+    models: Sequence[type[Model]]
+) -> QuerySet[Model, tuple[str, int, datetime | None]]:
+    querysets = []
+    for model in models:
+        label = model._meta.label
+        querysets.append(aggregate_fingerprint(model._default_manager.all(), label, "updated"))
+        # Deletions (and disabled rows) must move the fingerprint and Last-Modified forward too
+        tombstones = Tombstone.objects.filter(model=label)
+        querysets.append(aggregate_fingerprint(tombstones, f"{label}:deleted", "deleted"))
+        if any(field.name == "deleted_at" for field in model._meta.get_fields()):
+            disabled = model._base_manager.filter(deleted_at__isnull=False)
+            querysets.append(aggregate_fingerprint(disabled, f"{label}:disabled", "deleted_at"))
+    queryset: QuerySet[Model, tuple[str, int, datetime | None]]
+    queryset = querysets[0].union(*querysets[1:], all=True)
+    return queryset
+
+
+def get_fingerprints(models: Sequence[type[Model]]) -> list[tuple[str, int, datetime | None]]:
+    """
+    Return the row count and the last update timestamp for each of the given models, as well as
+    the count and the last timestamp of their tombstones and disabled rows, if there are any.
+
+    All models are aggregated in a single query without loading any rows.
+    """
+    return list(get_fingerprint_queryset(models))
+
+
+async def aget_fingerprints(
+    models: Sequence[type[Model]]
+) -> list[tuple[str, int, datetime | None]]:
+    """
+    Async version of `get_fingerprints`.
+    """
+    return [fingerprint async for fingerprint in get_fingerprint_queryset(models)]
+
+
+def get_validators(request: HttpRequest, models: Sequence[type[Model]]) -> Validators:
+    """
+    Return the strong ETag and the last modification time of the response to the given request.
+
+    The ETag is derived from the fingerprints of the given models, the requested language and the
+    full path (including the query parameters) of the request.
+    """
+    return build_validators(request, get_fingerprints(models))
+
+
+async def aget_validators(request: HttpRequest, models: Sequence[type[Model]]) -> Validators:
+    """
+    Async version of `get_validators`.
+    """
+    return build_validators(request, await aget_fingerprints(models))
+
+
+def build_validators(
+    request: HttpRequest, fingerprints: list[tuple[str, int, datetime | None]]
+) -> Validators:
+    fingerprints = sorted(fingerprints)
+    lang = get_language(request.GET.get("lang"), request.headers)
+    digest = sha256()
+    for label, count, updated in fingerprints:
+        digest.update(f"{label}:{count}:{updated.isoformat() if updated else ''};".encode())
+    digest.update(f"{lang};{request.get_full_path()}".encode())
+    timestamps = [updated for _, _, updated in fingerprints if updated is not None]
+    return f'"{digest.hexdigest()}"', max(timestamps) if timestamps else None
+
+
+def set_validators(response: HttpResponseBase, validators: Validators) -> None:
+    """
+    Add the ETag and Last-Modified headers to the given response.
+    """
+    etag, last_modified = validators
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    patch_vary_headers(response, ("Accept-Language",))
+
+
+def apply_validators(request: HttpRequest, response: HttpResponseBase) -> None:
+    """
+    Add the validators computed for the given request to the given successful response.
+    """
+    validators = getattr(request, VALIDATORS_ATTRIBUTE, None)
+    if validators is not None and response.status_code == 200:
+        set_validators(response, validators)
+
+
+def get_not_modified(request: HttpRequest, validators: Validators) -> HttpResponseBase | None:
+    """
+    Return a 304 response if the client already has the current version, None otherwise.
+    """
+    etag, last_modified = validators
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()) if last_modified else None
+    )
+    if not_modified is not None:
+        set_validators(not_modified, validators)
+    return not_modified
+
+
+def conditional(*models: type[Model]) -> Callable[[ViewT], ViewT]:
+    """
+    Decorator adding conditional GET support (ETag, If-None-Match, Last-Modified and
+    If-Modified-Since) to an API operation whose response depends on the given models.
+
+    The validators are computed from a cheap fingerprint of the models before the decorated
+    function is called. If the client already has the current version, a 304 is returned without
+    loading or serializing any rows.
+
+    Must be placed below the router decorator, so that it runs after the authentication:
+
+        @router.get("providers", ...)
+        @conditional(Provider)
+        def providers(request: HttpRequest) -> ...:
+            ...
+
+    Async operations are supported too, the fingerprints are then read with the async ORM.
+    """
+
+    def decorator(func: ViewT) -> ViewT:
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+                validators = await aget_validators(request, models)
+                not_modified = get_not_modified(request, validators)
+                if not_modified is not None:
+                    return not_modified
+
+                setattr(request, VALIDATORS_ATTRIBUTE, validators)
+                result = await func(request, *args, **kwargs)
+                if isinstance(result, HttpResponseBase):
+                    apply_validators(request, result)
+                return result
+
+            return cast(ViewT, async_wrapper)
+
+        @wraps(func)
+        def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+            validators = get_validators(request, models)
+            not_modified = get_not_modified(request, validators)
+            if not_modified is not None:
+                return not_modified
+
+            setattr(request, VALIDATORS_ATTRIBUTE, validators)
+            result = func(request, *args, **kwargs)
+            if isinstance(result, HttpResponseBase):
+                apply_validators(request, result)
+            return result
+
+        return cast(ViewT, wrapper)
+
+    return decorator
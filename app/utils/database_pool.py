@@ -0,0 +1,97 @@
+from typing import Iterable
+
+from opentelemetry.metrics import CallbackOptions
+from opentelemetry.metrics import Observation
+from opentelemetry.metrics import get_meter
+from psycopg_pool import ConnectionPool
+
+from django.conf import settings
+from django.db import connections
+
+
+def get_pools() -> dict[str, ConnectionPool]:
+    """
+    Return the open connection pools of this process, by database alias.
+
+    The pools are configured with DB_POOL (see settings) and created per process on the first
+    connection, i.e. in the gunicorn workers after the fork.
+    """
+    pools = {}
+    for alias in settings.DATABASES:
+        if not connections[alias].settings_dict["OPTIONS"].get("pool"):
+            continue
+        pool = connections[alias].pool  # type: ignore[attr-defined]
+        if pool is not None and not pool.closed:
+            pools[alias] = pool
+    return pools
+
+
+def observe_connections(options: CallbackOptions) -> Iterable[Observation]:
+    for alias, pool in get_pools().items():
+        stats = pool.get_stats()
+        idle = stats["pool_available"]
+        yield Observation(stats["pool_size"] - idle, {"database": alias, "state": "used"})
+        yield Observation(idle, {"database": alias, "state": "idle"})
+
+
+def observe_utilization(options: CallbackOptions) -> Iterable[Observation]:
+    for alias, pool in get_pools().items():
+        stats = pool.get_stats()
+        used = stats["pool_size"] - stats["pool_available"]
+        yield Observation(used / stats["pool_max"], {"database": alias})
+
+
+def observe_waiting(options: CallbackOptions) -> Iterable[Observation]:
+    for alias, pool in get_pools().items():
+        yield Observation(pool.get_stats()["requests_waiting"], {"database": alias})
+
+
+def observe_wait_time(options: CallbackOptions) -> Iterable[Observation]:
+    for alias, pool in get_pools().items():
+        yield Observation(pool.get_stats().get("requests_wait_ms", 0), {"database": alias})
+
+
+def observe_requests(options: CallbackOptions) -> Iterable[Observation]:
+    for alias, pool in get_pools().items():
+        yield Observation(pool.get_stats().get("requests_num", 0), {"database": alias})
+
+
+meter = get_meter(__name__)
+
+
+def register_pool_metrics() -> None:
+    """
+    Export the usage of the connection pools and the time spent waiting for connections.
+
+    The values are read from the pools whenever the metrics are collected.
+    """
+    meter.create_observable_gauge(
+        "db.pool.connections",
+        callbacks=[observe_connections],
+        unit="{connection}",
+        description="Connections of the pool, by database and state (used or idle)",
+    )
+    meter.create_observable_gauge(
+        "db.pool.utilization",
+        callbacks=[observe_utilization],
+        unit="1",
+        description="Used connections of the pool relative to its maximum size, by database",
+    )
+    meter.create_observable_gauge(
+        "db.pool.requests_waiting",
+        callbacks=[observe_waiting],
+        unit="{request}",
+        description="Requests currently waiting for a connection of the pool, by database",
+    )
+    meter.create_observable_counter(
+        "db.pool.wait_time",
+        callbacks=[observe_wait_time],
+        unit="ms",
+        description="Total time requests waited for a connection of the pool, by database",
+    )
+    meter.create_observable_counter(
+        "db.pool.requests",
+        callbacks=[observe_requests],
+        unit="{request}",
+        description="Connections requested from the pool, by database",
+    )
@@ -1,19 +1,54 @@
+from contextvars import ContextVar
+from time import time
 from typing import Any
+from typing import Awaitable
+from typing import Callable
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
 
 from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
 from django.db.models import Model
+from django.http import HttpRequest
+from django.http import HttpResponse
+
+REPLICA_DB_ALIAS = "replica"
+
+# Name of the session key pinning a client to the primary until the given timestamp
+PINNED_UNTIL_SESSION_KEY = "_replica_pinned_until"
+
+# Whether reads of the current request may be sent to the replica and whether the current
+# request has written anything (see `ReplicaRoutingMiddleware`)
+_read_from_replica: ContextVar[bool] = ContextVar("read_from_replica", default=False)
+_written: ContextVar[bool] = ContextVar("written", default=False)
+
+
+def use_replica(model: type[Model]) -> bool:
+    """
+    Return True if the given model should be read from the replica.
+
+    This is the case for the models of the apps in `DB_REPLICA_APPS` while handling a read
+    request of the API which has not written anything yet, outside of transactions.
+    """
+    return (
+        _read_from_replica.get() and not _written.get() and
+        model._meta.app_label in settings.DB_REPLICA_APPS and
+        REPLICA_DB_ALIAS in settings.DATABASES and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
 
 
 class CustomRouter:
     """
 
-    A custom router allowing to additionally read from a BOD. Ensures that
-    tests use the default database.
+    A custom router allowing to additionally read from a BOD and from a read replica of the
+    default database. Ensures that tests use the default database.
 
     """
 
-    def db_for_read(self, model: Model, **hints: Any) -> str | None:
-        """ Use BOD for reading BOD models. """
+    def db_for_read(self, model: type[Model], **hints: Any) -> str | None:
+        """ Use BOD for reading BOD models and the replica for API reads (see `use_replica`). """
 
         if settings.TESTING:
             return None
@@ -21,11 +56,17 @@ class CustomRouter:
         if model._meta.app_label == 'bod':
             return 'bod'
 
+        if use_replica(model):
+            return REPLICA_DB_ALIAS
+
         return None
 
-    def db_for_write(self, model: Model, **hints: Any) -> str | None:
+    def db_for_write(self, model: type[Model], **hints: Any) -> str | None:
         """ Use BOD for writing BOD models during tests. """
 
+        # Read your writes: the rest of the request reads from the primary
+        _written.set(True)
+
         if settings.TESTING:
             return None
 
@@ -34,10 +75,22 @@ class CustomRouter:
 
         return None
 
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> bool | None:
+        """ Allow relations between objects of the default database and its replica. """
+
+        databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
     def allow_migrate(
         self, db: Any, app_label: str, model_name: Any = None, **hints: Any
     ) -> bool | None:
-        """ Allow BOD migrations only during tests. """
+        """ Allow BOD migrations only during tests, never migrate the replica. """
+
+        if db == REPLICA_DB_ALIAS:
+            return False
 
         if settings.TESTING:
             return None
@@ -46,3 +99,71 @@ class CustomRouter:
             return False
 
         return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends the reads of GET and HEAD requests of the API to the replica database, if there is one
+    (see `CustomRouter`).
+
+    Reads go to the primary again after a write in the same request. Clients with a session are
+    additionally pinned to the primary for `DB_REPLICA_STICKINESS` seconds after a request that
+    has written anything, so they read their own writes despite the replication lag.
+
+    Must be placed after the session middleware. Supports both WSGI and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse | Awaitable[HttpResponse]:
+        if self.async_mode:
+            return self.__acall__(request)
+
+        replica = self.is_read_request(request) and not self.is_pinned(request)
+        read_from_replica_token = _read_from_replica.set(replica)
+        written_token = _written.set(False)
+        try:
+            response: HttpResponse = self.get_response(request)
+            if _written.get() and self.has_session(request):
+                stickiness = int(settings.DB_REPLICA_STICKINESS)
+                request.session[PINNED_UNTIL_SESSION_KEY] = time() + stickiness
+            return response
+        finally:
+            _read_from_replica.reset(read_from_replica_token)
+            _written.reset(written_token)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        replica = self.is_read_request(request) and not await self.ais_pinned(request)
+        read_from_replica_token = _read_from_replica.set(replica)
+        written_token = _written.set(False)
+        try:
+            response: HttpResponse = await self.get_response(request)
+            if _written.get() and self.has_session(request):
+                stickiness = int(settings.DB_REPLICA_STICKINESS)
+                await request.session.aset(PINNED_UNTIL_SESSION_KEY, time() + stickiness)
+            return response
+        finally:
+            _read_from_replica.reset(read_from_replica_token)
+            _written.reset(written_token)
+
+    def is_read_request(self, request: HttpRequest) -> bool:
+        return request.path.startswith('/api/') and request.method in ('GET', 'HEAD')
+
+    def has_session(self, request: HttpRequest) -> bool:
+        return settings.SESSION_COOKIE_NAME in request.COOKIES and hasattr(request, 'session')
+
+    def is_pinned(self, request: HttpRequest) -> bool:
+        if not self.has_session(request):
+            return False
+        return bool(request.session.get(PINNED_UNTIL_SESSION_KEY, 0) > time())
+
+    async def ais_pinned(self, request: HttpRequest) -> bool:
+        if not self.has_session(request):
+            return False
+        return bool(await request.session.aget(PINNED_UNTIL_SESSION_KEY, 0) > time())
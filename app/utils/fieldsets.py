@@ -0,0 +1,220 @@
+from operator import attrgetter
+from typing import Any
+from typing import Callable
+from typing import Mapping
+from typing import NamedTuple
+from typing import TypeVar
+
+from ninja import Schema
+from ninja.errors import HttpError
+
+from django.db.models import Model
+from django.db.models import QuerySet
+from django.http import Http404
+
+from .language import LanguageCode
+from .language import get_translation
+from .language import resolve_translation
+
+ModelT = TypeVar("ModelT", bound=Model)
+RowT = TypeVar("RowT")
+SchemaT = TypeVar("SchemaT", bound=Schema)
+
+Row = Mapping[str, Any]
+
+
+class ResponseField(NamedTuple):
+    """
+    A field of a response, the model columns it needs and how its value is computed from a row
+    containing these columns (e.g. one of a `values()` queryset).
+
+    The values can be rendered as they are, so that rows are serialized without building schemas.
+
+    Translated fields name the attribute which is resolved in the requested language by the
+    database (see `project`).
+    """
+    columns: tuple[str, ...]
+    value: Callable[[Row, LanguageCode], Any]
+    translated: str | None = None
+
+
+Fieldset = Mapping[str, ResponseField]
+
+
+def attribute_field(path: str) -> ResponseField:
+    """
+    A field taking the value of the given (possibly related) attribute, e.g. "provider.acronym".
+    """
+    column = path.replace(".", "__")
+    return ResponseField((column,), lambda row, lang: row[column])
+
+
+def translated_field(name: str) -> ResponseField:
+    """
+    A field taking the value of the given translated attribute in the requested language.
+
+    The value is resolved by the database, empty translations fall back to the default language
+    (see `utils.language.resolve_translation`).
+    """
+    return ResponseField((), lambda row, lang: row[name], translated=name)
+
+
+def translations_field(name: str) -> ResponseField:
+    """
+    A field containing all translations of the given translated attribute.
+    """
+
+    def value(row: Row, lang: LanguageCode) -> dict[str, Any]:
+        return {
+            "de": row[f"{name}_de"],
+            "fr": row[f"{name}_fr"],
+            "en": row[f"{name}_en"],
+            "it": row[f"{name}_it"],
+            "rm": row[f"{name}_rm"],
+        }
+
+    return ResponseField(tuple(f"{name}_{lang}" for lang in LanguageCode), value)
+
+
+def parse_fields(fields: str | None, fieldset: Fieldset) -> list[str] | None:
+    """
+    Return the response fields requested by the given comma separated list.
+
+    None is returned if no list is given, meaning all fields. Raises an HTTP 400 error if any of
+    the fields is unknown or if the list is empty.
+    """
+    if fields is None:
+        return None
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        raise HttpError(400, "No fields given")
+    unknown = requested - fieldset.keys()
+    if unknown:
+        raise HttpError(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [name for name in fieldset if name in requested]
+
+
+def get_columns(
+    fieldset: Fieldset,
+    fields: list[str] | None = None,
+    required: tuple[str, ...] = (),
+) -> list[str]:
+    """
+    Return the model columns needed to compute the given fields, all fields if None.
+
+    The required columns (e.g. ordering or lookup keys) are always included.
+    """
+    names = fieldset if fields is None else fields
+    columns = [column for name in names for column in fieldset[name].columns]
+    return list(dict.fromkeys([*required, *columns]))
+
+
+def get_translated(fieldset: Fieldset, fields: list[str] | None = None) -> list[str]:
+    """
+    Return the translated attributes needed to compute the given fields, all fields if None.
+    """
+    names = fieldset if fields is None else fields
+    translated = [fieldset[name].translated for name in names]
+    return list(dict.fromkeys(name for name in translated if name is not None))
+
+
+def project(
+    queryset: QuerySet[ModelT],
+    fieldset: Fieldset,
+    lang: LanguageCode,
+    fields: list[str] | None = None,
+    required: tuple[str, ...] = (),
+) -> QuerySet[ModelT, dict[str, Any]]:
+    """
+    Return the rows of the given queryset with the columns needed to compute the given fields (all
+    if None) and the required columns.
+
+    Translated attributes are resolved in the given language by the database, so the rows
+    contain them under their name (e.g. "name") instead of one column per language. Related
+    models are only joined if any of their columns is needed.
+    """
+    columns = get_columns(fieldset, fields, required)
+    translations = {
+        name: resolve_translation(name, lang) for name in get_translated(fieldset, fields)
+    }
+    rows: QuerySet[ModelT, dict[str, Any]] = queryset.values(*columns, **translations)
+    return rows
+
+
+def get_row_or_404(queryset: QuerySet[ModelT, RowT], **lookup: Any) -> RowT:
+    """
+    Return the single row of the given (e.g. `values()`) queryset matching the given lookup.
+
+    Raises Http404 if there is none, like `django.shortcuts.get_object_or_404`.
+    """
+    row = queryset.filter(**lookup).first()
+    if row is None:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+    return row
+
+
+async def aget_row_or_404(queryset: QuerySet[ModelT, RowT], **lookup: Any) -> RowT:
+    """
+    Async version of `get_row_or_404`.
+    """
+    row = await queryset.filter(**lookup).afirst()
+    if row is None:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+    return row
+
+
+def to_values(
+    row: Row,
+    lang: LanguageCode,
+    fieldset: Fieldset,
+    fields: list[str] | None = None,
+    exclude_none: bool = False,
+) -> dict[str, Any]:
+    """
+    Compute the given fields (all if None) of the given row.
+
+    With `exclude_none`, None values are left out, including those of translations, as ninja does
+    for operations with `exclude_none=True`. The result can be rendered with
+    `utils.renderers.json_response` without building and validating any schema, which is what
+    the list endpoints do.
+    """
+    values = {name: fieldset[name].value(row, lang) for name in fields or fieldset}
+    if exclude_none:
+        return {
+            name: without_none(value) if isinstance(value, dict) else value
+            for name, value in values.items()
+            if value is not None
+        }
+    return values
+
+
+def without_none(data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Return the given dict without its None values.
+    """
+    return {key: value for key, value in data.items() if value is not None}
+
+
+def get_row(model: Any, lang: LanguageCode, fieldset: Fieldset) -> dict[str, Any]:
+    """
+    Return the row of `project` for the given model, following relations (e.g.
+    "provider__provider_id") and resolving translated attributes in Python.
+    """
+    columns = get_columns(fieldset)
+    row = {column: attrgetter(column.replace("__", "."))(model) for column in columns}
+    for name in get_translated(fieldset):
+        row[name] = get_translation(model, name, lang)
+    return row
+
+
+def to_schema(
+    schema: type[SchemaT],
+    model: Any,
+    lang: LanguageCode,
+    fieldset: Fieldset,
+) -> SchemaT:
+    """
+    Transform the given model into the given schema.
+    """
+    return schema(**to_values(get_row(model, lang, fieldset), lang, fieldset))
@@ -0,0 +1,9 @@
+from hashlib import sha256
+from json import dumps
+from typing import Any
+
+
+def get_fingerprint(values: Any) -> str:
+    """Return a fingerprint of the given JSON serializable values, used to detect changes."""
+
+    return sha256(dumps(values, sort_keys=True).encode()).hexdigest()
@@ -2,6 +2,10 @@ from enum import StrEnum
 from typing import Any
 from typing import Final
 
+from django.db.models import F
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.db.models.functions import NullIf
 from django.http.request import HttpHeaders
 
 from .header import extract_lang
@@ -73,3 +77,18 @@ def get_translation(
         if not default:
             raise exception
         return str(default)
+
+
+def resolve_translation(
+    field_name: str, lang: LanguageCode, default_lang: LanguageCode = DEFAULT_LANGUAGE
+) -> Coalesce:
+    """
+    Return an expression computing the field `{field_name}_{lang}` in the database, falling back
+    to the field with the given default language if it is empty or NULL.
+
+    This is the same as `get_translation`, but for querysets, e.g.
+
+        Provider.objects.values("provider_id", name=resolve_translation("name", lang))
+
+    """
+    return Coalesce(NullIf(F(f"{field_name}_{lang}"), Value("")), F(f"{field_name}_{default_lang}"))
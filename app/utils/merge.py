@@ -0,0 +1,175 @@
+import json
+from collections.abc import Iterable
+from collections.abc import Sequence
+from typing import Any
+from typing import NamedTuple
+
+from django.db import connection
+from django.db.models import Model
+from django.utils import timezone
+
+
+class MergedRow(NamedTuple):
+    """A row added or updated by `merge_rows`, with the old and new values of the fields."""
+
+    pk: Any
+    key: tuple[Any, ...]
+    old: dict[str, Any] | None
+    new: dict[str, Any]
+
+
+class MergeResult(NamedTuple):
+    added: list[MergedRow]
+    updated: list[MergedRow]
+    # The keys of the rows skipped due to a conflict, with the conflicting fields and whether the
+    # row exists already
+    conflicts: list[tuple[tuple[Any, ...], list[str], bool]]
+
+
+def quote(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def get_column(model: type[Model], name: str) -> str:
+    """Return the quoted column of the given field."""
+
+    return quote(getattr(model._meta.get_field(name), "column"))
+
+
+def get_timestamp_columns(model: type[Model]) -> tuple[list[str], list[str]]:
+    """Return the quoted columns of the fields Django sets when adding rows (`auto_now_add` and
+    `auto_now`) and when updating rows (`auto_now`)."""
+
+    added, updated = [], []
+    for field in model._meta.concrete_fields:
+        if getattr(field, "auto_now", False):
+            added.append(get_column(model, field.name))
+            updated.append(get_column(model, field.name))
+        elif getattr(field, "auto_now_add", False):
+            added.append(get_column(model, field.name))
+    return added, updated
+
+
+def merge_rows(
+    model: type[Model],
+    keys: Sequence[str],
+    fields: Sequence[str],
+    unique: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    untracked: Sequence[str] = (),
+) -> MergeResult:
+    """Insert or update the given rows of a model in a few statements.
+
+    The rows contain the values of the key fields, the other fields and the untracked fields. They
+    are copied into a temporary staging table, rows having a unique value of another row of the
+    model or of an earlier row are skipped. The remaining ones are applied in one statement: rows
+    with unknown keys are added, rows with different values are updated. The timestamps of the
+    model (its `auto_now_add` and `auto_now` fields) are set like Django does. Changes of untracked
+    fields are written without changing the `auto_now` fields, they are returned as updates without
+    changed values.
+
+    Note: No signals are sent and the models are not validated, the database constraints apply.
+    """
+
+    table = quote(model._meta.db_table)
+    staging = quote(f"merge_{model._meta.db_table}")
+    key_columns = [get_column(model, key) for key in keys]
+    columns = [get_column(model, field) for field in fields]
+    untracked_columns = [get_column(model, field) for field in untracked]
+    all_columns = key_columns + columns + untracked_columns
+    staged = ", ".join(all_columns)
+    pk = quote(getattr(model._meta.pk, "column"))
+    added_timestamps, updated_timestamps = get_timestamp_columns(model)
+
+    def matches(left: str, right: str) -> str:
+        return " AND ".join(
+            f"{left}.{column} IS NOT DISTINCT FROM {right}.{column}" for column in key_columns
+        )
+
+    def key(alias: str) -> str:
+        return f"jsonb_build_array({', '.join(f'{alias}.{c}' for c in key_columns)})::text"
+
+    def values(alias: str) -> str:
+        pairs = [f"'{field}', {alias}.{column}" for field, column in zip(fields, columns)]
+        return f"jsonb_build_object({', '.join(pairs)})::text"
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+            f"SELECT {staged} FROM {table} WITH NO DATA"
+        )
+        with cursor.copy(f"COPY {staging} ({staged}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+
+        conflicts = []
+        if unique:
+            unique_columns = [get_column(model, field) for field in unique]
+
+            def skip_conflicts(others: str, earlier: str) -> None:
+                """Remove the staged rows having a unique value of another row of `others`."""
+
+                def conflicting(alias: str, column: str) -> str:
+                    return f"{alias}.{column} = s.{column} AND NOT ({matches(alias, 's')}){earlier}"
+
+                cursor.execute(
+                    f"DELETE FROM {staging} AS s WHERE EXISTS (SELECT FROM {others} AS o "
+                    f"WHERE {' OR '.join(conflicting('o', c) for c in unique_columns)}) "
+                    f"RETURNING {', '.join(f's.{c}' for c in key_columns)}, "
+                    f"EXISTS (SELECT FROM {table} AS m WHERE {matches('m', 's')}), " + ", ".join(
+                        f"EXISTS (SELECT FROM {others} AS o WHERE {conflicting('o', c)})"
+                        for c in unique_columns
+                    )
+                )
+                for result in cursor.fetchall():
+                    conflicting_fields = [
+                        field for field, conflict in zip(unique, result[len(keys) + 1:]) if conflict
+                    ]
+                    conflicts.append(
+                        (tuple(result[:len(keys)]), conflicting_fields, result[len(keys)])
+                    )
+
+            # Rows conflicting with rows of the model, then rows conflicting with an earlier row
+            # (the staging table is only appended to, so its rows are ordered as they were copied)
+            skip_conflicts(table, "")
+            skip_conflicts(staging, " AND o.ctid < s.ctid")
+
+        # The previous values are joined, as RETURNING only returns the new values before
+        # PostgreSQL 18
+        changes = " OR ".join(f"t.{column} IS DISTINCT FROM s.{column}" for column in columns)
+        any_changes = " OR ".join(
+            f"t.{column} IS DISTINCT FROM s.{column}" for column in columns + untracked_columns
+        )
+        assignments = ", ".join(
+            [f"{column} = s.{column}" for column in columns + untracked_columns] + [
+                f"{column} = CASE WHEN ({changes}) THEN %(now)s ELSE t.{column} END"
+                for column in updated_timestamps
+            ]
+        )
+        inserted = ", ".join([staged] + added_timestamps)
+        inserted_values = ", ".join([f"s.{column}" for column in all_columns] +
+                                    ["%(now)s" for _ in added_timestamps])
+        cursor.execute(
+            f"WITH updated AS ("
+            f"UPDATE {table} AS t "
+            f"SET {assignments} "
+            f"FROM {staging} AS s, {table} AS previous "
+            f"WHERE previous.{pk} = t.{pk} AND {matches('t', 's')} AND ({any_changes}) "
+            f"RETURNING t.{pk}, {key('t')}, {values('previous')}, {values('t')}"
+            f"), added AS ("
+            f"INSERT INTO {table} ({inserted}) "
+            f"SELECT {inserted_values} FROM {staging} AS s "
+            f"WHERE NOT EXISTS (SELECT FROM {table} AS t WHERE {matches('t', 's')}) "
+            f"RETURNING {pk}, {key(table)}, NULL, {values(table)}"
+            f") "
+            f"SELECT 'updated', * FROM updated UNION ALL SELECT 'added', * FROM added",
+            {"now": timezone.now()},
+        )
+        result = MergeResult([], [], conflicts)
+        for operation, pk_value, key_values, old, new in cursor.fetchall():
+            row = MergedRow(
+                pk_value, tuple(json.loads(key_values)), old and json.loads(old), json.loads(new)
+            )
+            (result.added if operation == "added" else result.updated).append(row)
+        cursor.execute(f"DROP TABLE {staging}")
+    return result
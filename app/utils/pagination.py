@@ -0,0 +1,131 @@
+import json
+from base64 import urlsafe_b64decode
+from base64 import urlsafe_b64encode
+from binascii import Error as Base64Error
+from typing import Any
+from typing import TypeVar
+
+from ninja.errors import HttpError
+from schemas import PaginationParams
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Model
+from django.db.models import QuerySet
+from django.http import HttpRequest
+
+ModelT = TypeVar("ModelT", bound=Model)
+RowT = TypeVar("RowT")
+
+
+def encode_cursor(value: str | int) -> str:
+    """
+    Encode the given ordering key value into an opaque cursor.
+    """
+    return urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str | int:
+    """
+    Decode the given opaque cursor into the ordering key value.
+
+    Raises an HTTP 400 error if the cursor is malformed.
+    """
+    try:
+        value = json.loads(urlsafe_b64decode(cursor.encode()))
+    except (Base64Error, ValueError) as exception:
+        raise HttpError(400, "Invalid cursor") from exception
+    if not isinstance(value, (str, int)) or isinstance(value, bool):
+        raise HttpError(400, "Invalid cursor")
+    return value
+
+
+def get_next_url(request: HttpRequest, value: str | int) -> str:
+    """
+    Return the URL of the current request with the cursor pointing after the given value.
+    """
+    query = request.GET.copy()
+    query["cursor"] = encode_cursor(value)
+    return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+
+def get_key(row: Any, key: str) -> Any:
+    """
+    Return the value of the given key of the given model or `values()` row.
+    """
+    return row[key] if isinstance(row, dict) else getattr(row, key)
+
+
+def get_page_queryset(
+    queryset: QuerySet[ModelT, RowT],
+    key: str,
+    params: PaginationParams,
+) -> tuple[QuerySet[ModelT, RowT], int | None]:
+    """
+    Return the given queryset restricted to the rows of the requested page and the limit, None
+    if all rows are requested. One additional row is included to know if there is a next page.
+    """
+    queryset = queryset.order_by(key)
+    if params.limit is None and params.cursor is None:
+        return queryset, None
+
+    limit = params.limit or int(settings.API_PAGINATION_DEFAULT_LIMIT)
+    if params.cursor is not None:
+        value: Any = decode_cursor(params.cursor)
+        try:
+            queryset = queryset.filter(**{f"{key}__gt": value})
+        except (TypeError, ValueError, ValidationError) as exception:
+            raise HttpError(400, "Invalid cursor") from exception
+    return queryset[:limit + 1], limit
+
+
+def get_page(
+    request: HttpRequest,
+    rows: list[RowT],
+    key: str,
+    limit: int | None,
+) -> tuple[list[RowT], str | None]:
+    """
+    Return the rows of the page and the URL of the next page, given the rows read from the
+    queryset of `get_page_queryset`.
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, get_next_url(request, get_key(rows[-1], key))
+
+
+def paginate(
+    request: HttpRequest,
+    queryset: QuerySet[ModelT, RowT],
+    key: str,
+    params: PaginationParams,
+) -> tuple[list[RowT], str | None]:
+    """
+    Return one page of the given queryset and the URL of the next page, if there is any.
+
+    Pages are selected by seeking on the given (unique) ordering key instead of using offsets,
+    so every page costs the same regardless of its position. The cursor encodes the key of the
+    last returned row.
+
+    If neither a limit nor a cursor is given, all rows are returned for backwards
+    compatibility. If only a cursor is given, the default limit is used.
+
+    The rows can be models or dicts of a `values()` queryset containing the key.
+    """
+    page_queryset, limit = get_page_queryset(queryset, key, params)
+    return get_page(request, list(page_queryset), key, limit)
+
+
+async def apaginate(
+    request: HttpRequest,
+    queryset: QuerySet[ModelT, RowT],
+    key: str,
+    params: PaginationParams,
+) -> tuple[list[RowT], str | None]:
+    """
+    Async version of `paginate`.
+    """
+    page_queryset, limit = get_page_queryset(queryset, key, params)
+    return get_page(request, [row async for row in page_queryset], key, limit)
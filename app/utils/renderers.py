@@ -0,0 +1,53 @@
+from typing import Any
+
+import orjson
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+from django.http import HttpRequest
+from django.http import HttpResponse
+
+from .response_cache import CONTENT_TYPE
+
+# Datetimes are passed to the encoder of ninja, so that they are formatted the same way as before
+# (truncated to milliseconds, "Z" for UTC)
+OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+_encoder = NinjaJSONEncoder()
+
+
+def default(value: Any) -> Any:
+    """
+    Convert the given value which is not natively supported by orjson (e.g. datetimes, decimals
+    or schemas).
+    """
+    return _encoder.default(value)
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Serialize the given data to JSON.
+    """
+    return orjson.dumps(data, default=default, option=OPTIONS)
+
+
+def json_response(data: Any) -> HttpResponse:
+    """
+    Return a JSON response with the given (already JSON compatible) data.
+
+    This bypasses the schema validation of the operation, so it is meant for data built directly
+    from database rows (see `utils.fieldsets.to_values`).
+    """
+    return HttpResponse(dumps(data), content_type=CONTENT_TYPE)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Renderer using orjson instead of the json module of the standard library.
+
+    The output is the same as the one of ninja's default renderer, except that it is compact.
+    """
+    media_type = "application/json"
+
+    def render(self, request: HttpRequest, data: Any, *, response_status: int) -> bytes:
+        return dumps(data)
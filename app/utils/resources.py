@@ -0,0 +1,213 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from typing import Callable
+
+from schemas import PaginationParams
+
+from django.db.models import Model
+from django.db.models import QuerySet
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+
+from .batch import aget_by_ids
+from .batch import get_by_ids
+from .batch import parse_ids
+from .fieldsets import Fieldset
+from .fieldsets import aget_row_or_404
+from .fieldsets import get_row_or_404
+from .fieldsets import parse_fields
+from .fieldsets import without_none
+from .language import LanguageCode
+from .language import get_language
+from .pagination import apaginate
+from .pagination import paginate
+from .renderers import json_response
+from .streaming import astream_items
+from .streaming import should_stream
+from .streaming import stream_items
+from .tombstones import aget_deleted_ids
+from .tombstones import filter_updated_since
+from .tombstones import get_deleted_ids
+from .tombstones import parse_updated_since
+
+Row = dict[str, Any]
+
+
+@dataclass(frozen=True)
+class Resource:
+    """
+    The read operations of a resource (getting one row, a batch of rows or a list of rows), shared
+    by the sync and the async routers. The views only declare the operation and call these.
+
+    Both variants build the same responses, they only differ in how the database is queried.
+    """
+    model: type[Model]
+    fieldset: Fieldset
+    # Returns the queryset of the rows needed for the given language and response fields
+    queryset: Callable[[LanguageCode, list[str] | None], QuerySet[Any, Row]]
+    # Transforms a row of the queryset into the values of a response object
+    to_values: Callable[[Row, LanguageCode, list[str] | None], Row]
+    # The (unique) external key of batch requests and of tombstones
+    batch_key: str
+    page_key: str = "id"
+    # Returns the keys of further rows to report as deleted, e.g. disabled users
+    deleted: Callable[[datetime], QuerySet[Any, str]] | None = None
+
+    def parse(self, request: HttpRequest, lang: LanguageCode | None,
+              fields: str | None) -> tuple[LanguageCode, list[str] | None]:
+        """
+        Return the language and the response fields to use for the given query parameters.
+        """
+        fields_to_use = parse_fields(fields, self.fieldset)
+        return get_language(lang, request.headers), fields_to_use
+
+    def items_response(
+        self, rows: list[Row], lang: LanguageCode, fields: list[str] | None, **extra: Any
+    ) -> HttpResponse:
+        """
+        Return a list response with the values of the given rows and the given extra values.
+        """
+        items = [self.to_values(row, lang, fields) for row in rows]
+        return json_response(without_none({"items": items, **extra}))
+
+    def by_ids(self, ids: list[str], lang: LanguageCode, fields: list[str] | None) -> HttpResponse:
+        """
+        Return the rows with the given IDs in the order of the IDs, using a single query.
+
+        IDs without a row are listed in "missing".
+        """
+        rows, missing = get_by_ids(self.queryset(lang, fields), self.batch_key, ids)
+        return self.items_response(rows, lang, fields, missing=missing)
+
+    async def aby_ids(
+        self, ids: list[str], lang: LanguageCode, fields: list[str] | None
+    ) -> HttpResponse:
+        """
+        Async version of `by_ids`.
+        """
+        rows, missing = await aget_by_ids(self.queryset(lang, fields), self.batch_key, ids)
+        return self.items_response(rows, lang, fields, missing=missing)
+
+    def batch(
+        self,
+        request: HttpRequest,
+        ids: list[str],
+        lang: LanguageCode | None = None,
+        fields: str | None = None,
+    ) -> HttpResponse:
+        """
+        Return the rows with the given IDs, see `by_ids`.
+        """
+        lang_to_use, fields_to_use = self.parse(request, lang, fields)
+        return self.by_ids(ids, lang_to_use, fields_to_use)
+
+    async def abatch(
+        self,
+        request: HttpRequest,
+        ids: list[str],
+        lang: LanguageCode | None = None,
+        fields: str | None = None,
+    ) -> HttpResponse:
+        """
+        Async version of `batch`.
+        """
+        lang_to_use, fields_to_use = self.parse(request, lang, fields)
+        return await self.aby_ids(ids, lang_to_use, fields_to_use)
+
+    def get(
+        self,
+        request: HttpRequest,
+        lang: LanguageCode | None = None,
+        fields: str | None = None,
+        **lookup: Any,
+    ) -> HttpResponse:
+        """
+        Return the row matching the given lookup, raise Http404 if there is none.
+        """
+        lang_to_use, fields_to_use = self.parse(request, lang, fields)
+        row = get_row_or_404(self.queryset(lang_to_use, fields_to_use), **lookup)
+        return json_response(self.to_values(row, lang_to_use, fields_to_use))
+
+    async def aget(
+        self,
+        request: HttpRequest,
+        lang: LanguageCode | None = None,
+        fields: str | None = None,
+        **lookup: Any,
+    ) -> HttpResponse:
+        """
+        Async version of `get`.
+        """
+        lang_to_use, fields_to_use = self.parse(request, lang, fields)
+        row = await aget_row_or_404(self.queryset(lang_to_use, fields_to_use), **lookup)
+        return json_response(self.to_values(row, lang_to_use, fields_to_use))
+
+    def get_list(
+        self,
+        request: HttpRequest,
+        pagination: PaginationParams,
+        lang: LanguageCode | None = None,
+        fields: str | None = None,
+        *,
+        ids: str | None = None,
+        updated_since: datetime | None = None,
+    ) -> HttpResponse | StreamingHttpResponse:
+        """
+        Return the rows with the given comma separated IDs (see `by_ids`) or all rows updated since
+        the given timestamp, streamed or paginated.
+
+        The first page of the rows updated since a timestamp also lists the keys of the rows
+        deleted since then.
+        """
+        lang_to_use, fields_to_use = self.parse(request, lang, fields)
+        if ids is not None:
+            return self.by_ids(parse_ids(ids), lang_to_use, fields_to_use)
+        since = parse_updated_since(updated_since)
+        queryset = filter_updated_since(self.queryset(lang_to_use, fields_to_use), since)
+        if should_stream(pagination) and since is None:
+            return stream_items(
+                queryset.order_by(self.page_key),
+                lambda row: self.to_values(row, lang_to_use, fields_to_use),
+            )
+
+        rows, next_url = paginate(request, queryset, self.page_key, pagination)
+        deleted = None
+        if since is not None and pagination.cursor is None:
+            deleted = get_deleted_ids(self.model, self.batch_key, since)
+            if self.deleted is not None:
+                deleted.extend(self.deleted(since))
+        return self.items_response(rows, lang_to_use, fields_to_use, next=next_url, deleted=deleted)
+
+    async def aget_list(
+        self,
+        request: HttpRequest,
+        pagination: PaginationParams,
+        lang: LanguageCode | None = None,
+        fields: str | None = None,
+        *,
+        ids: str | None = None,
+        updated_since: datetime | None = None,
+    ) -> HttpResponse | StreamingHttpResponse:
+        """
+        Async version of `get_list`.
+        """
+        lang_to_use, fields_to_use = self.parse(request, lang, fields)
+        if ids is not None:
+            return await self.aby_ids(parse_ids(ids), lang_to_use, fields_to_use)
+        since = parse_updated_since(updated_since)
+        queryset = filter_updated_since(self.queryset(lang_to_use, fields_to_use), since)
+        if should_stream(pagination) and since is None:
+            return astream_items(
+                queryset.order_by(self.page_key),
+                lambda row: self.to_values(row, lang_to_use, fields_to_use),
+            )
+
+        rows, next_url = await apaginate(request, queryset, self.page_key, pagination)
+        deleted = None
+        if since is not None and pagination.cursor is None:
+            deleted = await aget_deleted_ids(self.model, self.batch_key, since)
+            if self.deleted is not None:
+                deleted.extend([key async for key in self.deleted(since)])
+        return self.items_response(rows, lang_to_use, fields_to_use, next=next_url, deleted=deleted)
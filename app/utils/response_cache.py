@@ -0,0 +1,195 @@
+from functools import partial
+from functools import wraps
+from hashlib import sha256
+from time import time_ns
+from typing import Any
+from typing import Callable
+from typing import Sequence
+from typing import TypeVar
+from typing import cast
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.cache import BaseCache
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import post_save
+from django.http import HttpRequest
+from django.http import HttpResponse
+from django.http.response import HttpResponseBase
+
+from .conditional import VALIDATORS_ATTRIBUTE
+from .language import get_language
+
+ViewT = TypeVar("ViewT", bound=Callable[..., Any])
+
+CACHE_ALIAS = "api"
+CONTENT_TYPE = "application/json; charset=utf-8"
+
+# Name of the request attribute used to pass the cache key to the response
+CACHE_KEY_ATTRIBUTE = "_response_cache_key"
+
+
+def get_cache() -> BaseCache:
+    return caches[CACHE_ALIAS]
+
+
+def is_shared_cache() -> bool:
+    """
+    Return whether the cache, and so the version counters, are shared by all processes.
+    """
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def get_version_key(model: type[Model]) -> str:
+    return f"version:{model._meta.label}"
+
+
+def get_versions(models: Sequence[type[Model]]) -> list[int]:
+    """
+    Return the current version counters of the given models.
+
+    Missing counters (never set or evicted) are initialized with the current time, so that they
+    never go back to a value which has been used before.
+    """
+    cache = get_cache()
+    keys = [get_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(*models: type[Model]) -> None:
+    """
+    Increment the version counters of the given models, invalidating all cached responses which
+    depend on them.
+    """
+    cache = get_cache()
+    for model in models:
+        try:
+            cache.incr(get_version_key(model))
+        except ValueError:
+            cache.add(get_version_key(model), time_ns(), timeout=None)
+
+
+def bump_version_on_commit(*models: type[Model]) -> None:
+    """
+    Increment the version counters of the given models once the current transaction commits.
+
+    The counters are stored in the "api" cache. With a cache local to the process (the default, see
+    `is_shared_cache`), only the responses cached by the current process are invalidated. Changes
+    made by other processes (e.g. `bod_sync`, `stac_sync` or `cognito_outbox`) are then only seen
+    once they change the validators of the `conditional` decorator, which are part of the cache
+    key, or once the cached responses expire (`API_CACHE_TIMEOUT`).
+    """
+    transaction.on_commit(partial(bump_version, *models))
+
+
+def invalidate_on_change(model: type[Model]) -> None:
+    """
+    Connect the save signal of the given model to its version counter.
+
+    Deletions are not connected, so that Django can still delete querysets without loading the
+    rows. They change the tombstones and therefore the validators of the `conditional` decorator,
+    which are part of the cache key.
+
+    Note: Bulk operations (`QuerySet.update`, `bulk_create`, `bulk_update`) do not send this
+    signal, callers have to invoke `bump_version_on_commit` themselves.
+    """
+
+    def receiver(sender: type[Model], **kwargs: Any) -> None:
+        bump_version_on_commit(sender)
+
+    uid = f"response_cache_{model._meta.label}"
+    post_save.connect(receiver, sender=model, weak=False, dispatch_uid=f"{uid}_save")
+
+
+def get_cache_key(request: HttpRequest, models: Sequence[type[Model]]) -> str:
+    """
+    Return the cache key of the response to the given request.
+
+    The key depends on the full path (including the query parameters), the requested language,
+    the version counters of the given models and the validators of conditional operations, if
+    any.
+    """
+    lang = get_language(request.GET.get("lang"), request.headers)
+    validators = getattr(request, VALIDATORS_ATTRIBUTE, None)
+    digest = sha256()
+    digest.update(f"{lang};{request.get_full_path()};".encode())
+    digest.update(f"{get_versions(models)};{validators[0] if validators else ''}".encode())
+    return f"response:{digest.hexdigest()}"
+
+
+def store_response(request: HttpRequest, response: HttpResponseBase) -> None:
+    """
+    Store the serialized content of the given successful response for cached operations.
+    """
+    key = getattr(request, CACHE_KEY_ATTRIBUTE, None)
+    if key is not None and response.status_code == 200 and isinstance(response, HttpResponse):
+        get_cache().set(key, response.content, timeout=int(settings.API_CACHE_TIMEOUT))
+
+
+def cached(*models: type[Model]) -> Callable[[ViewT], ViewT]:
+    """
+    Decorator caching the serialized JSON response of an API operation whose response depends on
+    the given models.
+
+    On a hit, the stored bytes are returned without touching the ORM or the schemas. On a miss,
+    the operation runs as usual and `LoggedNinjaAPI` stores the rendered response (responses
+    returned by the operation itself are stored directly). Cached
+    responses are invalidated with the version counters of the given models (see
+    `invalidate_on_change` and `bump_version_on_commit`).
+
+    Must be placed below the router decorator and the `conditional` decorator:
+
+        @router.get("providers", ...)
+        @conditional(Provider)
+        @cached(Provider)
+        def providers(request: HttpRequest) -> ...:
+            ...
+
+    Async operations are supported too.
+    """
+
+    def decorator(func: ViewT) -> ViewT:
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+                key = await sync_to_async(get_cache_key)(request, models)
+                content = await get_cache().aget(key)
+                if content is not None:
+                    return HttpResponse(content, content_type=CONTENT_TYPE)
+
+                setattr(request, CACHE_KEY_ATTRIBUTE, key)
+                result = await func(request, *args, **kwargs)
+                if isinstance(result, HttpResponseBase):
+                    await sync_to_async(store_response)(request, result)
+                return result
+
+            return cast(ViewT, async_wrapper)
+
+        @wraps(func)
+        def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+            key = get_cache_key(request, models)
+            content = get_cache().get(key)
+            if content is not None:
+                return HttpResponse(content, content_type=CONTENT_TYPE)
+
+            setattr(request, CACHE_KEY_ATTRIBUTE, key)
+            result = func(request, *args, **kwargs)
+            if isinstance(result, HttpResponseBase):
+                store_response(request, result)
+            return result
+
+        return cast(ViewT, wrapper)
+
+    return decorator
@@ -0,0 +1,75 @@
+from typing import Any
+from typing import AsyncIterator
+from typing import Callable
+from typing import Iterator
+from typing import TypeVar
+
+from schemas import PaginationParams
+
+from django.conf import settings
+from django.db.models import Model
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+
+from .renderers import dumps
+from .response_cache import CONTENT_TYPE
+
+ModelT = TypeVar("ModelT", bound=Model)
+RowT = TypeVar("RowT")
+
+
+def should_stream(params: PaginationParams) -> bool:
+    """
+    Return True if the list response should be streamed.
+
+    Only complete lists are streamed, paginated responses are bounded by the limit anyway.
+    """
+    if params.limit is not None or params.cursor is not None:
+        return False
+    return bool(settings.API_STREAM_LIST_RESPONSES)
+
+
+def stream_items(
+    queryset: QuerySet[ModelT, RowT],
+    to_item: Callable[[RowT], Any],
+) -> StreamingHttpResponse:
+    """
+    Return a streaming response with the envelope `{"items": [...]}` containing the given rows.
+
+    The rows are read in chunks using a server-side cursor and each item is serialized and sent
+    as soon as it has been read, so neither the rows nor the JSON document are ever fully held in
+    memory. The items are serialized the same way as non-streamed responses.
+    """
+
+    def content() -> Iterator[bytes]:
+        yield b'{"items":['
+        chunk_size = int(settings.API_STREAM_CHUNK_SIZE)
+        for index, row in enumerate(queryset.iterator(chunk_size=chunk_size)):
+            if index:
+                yield b","
+            yield dumps(to_item(row))
+        yield b"]}"
+
+    return StreamingHttpResponse(content(), content_type=CONTENT_TYPE)
+
+
+def astream_items(
+    queryset: QuerySet[ModelT, RowT],
+    to_item: Callable[[RowT], Any],
+) -> StreamingHttpResponse:
+    """
+    Async version of `stream_items`, for ASGI servers.
+    """
+
+    async def content() -> AsyncIterator[bytes]:
+        yield b'{"items":['
+        chunk_size = int(settings.API_STREAM_CHUNK_SIZE)
+        index = 0
+        async for row in queryset.aiterator(chunk_size=chunk_size):
+            if index:
+                yield b","
+            yield dumps(to_item(row))
+            index += 1
+        yield b"]}"
+
+    return StreamingHttpResponse(content(), content_type=CONTENT_TYPE)
@@ -0,0 +1,103 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+from typing import TypeVar
+
+from ninja.errors import HttpError
+from support.models import Tombstone
+
+from django.conf import settings
+from django.db import connection
+from django.db.migrations import RunSQL
+from django.db.models import Exists
+from django.db.models import Model
+from django.db.models import OuterRef
+from django.db.models import QuerySet
+from django.utils import timezone
+
+ModelT = TypeVar("ModelT", bound=Model)
+RowT = TypeVar("RowT")
+
+
+def record_deletions(table: str, label: str, key: str) -> RunSQL:
+    """
+    Return a migration operation recording a tombstone with the given (external) key column for
+    every row deleted from the given table, labelled as the given model.
+
+    The tombstones are recorded by a trigger with one INSERT per DELETE statement, so deleting
+    querysets, cascades and raw SQL deletions are recorded too. As there are no signal receivers,
+    Django can still delete querysets without loading the rows.
+    """
+    trigger = connection.ops.quote_name(f"{table}_tombstones")
+    table = connection.ops.quote_name(table)
+    return RunSQL(
+        f"CREATE TRIGGER {trigger} AFTER DELETE ON {table} "
+        f"REFERENCING OLD TABLE AS deleted_rows FOR EACH STATEMENT "
+        f"EXECUTE FUNCTION record_tombstones('{label}', '{key}')",
+        f"DROP TRIGGER {trigger} ON {table}",
+    )
+
+
+def purge_tombstones() -> int:
+    """
+    Remove the tombstones older than the retention period and return their number.
+
+    This is done once per sync (see `bod_sync`) instead of with every deletion.
+    """
+    cutoff = timezone.now() - timedelta(days=int(settings.API_TOMBSTONE_RETENTION_DAYS))
+    purged, _ = Tombstone.objects.filter(deleted__lt=cutoff).delete()
+    return purged
+
+
+def parse_updated_since(since: datetime | None) -> datetime | None:
+    """
+    Return the given timestamp as aware datetime (naive ones are taken as UTC).
+
+    Raises an HTTP 410 error if the timestamp is older than the retention period of tombstones,
+    as the deletions since then are not known anymore and a full sync is required.
+    """
+    if since is None:
+        return None
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    cutoff = timezone.now() - timedelta(days=int(settings.API_TOMBSTONE_RETENTION_DAYS))
+    if since < cutoff:
+        raise HttpError(410, "Deletions are not available that far back, a full sync is required")
+    return since
+
+
+def filter_updated_since(
+    queryset: QuerySet[ModelT, RowT],
+    since: datetime | None,
+) -> QuerySet[ModelT, RowT]:
+    """
+    Restrict the given queryset to the rows updated at or after the given timestamp, if any.
+    """
+    if since is None:
+        return queryset
+    return queryset.filter(updated__gte=since)
+
+
+def get_deleted_ids(model: type[Model], key: str, since: datetime) -> list[str]:
+    """
+    Return the keys of the objects of the given model deleted at or after the given timestamp.
+
+    Keys of objects which have been created again are not returned.
+    """
+    return list(get_deleted_queryset(model, key, since))
+
+
+async def aget_deleted_ids(model: type[Model], key: str, since: datetime) -> list[str]:
+    """
+    Async version of `get_deleted_ids`.
+    """
+    return [object_id async for object_id in get_deleted_queryset(model, key, since)]
+
+
+def get_deleted_queryset(model: type[Model], key: str, since: datetime) -> QuerySet[Tombstone, str]:
+    recreated = model._base_manager.filter(**{key: OuterRef("object_id")})
+    tombstones = Tombstone.objects.filter(model=model._meta.label,
+                                          deleted__gte=since).exclude(Exists(recreated))
+    ids: QuerySet[Tombstone, str] = tombstones.order_by("deleted",
+                                                        "id").values_list("object_id", flat=True)
+    return ids
@@ -4,6 +4,10 @@ WSGI config for project project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+Run as main program, it starts gunicorn with gevent workers. With the env variable
+`SERVER_MODE=asgi`, it starts gunicorn with uvicorn workers serving the ASGI application
+instead (see config.asgi).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/wsgi/
 """
@@ -17,18 +21,24 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/wsgi/
 # then it could lead to inconsistencies in how the ssl module is used. Thus we patch
 # the ssl module through gevent.monkey.patch_all before any other import, especially
 # the app import, which would cause the boto module to be loaded, which would in turn
-# load the ssl module.
+# load the ssl module. It also has to happen before psycopg is imported, so that psycopg waits
+# cooperatively for the database (and the connection pools use greenlets, see DB_POOL).
 # NOTE: We do this only if wsgi.py is the main program, when running django runserver
 # for local development, monkey patching creates the following error:
 #     `RuntimeError: cannot release un-acquired lock`
-if __name__ == '__main__':
+# In ASGI mode, the uvicorn workers run an asyncio event loop, which must not be monkey patched.
+from os import environ
+
+SERVER_MODE = environ.get('SERVER_MODE', 'wsgi')
+
+if __name__ == '__main__' and SERVER_MODE != 'asgi':
     import gevent.monkey
     gevent.monkey.patch_all()
 
 # default to the setting that's being created in DOCKERFILE
-from os import environ
-
 environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+if SERVER_MODE == 'asgi':
+    environ.setdefault('API_ASYNC', 'true')
 
 # Initialize OTEL.
 # Initialize should be called as early as possible, but at least before the app is imported
@@ -42,6 +52,7 @@ from gunicorn.app.base import BaseApplication
 from gunicorn.arbiter import Arbiter
 from gunicorn.workers.base import Worker
 from gunicorn.config import Config
+from django.core.handlers.asgi import ASGIHandler
 from django.core.handlers.wsgi import WSGIHandler
 from django.core.wsgi import get_wsgi_application
 
@@ -55,7 +66,11 @@ class StandaloneApplication(BaseApplication):  # pylint: disable=abstract-method
 
     cfg: Config
 
-    def __init__(self, app: WSGIHandler, options: dict[str, object] | None = None) -> None:  # pylint: disable=redefined-outer-name
+    def __init__(
+        self,
+        app: WSGIHandler | ASGIHandler,
+        options: dict[str, object] | None = None  # pylint: disable=redefined-outer-name
+    ) -> None:
         self.options = options or {}
         self.application = app
         super().__init__()
@@ -69,7 +84,7 @@ class StandaloneApplication(BaseApplication):  # pylint: disable=abstract-method
         for key, value in config.items():
             self.cfg.set(key.lower(), value)
 
-    def load(self) -> WSGIHandler:  # type:ignore[override]
+    def load(self) -> WSGIHandler | ASGIHandler:  # type:ignore[override]
         return self.application
 
 
@@ -96,4 +111,15 @@ if __name__ == '__main__':
         'logconfig_dict': get_logging_config(),
         'post_fork': post_fork,
     }
-    StandaloneApplication(application, options).run()
+    if SERVER_MODE == 'asgi':
+        from uvicorn_worker import UvicornWorker
+        from config.asgi import application as asgi_application
+
+        class DjangoUvicornWorker(UvicornWorker):
+            # Django does not support the lifespan protocol of ASGI
+            CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, 'lifespan': 'off'}
+
+        options['worker_class'] = DjangoUvicornWorker
+        StandaloneApplication(asgi_application, options).run()
+    else:
+        StandaloneApplication(application, options).run()